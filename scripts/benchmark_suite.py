@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Times the snapshot, seed and scoring paths on a synthetic league inside an
+in-process fake Firestore (fake_firestore.FakeFirestore, `latency` seconds per
+RPC), so numbers are reproducible and nothing real is touched.
+
+Stages, in order: generate -> restore (seed_tool.restore_documents) -> dump
+(snapshot_tool.dump_firestore) -> augment (collection-group weekly picks) ->
+metrics -> serialize (write/load per snapshot format) -> score
+(scoring_engine.build_leaderboard) -> wipe (seed_tool.wipe_collections).
+
+Each run is saved as benchmarks/bench_<timestamp>.json under SNAPSHOTS_ROOT and
+compared with the most recent earlier run that used the same parameters; stages
+that got more than REGRESSION_TOLERANCE slower are flagged.
+"""
+import datetime as dt, json, platform, tempfile, time, typing as t
+from pathlib import Path
+
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+BENCHMARKS_DIR = "benchmarks"
+FAKE_RPC_LATENCY = 0.005       # seconds per fake RPC; 0 measures pure client-side cost
+REGRESSION_TOLERANCE = 0.20    # flag stages more than 20% slower than the previous comparable run
+REGRESSION_MIN_SECONDS = 0.01  # ...and slower by at least this much, so tiny stages don't flap
+
+import scoring_engine, seed_tool, snapshot_io, snapshot_tool, synthetic_league
+from fake_firestore import FakeFirestore
+from snapshot_tree import SnapshotTree
+
+class _Stage:
+    """Context manager recording wall time and the fake's RPC counts for one stage."""
+    def __init__(self, run: dict, name: str, db: FakeFirestore):
+        self.run = run; self.name = name; self.db = db; self.record = {}
+    def __enter__(self):
+        self._rpcs = dict(self.db.rpcs); self._started = time.perf_counter(); return self.record
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._started
+        rpcs = {k: v - self._rpcs.get(k, 0) for k, v in self.db.rpcs.items() if v - self._rpcs.get(k, 0)}
+        self.run["stages"][self.name] = {"seconds": round(seconds, 4), "rpcs": rpcs, **self.record}
+
+def run_suite(users: int=500, episodes: int=14, phases: int=3, pick_density: float=0.9, seed: int=0,
+              latency: float=FAKE_RPC_LATENCY, formats: t.Sequence[str]=("json", "ndjson", "msgpack", "shards")) -> dict:
+    params = {"users": users, "episodes": episodes, "phases": phases, "pickDensity": pick_density, "seed": seed, "latency": latency}
+    run = {"_type": "benchmarkRun", "startedAt": dt.datetime.utcnow().isoformat() + "Z", "params": params,
+           "environment": {"python": platform.python_version(), "platform": platform.platform(), "msgpack": snapshot_io.HAS_MSGPACK}, "stages": {}}
+    db = FakeFirestore(latency=latency, seed=seed)
+
+    with _Stage(run, "generate", db) as rec:
+        entries = synthetic_league.generate_league(users, episodes, phases, pick_density=pick_density, seed=seed); rec["documents"] = len(entries)
+    with _Stage(run, "restore", db) as rec:
+        rec["documents"] = seed_tool.restore_documents(db, iter(entries), ramp_up=False)["written"]
+    with _Stage(run, "dump", db) as rec:
+        fs_dump = snapshot_tool.dump_firestore(None, None, stats=rec, db=db)
+        rec.pop("wallSeconds", None)
+    with _Stage(run, "augment", db) as rec:
+        tree = SnapshotTree.from_dump(fs_dump)
+        rec["documents"] = snapshot_tool.augment_with_weekly_picks_via_collection_group(db, tree)
+        fs_dump["rootCollections"] = tree.to_dump()
+    with _Stage(run, "metrics", db) as rec:
+        rec.update(snapshot_tool.compute_metrics(fs_dump)); rec.pop("weeklyPicksByUser")
+    with tempfile.TemporaryDirectory() as scratch, _Stage(run, "serialize", db) as rec:
+        folder = Path(scratch); documents = list(tree.iter_entries())
+        snapshot_io.write_snapshot(folder, "json", synthetic_league.league_meta(documents), iter(documents))
+        rec["formats"] = snapshot_io.benchmark_formats(folder, formats, repeat=1)
+    with _Stage(run, "score", db) as rec:
+        board = scoring_engine.build_leaderboard(scoring_engine.SeasonData.from_entries(entries, synthetic_league.DEFAULT_SEASON_ID))
+        rec["rows"] = len(board["rows"]); rec["scoredEpisodes"] = len(board["scoredEpisodes"])
+    with _Stage(run, "wipe", db) as rec:
+        report = seed_tool.wipe_collections(db, ["seasons"], ramp_up=False); rec["documents"] = sum(report["deleted"].values())
+    run["totalSeconds"] = round(sum(s["seconds"] for s in run["stages"].values()), 4)
+    return run
+
+def previous_run(out_dir: Path, params: dict, exclude: Path=None) -> t.Optional[dict]:
+    for path in sorted(out_dir.glob("bench_*.json"), reverse=True):
+        if path == exclude: continue
+        try:
+            run = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if run.get("params") == params: return run
+    return None
+
+def compare_runs(current: dict, previous: dict) -> t.List[dict]:
+    """Per-stage timing change against `previous`; regression = slower beyond both thresholds."""
+    rows = []
+    for name, stage in current["stages"].items():
+        before = (previous["stages"].get(name) or {}).get("seconds")
+        if before is None: continue
+        delta = stage["seconds"] - before
+        rows.append({"stage": name, "before": before, "after": stage["seconds"], "change": round(delta / before, 3) if before else None,
+                     "regression": delta > REGRESSION_MIN_SECONDS and before > 0 and delta / before > REGRESSION_TOLERANCE})
+    return rows
+
+def save_run(run: dict, out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bench_{dt.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path.write_text(json.dumps(run, indent=2), encoding="utf-8")
+    return path
+
+def print_run(run: dict, comparison: t.Optional[t.List[dict]]=None):
+    changes = {c["stage"]: c for c in comparison or []}
+    for name, stage in run["stages"].items():
+        c = changes.get(name)
+        note = f"  {c['change']:+.0%} vs {c['before']}s{'  REGRESSION' if c['regression'] else ''}" if c and c["change"] is not None else ""
+        rpcs = sum(stage["rpcs"].values())
+        print(f"  {name:<10} {stage['seconds']:>9.3f}s  {rpcs:>6} RPCs{note}")
+    for f in run["stages"].get("serialize", {}).get("formats", []):
+        print(f"    {f['format']:<8} {f['bytes']:>11,} bytes  dump {f['dumpSeconds']}s  load {f['loadSeconds']}s")
+    print(f"  {'total':<10} {run['totalSeconds']:>9.3f}s")
+
+def main():
+    print("\n=== Benchmark Suite (fake Firestore) ===")
+    ask = lambda prompt, default, cast=int: cast(input(f"{prompt} [{default}]: ").strip() or default)
+    run = run_suite(users=ask("Users", 500), episodes=ask("Episodes", 14), phases=ask("Phases", 3),
+                    pick_density=ask("Pick density 0-1", 0.9, float), seed=ask("Seed", 0), latency=ask("Fake RPC latency (s)", FAKE_RPC_LATENCY, float))
+    out_dir = Path(SNAPSHOTS_ROOT) / BENCHMARKS_DIR
+    path = save_run(run, out_dir)
+    previous = previous_run(out_dir, run["params"], exclude=path)
+    comparison = compare_runs(run, previous) if previous else None
+    print_run(run, comparison)
+    print(f"\nSaved {path}" + (f" (compared with the run from {previous['startedAt']})" if previous else " (no earlier run with these parameters)"))
+    if comparison and any(c["regression"] for c in comparison): print("Some stages regressed; see above.")
+
+if __name__ == "__main__":
+    main()
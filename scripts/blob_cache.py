@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for downloaded Storage objects (avatars), shared by all
+snapshot folders.
+
+SNAPSHOTS_ROOT/blobs/ab/<key>   one read-only copy per distinct object. The key comes
+                                from the object's hash: md5 when the blob has one,
+                                otherwise crc32c plus size (composite objects).
+snapshot_*/users_avatars/<f>    hard links to the cached files. A new snapshot costs
+                                directory entries, not bytes.
+
+An entry's link count tells whether a snapshot still uses it. Entries with link
+count 1 are unreferenced. collect_garbage() removes them once they have been
+unreferenced for the retention period. It also removes snapshot_store objects
+that no manifest references and that are older than that period. The age check
+keeps a run that is still writing safe.
+"""
+import base64, os, shutil, stat, time, typing as t
+from pathlib import Path
+
+BLOBS_DIR = "blobs"
+BLOB_RETENTION_DAYS = 14  # unreferenced cache entries / store objects younger than this survive a GC
+
+import snapshot_store
+
+class BlobCache:
+    def __init__(self, root: Path):
+        self.root = root
+
+    @staticmethod
+    def key_for(checksums: dict, size: t.Optional[int]) -> t.Optional[str]:
+        """Cache key from Blob.md5_hash / Blob.crc32c (base64, as storage_transfer.blob_checksums returns them)."""
+        if checksums.get("md5"): return "md5-" + base64.b64decode(checksums["md5"]).hex()
+        if checksums.get("crc32c") and size is not None: return f"crc32c-{base64.b64decode(checksums['crc32c']).hex()}-{size}"
+        return None
+
+    def path(self, key: str) -> Path:
+        return self.root / key.split("-", 1)[1][:2] / key
+
+    def has(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def link(self, key: str, dest: Path) -> bool:
+        """Point dest at the cached copy (hard link; copy where links are unsupported). False if not cached."""
+        src = self.path(key)
+        if not src.exists(): return False
+        if dest.exists() and os.path.samefile(src, dest): return True
+        tmp = dest.with_name(dest.name + ".part")
+        if tmp.exists(): tmp.unlink()
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)  # other filesystem / no hard links: fall back to a plain copy
+        os.replace(tmp, dest)
+        return True
+
+    def adopt(self, src: Path, key: str) -> bool:
+        """Make the verified file at src the cached copy of key (src becomes one of its links). False if already cached."""
+        path = self.path(key)
+        if self.has(key):
+            self.link(key, src); return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(src, path)  # never os.replace: a concurrent adopt of the same object must not swap the entry's inode
+        except FileExistsError:  # another thread cached the same object first: share its entry
+            self.link(key, src); return False
+        except OSError:  # no hard links: copy through an exclusive create instead
+            try:
+                with open(src, "rb") as fh, open(path, "xb") as out: shutil.copyfileobj(fh, out)
+            except FileExistsError:
+                self.link(key, src); return False
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)  # shared by every snapshot: never edit in place
+        return True
+
+    def entries(self) -> t.Iterator[Path]:
+        if not self.root.exists(): return
+        for sub in self.root.iterdir():
+            if sub.is_dir():
+                for f in sub.iterdir():
+                    if not f.name.endswith(".tmp"): yield f
+
+def blob_cache_for(snap_dir: Path) -> BlobCache:
+    """Snapshot folders live side by side, so the cache is their shared sibling (same filesystem, so links work)."""
+    return BlobCache(snap_dir.parent / BLOBS_DIR)
+
+def folder_bytes(folder: Path) -> t.Dict[str, int]:
+    """logical = sum of file sizes; physical = bytes held only by this folder (files not linked anywhere else)."""
+    logical = physical = files = 0
+    if folder.is_dir():
+        for f in folder.iterdir():
+            if not f.is_file(): continue
+            st = f.stat(); files += 1; logical += st.st_size
+            if st.st_nlink == 1: physical += st.st_size
+    return {"files": files, "logicalBytes": logical, "physicalBytes": physical}
+
+def import_folder(cache: BlobCache, folder: Path, checksums: t.Callable[[Path], dict]) -> dict:
+    """Swap the plain copies in an existing snapshot folder for links into the cache (for folders made before it)."""
+    report = {"linked": 0, "adopted": 0, "bytesFreed": 0}
+    for f in sorted(folder.iterdir()) if folder.is_dir() else []:
+        if not f.is_file() or f.name.endswith(".part") or f.stat().st_nlink > 1: continue
+        key = cache.key_for(checksums(f), f.stat().st_size)
+        if key is None: continue
+        if cache.has(key):
+            size = f.stat().st_size; cache.link(key, f); report["linked"] += 1; report["bytesFreed"] += size
+        else:
+            cache.adopt(f, key); report["adopted"] += 1
+    return report
+
+def collect_garbage(base_dir: Path, retention_days: float=BLOB_RETENTION_DAYS, dry_run: bool=False) -> dict:
+    """
+    Remove cache entries no snapshot links to and store objects no manifest references,
+    once they are older than retention_days. The age is ctime for cache entries, which
+    changes when a link is removed, and mtime for objects.
+    Returns {"blobs": {"removed", "bytes", "kept"}, "objects": {...}, "dryRun"}.
+    """
+    cutoff = time.time() - retention_days * 86400
+    report = {"blobs": {"removed": 0, "bytes": 0, "kept": 0}, "objects": {"removed": 0, "bytes": 0, "kept": 0}, "dryRun": dry_run}
+    for entry in BlobCache(base_dir / BLOBS_DIR).entries():
+        st = entry.stat()
+        if st.st_nlink > 1 or st.st_ctime > cutoff:
+            report["blobs"]["kept"] += 1; continue
+        report["blobs"]["removed"] += 1; report["blobs"]["bytes"] += st.st_size
+        if not dry_run: entry.unlink()
+
+    referenced = set()
+    for d in base_dir.iterdir() if base_dir.exists() else []:
+        if d.is_dir() and d.name.startswith("snapshot_") and (d / snapshot_store.MANIFEST_NAME).exists():
+            referenced.update(digest for digest, _ in snapshot_store.load_manifest(d / snapshot_store.MANIFEST_NAME)["documents"].values())
+    store = snapshot_store.ObjectStore(base_dir / snapshot_store.OBJECTS_DIR)
+    for digest in list(store.digests()):
+        path = store.path(digest)
+        if digest in referenced or path.stat().st_mtime > cutoff:
+            report["objects"]["kept"] += 1; continue
+        report["objects"]["removed"] += 1
+        report["objects"]["bytes"] += store.remove(digest) if not dry_run else path.stat().st_size
+    return report
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Builds a Firestore data bundle for one season, so the app can seed its cache with
+one static-file request instead of six cold listener reads.
+
+A bundle is a sequence of length-prefixed JSON elements: the byte length in
+ASCII digits, then one BundleElement. The sequence is metadata, the named
+queries, then a documentMetadata element per document, each followed by its
+document element if it exists. Named queries match FirestoreLeagueRepository's listeners:
+
+    <season>/phases       seasons/<season>/phases
+    <season>/results      seasons/<season>/results
+    <season>/users        seasons/<season>/users
+    <season>/weeklyPicks  collectionGroup("episodes") -- unfiltered, as the app queries it
+
+The season document and state/current (document listeners) are bundled
+without a query, with exists: false when missing.
+
+BundleBuilder caches each encoded document and re-encodes only documents whose
+update time changed. BundleService keeps the builder fed from listeners and
+rewrites the file only when a document changed. read_bundle parses a bundle
+back for offline round-trip checks.
+"""
+import datetime as dt, json, math, threading, time, typing as t
+from pathlib import Path
+
+CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
+PROJECT_ID = "survivus1514"
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+BUNDLES_DIR = "bundles"
+BUNDLE_QUERIES = {"phases": "phases", "results": "results", "users": "users", "weeklyPicks": "episodes"}  # query -> collection id
+
+import firestore_codec, scoring_engine
+
+def bundle_path(folder: Path, season_id: str) -> Path:
+    return folder / BUNDLES_DIR / f"{season_id}.bundle"
+
+def _doc_name(project_id: str, path: str) -> str:
+    return f"projects/{project_id}/databases/(default)/documents/{path}"
+
+def _timestamp(value) -> dict:
+    """datetime / ISO string -> {"seconds", "nanos"}."""
+    when = value if isinstance(value, dt.datetime) else firestore_codec.parse_timestamp(value)
+    if when.tzinfo is None: when = when.replace(tzinfo=dt.timezone.utc)
+    nanos = getattr(when, "nanosecond", None) or when.microsecond * 1000  # DatetimeWithNanoseconds keeps full precision
+    return {"seconds": int(when.replace(microsecond=0).timestamp()), "nanos": nanos}
+
+def _iso(ts: dict) -> str:
+    when = dt.datetime(1970, 1, 1) + dt.timedelta(seconds=int(ts.get("seconds", 0)), microseconds=int(ts.get("nanos", 0)) // 1000)
+    return when.isoformat(timespec="microseconds") + "Z"
+
+def to_value(v, project_id: str) -> dict:
+    """Snapshot-form field value ({"_type": ...} for typed values) -> Firestore Value JSON."""
+    if v is None: return {"nullValue": None}
+    if isinstance(v, bool): return {"booleanValue": v}
+    if isinstance(v, int): return {"integerValue": str(v)}
+    if isinstance(v, float): return {"doubleValue": v if math.isfinite(v) else ("NaN" if v != v else ("Infinity" if v > 0 else "-Infinity"))}
+    if isinstance(v, str): return {"stringValue": v}
+    if isinstance(v, list): return {"arrayValue": {"values": [to_value(x, project_id) for x in v]} if v else {}}
+    if isinstance(v, dict):
+        kind = v.get("_type")
+        if kind == "timestamp": return {"timestampValue": _timestamp(v["iso"])}
+        if kind == "bytes": return {"bytesValue": v["base64"]}
+        if kind == "docref": return {"referenceValue": _doc_name(project_id, v["path"])}
+        if kind == "geopoint": return {"geoPointValue": {"latitude": v["lat"], "longitude": v["lon"]}}
+        return {"mapValue": {"fields": {k: to_value(x, project_id) for k, x in v.items()}} if v else {}}
+    raise TypeError(f"cannot bundle {type(v).__name__} values")
+
+def from_value(v: dict):
+    """Firestore Value JSON -> snapshot form (inverse of to_value)."""
+    (kind, x), = v.items()
+    if kind == "nullValue": return None
+    if kind == "integerValue": return int(x)
+    if kind == "doubleValue": return float(x)
+    if kind in ("booleanValue", "stringValue"): return x
+    if kind == "arrayValue": return [from_value(y) for y in x.get("values", [])]
+    if kind == "mapValue": return {k: from_value(y) for k, y in x.get("fields", {}).items()}
+    if kind == "timestampValue": return {"_type": "timestamp", "iso": _iso(x)}
+    if kind == "bytesValue": return {"_type": "bytes", "base64": x}
+    if kind == "referenceValue": return {"_type": "docref", "path": x.split("/documents/", 1)[1]}
+    if kind == "geoPointValue": return {"_type": "geopoint", "lat": x["latitude"], "lon": x["longitude"]}
+    raise ValueError(f"unknown value kind {kind!r}")
+
+def _element(obj: dict) -> bytes:
+    data = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return str(len(data)).encode("ascii") + data
+
+class BundleBuilder:
+    def __init__(self, season_id: str, project_id: str=PROJECT_ID):
+        self.season_id = season_id; self.project_id = project_id
+        self._prefix = f"seasons/{season_id}"
+        self._docs: t.Dict[str, t.Tuple[str, t.Any, bytes]] = {}  # path -> (query or "", update time, encoded document element)
+        self._lock = threading.Lock()
+        self.version = 0  # bumped whenever a bundled document changes
+        self.stats = {"encoded": 0, "unchanged": 0, "builds": 0}
+
+    def query_for(self, path: str) -> t.Optional[str]:
+        """Named-query key a document belongs to, "" for the season / state documents, None if it is not bundled."""
+        parts = path.split("/")
+        if len(parts) >= 2 and parts[-2] == "episodes": return "weeklyPicks"
+        if path in (self._prefix, f"{self._prefix}/state/current"): return ""
+        if len(parts) == 4 and path.startswith(self._prefix + "/") and parts[2] in BUNDLE_QUERIES: return parts[2]
+        return None
+
+    def apply(self, entries: t.Iterable[dict]) -> int:
+        """Add / replace documents from flat snapshot entries ("fields": None deletes); returns how many changed."""
+        changed = 0
+        with self._lock:
+            for e in entries:
+                path = e["_path"]; key = self.query_for(path)
+                if key is None: continue
+                if e.get("fields") is None:
+                    changed += self._docs.pop(path, None) is not None; continue
+                cached = self._docs.get(path); updated = e.get("_updateTime")
+                if cached and updated is not None and cached[1] == updated:
+                    self.stats["unchanged"] += 1; continue
+                document = {"name": _doc_name(self.project_id, path), "fields": {k: to_value(v, self.project_id) for k, v in e["fields"].items()}}
+                if e.get("_createTime"): document["createTime"] = _timestamp(e["_createTime"])
+                if updated: document["updateTime"] = _timestamp(updated)
+                element = _element({"document": document}); self.stats["encoded"] += 1
+                if cached and cached[2] == element:
+                    self._docs[path] = (key, updated, element); continue
+                self._docs[path] = (key, updated, element); changed += 1
+            if changed: self.version += 1
+        return changed
+
+    def build(self, read_time: t.Optional[dt.datetime]=None) -> bytes:
+        read = _timestamp(read_time or dt.datetime.now(dt.timezone.utc))
+        with self._lock:
+            order = {k: i for i, k in enumerate(["", *BUNDLE_QUERIES])}
+            paths = sorted(self._docs, key=lambda p: (order[self._docs[p][0]], p))
+            body = []
+            for key, collection_id in BUNDLE_QUERIES.items():
+                parent = _doc_name(self.project_id, self._prefix) if key != "weeklyPicks" else _doc_name(self.project_id, "")[:-1]
+                source = {"collectionId": collection_id, **({"allDescendants": True} if key == "weeklyPicks" else {})}
+                body.append(_element({"namedQuery": {"name": f"{self.season_id}/{key}", "readTime": read,
+                                                     "bundledQuery": {"parent": parent, "structuredQuery": {"from": [source]}}}}))
+            for path in (self._prefix, f"{self._prefix}/state/current"):
+                if path not in self._docs:
+                    body.append(_element({"documentMetadata": {"name": _doc_name(self.project_id, path), "readTime": read, "exists": False}}))
+            for path in paths:
+                key, _, element = self._docs[path]
+                meta = {"name": _doc_name(self.project_id, path), "readTime": read, "exists": True}
+                if key: meta["queries"] = [f"{self.season_id}/{key}"]
+                body.append(_element({"documentMetadata": meta})); body.append(element)
+            self.stats["builds"] += 1
+            total = len(paths) + sum(p not in self._docs for p in (self._prefix, f"{self._prefix}/state/current"))
+            data = b"".join(body)
+        metadata = {"id": f"season-{self.season_id}", "createTime": read, "version": 1, "totalDocuments": total, "totalBytes": len(data)}
+        return _element({"metadata": metadata}) + data
+
+    def write(self, out: Path, read_time: t.Optional[dt.datetime]=None) -> int:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        data = self.build(read_time); tmp = out.with_name(out.name + ".part")
+        tmp.write_bytes(data); tmp.replace(out)
+        return len(data)
+
+def read_bundle(data: bytes) -> dict:
+    """Parse a bundle: {"metadata", "namedQueries": {name: query}, "documents": {path: {"metadata", "document"}}}."""
+    elements, pos = [], 0
+    while pos < len(data):
+        start = pos
+        while data[pos:pos + 1].isdigit(): pos += 1
+        if pos == start: raise ValueError(f"expected a length prefix at byte {start}")
+        length = int(data[start:pos]); elements.append(json.loads(data[pos:pos + length].decode("utf-8"))); pos += length
+    if not elements or "metadata" not in elements[0]: raise ValueError("bundle does not start with metadata")
+    metadata = elements[0]["metadata"]; first = len(_element(elements[0]))
+    if metadata.get("totalBytes") is not None and metadata["totalBytes"] != len(data) - first:
+        raise ValueError(f"metadata says {metadata['totalBytes']} bytes, bundle has {len(data) - first}")
+    out = {"metadata": metadata, "namedQueries": {}, "documents": {}}
+    for el in elements[1:]:
+        if "namedQuery" in el: out["namedQueries"][el["namedQuery"]["name"]] = el["namedQuery"]
+        elif "documentMetadata" in el:
+            path = el["documentMetadata"]["name"].split("/documents/", 1)[1]
+            out["documents"][path] = {"metadata": el["documentMetadata"], "document": None}
+        elif "document" in el:
+            path = el["document"]["name"].split("/documents/", 1)[1]
+            if path not in out["documents"]: raise ValueError(f"document {path} has no preceding documentMetadata")
+            out["documents"][path]["document"] = el["document"]
+        else:
+            raise ValueError(f"unknown bundle element {sorted(el)}")
+    if len(out["documents"]) != metadata.get("totalDocuments"): raise ValueError("totalDocuments does not match the bundle")
+    return out
+
+def bundle_entries(bundle: dict) -> t.List[dict]:
+    """Documents of a parsed bundle back as flat snapshot entries."""
+    entries = []
+    for path, d in bundle["documents"].items():
+        doc = d["document"]
+        if doc is None: continue
+        entries.append({"_id": path.rsplit("/", 1)[-1], "_path": path, "fields": {k: from_value(v) for k, v in doc.get("fields", {}).items()},
+                        "_createTime": _iso(doc["createTime"]) if "createTime" in doc else None,
+                        "_updateTime": _iso(doc["updateTime"]) if "updateTime" in doc else None})
+    return entries
+
+def _snapshot_entry(snap) -> dict:
+    path = snap.reference.path
+    if not snap.exists: return {"_path": path, "fields": None}
+    return {"_path": path, "_createTime": getattr(snap, "create_time", None), "_updateTime": getattr(snap, "update_time", None),
+            "fields": firestore_codec.encode_fields(path, snap.to_dict() or {})}
+
+class BundleService:
+    """Listens to what the app listens to and rewrites the bundle file whenever a bundled document changes."""
+    def __init__(self, db, season_id: str, out: Path, project_id: str=PROJECT_ID):
+        self.db = db; self.out = out; self.builder = BundleBuilder(season_id, project_id)
+        self._season_ref = db.collection("seasons").document(season_id)
+        self._lock = threading.RLock(); self._watches = []; self._waiting: t.Set[str] = set(); self._written = None
+        self.stats = {"events": 0, "writes": 0, "bytes": 0}
+
+    def start(self):
+        sources = [("season", self._season_ref), ("state", self._season_ref.collection("state").document("current"))]
+        sources += [(key, self._season_ref.collection(col)) for key, col in BUNDLE_QUERIES.items() if key != "weeklyPicks"]
+        sources.append(("weeklyPicks", self.db.collection_group("episodes")))
+        self._waiting = {name for name, _ in sources}
+        for name, source in sources: self._watches.append(source.on_snapshot(self._listener(name)))
+        return self
+
+    def stop(self):
+        for watch in self._watches: watch.unsubscribe()
+        self._watches = []
+
+    def _listener(self, name: str):
+        def on_snapshot(docs, changes, read_time):
+            with self._lock:
+                self.stats["events"] += len(changes)
+                self.builder.apply({"_path": c.document.reference.path, "fields": None} if c.type.name == "REMOVED" else _snapshot_entry(c.document)
+                                   for c in changes)
+                self._waiting.discard(name)
+                if not self._waiting and self.builder.version != self._written: self.publish(read_time)
+        return on_snapshot
+
+    def publish(self, read_time=None):
+        with self._lock:
+            self.stats["bytes"] = self.builder.write(self.out, read_time); self.stats["writes"] += 1; self._written = self.builder.version
+
+def build_from_snapshot(snap_dir: Path, season_id: str, out: Path=None, project_id: str=PROJECT_ID) -> t.Tuple[Path, BundleBuilder]:
+    import snapshot_io
+    meta, documents = snapshot_io.open_snapshot(snap_dir)
+    builder = BundleBuilder(season_id, project_id); builder.apply(documents)
+    out = out or bundle_path(snap_dir, season_id)
+    exported = meta.get("exportedAt")
+    builder.write(out, firestore_codec.parse_timestamp(exported) if exported else None)
+    return out, builder
+
+def _print_bundle(out: Path):
+    bundle = read_bundle(out.read_bytes())
+    counts = {name: 0 for name in bundle["namedQueries"]}
+    for d in bundle["documents"].values():
+        for q in d["metadata"].get("queries", []): counts[q] += 1
+    print(f"Bundle {out} ({out.stat().st_size:,} bytes, {bundle['metadata']['totalDocuments']} documents)")
+    for name, n in counts.items(): print(f"  {name}: {n} documents")
+
+def main():
+    print("\n=== Bundle Builder ===")
+    print("1) Build a season bundle from a snapshot folder")
+    print("2) Build a season bundle from the live project")
+    print("3) Watch the live project and rebuild the bundle on every change (Ctrl-C to stop)")
+    choice = input("Choose [1-3]: ").strip()
+    if choice == "1":
+        snap_dir = scoring_engine.choose_snapshot_dir(Path(SNAPSHOTS_ROOT))
+        if not snap_dir: return
+        season_id = scoring_engine.choose_season(scoring_engine.season_ids(scoring_engine.snapshot_entries(snap_dir)))
+        if not season_id: return
+        started = time.perf_counter(); out, _ = build_from_snapshot(snap_dir, season_id)
+        print(f"Built in {time.perf_counter() - started:.2f}s"); _print_bundle(out)
+    elif choice in ("2", "3"):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps: firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+        db = firestore.client()
+        season_id = scoring_engine.choose_season(sorted(d.id for d in db.collection("seasons").stream()))
+        if not season_id: return
+        service = BundleService(db, season_id, bundle_path(Path(SNAPSHOTS_ROOT), season_id)).start()
+        try:
+            while service.stats["writes"] == 0: time.sleep(0.1)
+            if choice == "3":
+                print(f"Watching seasons/{season_id}; bundle -> {service.out}")
+                while True: time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.stop()
+        _print_bundle(service.out)
+        print(f"{service.stats['writes']} writes, {service.builder.stats['encoded']} documents encoded")
+    else:
+        print("Unknown choice.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for the parts of the google-cloud-firestore client the
+snapshot/seed tools use, so restores, wipes and exports can be measured
+without touching production (or needing the emulator).
+
+Semantics follow Firestore where the tools depend on them: collections stream
+in document-id order, documents can be "missing" while still owning
+subcollections, batches are atomic and capped at 500 writes. Every RPC sleeps
+`latency` seconds and is tallied in `rpcs`; `fail_rate` makes writes raise a
+retryable `ServiceUnavailable` so retry paths can be exercised.
+"""
+import datetime as dt, random, threading, time, typing as t, uuid
+
+MAX_BATCH_WRITES = 500
+
+class ServiceUnavailable(Exception):
+    """Transient failure; named like google.api_core.exceptions.ServiceUnavailable."""
+
+class InvalidArgument(Exception):
+    pass
+
+def _copy(v):
+    if isinstance(v, dict): return {k: _copy(x) for k, x in v.items()}
+    if isinstance(v, list): return [_copy(x) for x in v]
+    return v
+
+def _merge(dst: dict, src: dict):
+    for k, v in src.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict): _merge(dst[k], v)
+        else: dst[k] = _copy(v)
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data, create_time, update_time, read_time):
+        self.reference = reference; self.id = reference.id
+        self._data = data; self.exists = data is not None
+        self.create_time = create_time; self.update_time = update_time; self.read_time = read_time
+    def to_dict(self):
+        return _copy(self._data) if self._data is not None else None
+    def get(self, field):
+        return self._data.get(field) if self._data else None
+
+class _Change:
+    def __init__(self, kind: str, document):
+        self.type = type("ChangeType", (), {"name": kind})(); self.document = document
+
+class _Watch:
+    def __init__(self, client, matcher, callback):
+        self._client = client; self.matcher = matcher; self.callback = callback
+    def unsubscribe(self):
+        with self._client._lock:
+            if self in self._client._watches: self._client._watches.remove(self)
+
+_NAME_OPS = {"<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b, ">=": lambda a, b: a >= b, "==": lambda a, b: a == b}
+
+class FakeQuery:
+    def __init__(self, client, col_path: str=None, group_id: str=None, limit: int=None, start_after: str=None, select=None, name_filters=()):
+        self._client = client; self._col_path = col_path; self._group_id = group_id
+        self._limit = limit; self._start_after = start_after; self._select = select; self._name_filters = name_filters
+
+    def _clone(self, **kw):
+        args = dict(col_path=self._col_path, group_id=self._group_id, limit=self._limit, start_after=self._start_after, select=self._select,
+                    name_filters=self._name_filters)
+        args.update(kw); return FakeQuery(self._client, **args)
+
+    def limit(self, n: int): return self._clone(limit=n)
+    def order_by(self, field_path, direction=None):
+        if field_path != "__name__": raise InvalidArgument("fake client only orders by __name__")
+        return self._clone()
+    def select(self, field_paths): return self._clone(select=list(field_paths))
+    def where(self, field_path, op_string, value):
+        """Only __name__ ranges against document references (paths compare as strings)."""
+        if field_path != "__name__" or op_string not in _NAME_OPS: raise InvalidArgument("fake client only filters __name__ by comparison")
+        return self._clone(name_filters=self._name_filters + ((_NAME_OPS[op_string], getattr(value, "path", value)),))
+    def start_after(self, cursor):
+        if isinstance(cursor, dict): cursor = cursor.get("__name__")
+        path = getattr(cursor, "path", None) or getattr(getattr(cursor, "reference", None), "path", None) or cursor
+        return self._clone(start_after=path)
+
+    def _matches(self, path: str) -> bool:
+        col_path = path.rsplit("/", 1)[0]
+        if not all(op(path, bound) for op, bound in self._name_filters): return False
+        if self._col_path is not None: return col_path == self._col_path
+        return col_path.rsplit("/", 1)[-1] == self._group_id
+
+    def stream(self, transaction=None, read_time=None, **kwargs):
+        self._client._rpc("runQuery")
+        with self._client._lock:
+            if self._col_path is not None:
+                paths = [p for p in (f"{self._col_path}/{i}" for i in sorted(self._client._by_collection.get(self._col_path, ()))) if self._matches(p)]
+            else:
+                paths = sorted(p for p in self._client._docs if self._matches(p))
+            if self._start_after: paths = [p for p in paths if p > self._start_after]
+            if self._limit is not None: paths = paths[: self._limit]
+            snaps = [self._client._snapshot(p, self._select) for p in paths]
+        return iter(snaps)
+
+    def get(self, transaction=None, read_time=None, **kwargs):
+        return list(self.stream(read_time=read_time))
+
+    def on_snapshot(self, callback):
+        """Callback(snapshots, changes, read_time) fires once now and after every matching write."""
+        watch = _Watch(self._client, self._matches, callback)
+        docs = list(self.stream())
+        with self._client._lock: self._client._watches.append(watch)
+        callback(docs, [_Change("ADDED", d) for d in docs], self._client._now())
+        return watch
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, path: str):
+        super().__init__(client, col_path=path); self.path = path; self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return FakeDocumentReference(self._client, self.path.rsplit("/", 1)[0]) if "/" in self.path else None
+
+    def document(self, doc_id: str=None):
+        return FakeDocumentReference(self._client, f"{self.path}/{doc_id or uuid.uuid4().hex[:20]}")
+
+    def list_documents(self, page_size=None):
+        self._client._rpc("listDocuments")
+        with self._client._lock:
+            ids = set(self._client._by_collection.get(self.path, ())) | {
+                p[len(self.path) + 1:] for p in self._client._subcollections if p.startswith(self.path + "/") and p.count("/") == self.path.count("/") + 1}
+        return [self.document(i) for i in sorted(ids)]
+
+class FakeDocumentReference:
+    def __init__(self, client, path: str):
+        self._client = client; self.path = path; self.id = path.rsplit("/", 1)[-1]
+
+    def __eq__(self, other): return isinstance(other, FakeDocumentReference) and other.path == self.path
+    def __hash__(self): return hash(self.path)
+    def __repr__(self): return f"FakeDocumentReference({self.path!r})"
+
+    @property
+    def parent(self): return FakeCollectionReference(self._client, self.path.rsplit("/", 1)[0])
+    def collection(self, col_id: str): return FakeCollectionReference(self._client, f"{self.path}/{col_id}")
+
+    def get(self, field_paths=None, transaction=None, read_time=None, **kwargs):
+        self._client._rpc("getDocument")
+        with self._client._lock: return self._client._snapshot(self.path, field_paths)
+
+    def set(self, document_data: dict, merge: bool=False):
+        self._client._rpc("commit", write=True)
+        with self._client._lock: self._client._apply(("set", self.path, document_data, merge))
+        self._client._dispatch()
+
+    def update(self, field_updates: dict):
+        self._client._rpc("commit", write=True)
+        with self._client._lock: self._client._apply(("set", self.path, field_updates, True))
+        self._client._dispatch()
+
+    def delete(self):
+        self._client._rpc("commit", write=True)
+        with self._client._lock: self._client._apply(("delete", self.path, None, False))
+        self._client._dispatch()
+
+    def collections(self, page_size=None, **kwargs):
+        return self._client._list_collections(self.path)
+
+    def on_snapshot(self, callback):
+        watch = _Watch(self._client, lambda p: p == self.path, callback)
+        snap = self.get()
+        with self._client._lock: self._client._watches.append(watch)
+        callback([snap], [_Change("ADDED", snap)] if snap.exists else [], self._client._now())
+        return watch
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client; self._ops = []
+    def __len__(self): return len(self._ops)
+    def set(self, reference, document_data: dict, merge: bool=False):
+        self._ops.append(("set", reference.path, document_data, merge))
+    def update(self, reference, field_updates: dict):
+        self._ops.append(("set", reference.path, field_updates, True))
+    def delete(self, reference, option=None):
+        self._ops.append(("delete", reference.path, None, False))
+    def commit(self):
+        if len(self._ops) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        self._client._rpc("commit", write=True)
+        with self._client._lock:
+            for op in self._ops: self._client._apply(op)
+        self._client._dispatch()
+        return [None] * len(self._ops)
+
+class FakeFirestore:
+    def __init__(self, latency: float=0.0, fail_rate: float=0.0, seed: int=0, project: str="fake-project"):
+        self.latency = latency; self.fail_rate = fail_rate; self.project = project
+        self.rpcs: t.Dict[str, int] = {}
+        self._rng = random.Random(seed); self._lock = threading.RLock(); self._clock = None
+        self._docs: t.Dict[str, tuple] = {}                  # path -> (data, create_time, update_time)
+        self._by_collection: t.Dict[str, set] = {}           # collection path -> ids of existing docs
+        self._subcollections: t.Dict[str, t.Dict[str, int]] = {}  # doc path ("" = root) -> col id -> descendant docs
+        self._watches: t.List[_Watch] = []
+        self._outbox: t.List[tuple] = []                     # listener events queued until the write's lock is released
+
+    # -- client surface
+    def collection(self, path: str): return FakeCollectionReference(self, path)
+    def document(self, path: str): return FakeDocumentReference(self, path)
+    def collection_group(self, collection_id: str): return FakeQuery(self, group_id=collection_id)
+    def collections(self, **kwargs): return self._list_collections("")
+    def batch(self): return FakeWriteBatch(self)
+
+    def get_all(self, references, field_paths=None, transaction=None, read_time=None, **kwargs):
+        refs = list(references)
+        self._rpc("batchGetDocuments")
+        with self._lock: snaps = [self._snapshot(r.path, field_paths) for r in refs]
+        return iter(snaps)
+
+    # -- helpers for tests/benchmarks
+    def load(self, docs: t.Dict[str, dict]):
+        """Bulk-insert {path: fields} without counting RPCs or waiting."""
+        with self._lock:
+            for path, data in docs.items(): self._apply(("set", path, data, False), notify=False)
+
+    def paths(self) -> t.List[str]:
+        with self._lock: return sorted(self._docs)
+
+    def data(self, path: str) -> t.Optional[dict]:
+        with self._lock:
+            got = self._docs.get(path); return _copy(got[0]) if got else None
+
+    def reset_counters(self):
+        with self._lock: self.rpcs = {}
+
+    # -- internals (callers hold self._lock, except _rpc which must be called without it)
+    def _now(self) -> dt.datetime:
+        now = dt.datetime.now(dt.timezone.utc)
+        if self._clock and now <= self._clock: now = self._clock + dt.timedelta(microseconds=1)
+        self._clock = now; return now
+
+    def _rpc(self, op: str, write: bool=False):
+        with self._lock:
+            self.rpcs[op] = self.rpcs.get(op, 0) + 1
+            failed = write and self.fail_rate > 0 and self._rng.random() < self.fail_rate
+            if failed: self.rpcs["failed"] = self.rpcs.get("failed", 0) + 1
+        if self.latency > 0: time.sleep(self.latency)  # "on the wire": concurrent callers overlap
+        if failed: raise ServiceUnavailable("fake transient failure")
+
+    def _snapshot(self, path: str, field_paths=None) -> FakeDocumentSnapshot:
+        got = self._docs.get(path)
+        data = None
+        if got:
+            data = _copy(got[0]) if field_paths is None else {k: _copy(v) for k, v in got[0].items() if k in field_paths}
+        return FakeDocumentSnapshot(FakeDocumentReference(self, path), data, got[1] if got else None, got[2] if got else None, self._now())
+
+    def _list_collections(self, doc_path: str):
+        self._rpc("listCollectionIds")
+        with self._lock:
+            ids = sorted(i for i, n in self._subcollections.get(doc_path, {}).items() if n > 0)
+        return [FakeCollectionReference(self, f"{doc_path}/{i}" if doc_path else i) for i in ids]
+
+    def _track(self, path: str, delta: int):
+        parts = path.split("/")
+        for i in range(1, len(parts), 2):
+            owner = "/".join(parts[: i - 1]); col_id = parts[i - 1]
+            counts = self._subcollections.setdefault(owner, {})
+            counts[col_id] = counts.get(col_id, 0) + delta
+
+    def _apply(self, op: tuple, notify: bool=True):
+        kind, path, data, merge = op
+        if len(path.split("/")) % 2: raise InvalidArgument(f"not a document path: {path}")
+        col_path, doc_id = path.rsplit("/", 1)
+        old = self._docs.get(path)
+        if kind == "delete":
+            if not old: return
+            del self._docs[path]; self._by_collection[col_path].discard(doc_id); self._track(path, -1)
+            change = "REMOVED"
+        else:
+            now = self._now()
+            if old and merge:
+                body = _copy(old[0]); _merge(body, data)
+            else:
+                body = _copy(data)
+            self._docs[path] = (body, old[1] if old else now, now)
+            if not old:
+                self._by_collection.setdefault(col_path, set()).add(doc_id); self._track(path, 1)
+            change = "MODIFIED" if old else "ADDED"
+        if notify: self._notify(path, change)
+
+    def _notify(self, path: str, change: str):
+        for watch in [w for w in self._watches if w.matcher(path)]:
+            self._outbox.append((watch, self._snapshot(path), change))
+
+    def _dispatch(self):
+        """Deliver queued listener events outside the lock; each carries only the changed document."""
+        with self._lock:
+            events, self._outbox = self._outbox, []
+        for watch, snap, change in events:
+            watch.callback([snap], [_Change(change, snap)], snap.read_time)
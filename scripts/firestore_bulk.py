@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pipelined, batched Firestore writes for the seed tool (the same idea as the
+SDK's BulkWriter, but working with any client exposing batch(), including
+fake_firestore.FakeFirestore and the emulator via FIRESTORE_EMULATOR_HOST).
+
+Writes are grouped into commits of at most 500 operations, up to
+`max_in_flight` commits run at once, and throttled/transient failures are
+retried with exponential backoff and jitter.
+"""
+import random, threading, time, typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_WRITES = 500
+# matched by class name so google.api_core does not have to be importable
+RETRYABLE_ERRORS = {"Aborted", "DeadlineExceeded", "InternalServerError", "ResourceExhausted",
+                    "ServiceUnavailable", "TooManyRequests", "Unknown"}
+
+def is_retryable(exc: BaseException) -> bool:
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+class RampUpLimiter:
+    """500/50/5 rule: start at 500 ops/s and grow 50% every 5 minutes, as BulkWriter does."""
+    def __init__(self, start_ops: float=500, factor: float=1.5, step_seconds: float=300, max_ops: float=10000):
+        self._start = time.monotonic(); self._lock = threading.Lock()
+        self._rate0 = start_ops; self._factor = factor; self._step = step_seconds; self._max = max_ops
+        self._tokens = start_ops; self._last = self._start
+
+    def rate(self) -> float:
+        steps = int((time.monotonic() - self._start) // self._step)
+        return min(self._max, self._rate0 * self._factor ** steps)
+
+    def acquire(self, n: int):
+        while True:
+            with self._lock:
+                now = time.monotonic(); rate = self.rate()
+                self._tokens = min(max(rate, n), self._tokens + (now - self._last) * rate); self._last = now
+                if self._tokens >= n:
+                    self._tokens -= n; return
+                wait = (n - self._tokens) / rate
+            time.sleep(wait)
+
+class BulkWritePipeline:
+    """
+    Usage:
+        with BulkWritePipeline(db) as pipe:
+            pipe.set(ref, data); pipe.delete(ref)
+        print(pipe.stats)
+
+    set()/delete() block only when `max_in_flight` commits are already pending,
+    so producers (snapshot readers) are naturally back-pressured.
+    """
+    def __init__(self, db, batch_size: int=MAX_BATCH_WRITES, max_in_flight: int=8, max_retries: int=6,
+                 base_delay: float=0.5, max_delay: float=30.0, ramp_up: bool=True):
+        self._db = db; self._batch_size = max(1, min(batch_size, MAX_BATCH_WRITES))
+        self._max_retries = max_retries; self._base_delay = base_delay; self._max_delay = max_delay
+        self._limiter = RampUpLimiter() if ramp_up else None
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight))
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._lock = threading.Lock(); self._ops: t.List[tuple] = []; self._futures = []
+        self._started = time.perf_counter()
+        self.stats = {"written": 0, "batches": 0, "retries": 0, "failed": 0}
+        self.errors: t.List[dict] = []
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def set(self, ref, data: dict, merge: bool=False):
+        self._add(("set", ref, data, merge))
+
+    def delete(self, ref):
+        self._add(("delete", ref, None, False))
+
+    def _add(self, op: tuple):
+        self._ops.append(op)
+        if len(self._ops) >= self._batch_size: self._submit()
+
+    def _submit(self):
+        if not self._ops: return
+        ops, self._ops = self._ops, []
+        self._slots.acquire()
+        fut = self._pool.submit(self._commit, ops)
+        fut.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(fut)
+
+    def _commit(self, ops: t.List[tuple]):
+        attempt = 0
+        while True:
+            if self._limiter: self._limiter.acquire(len(ops))
+            batch = self._db.batch()
+            for kind, ref, data, merge in ops:
+                if kind == "set": batch.set(ref, data, merge=merge)
+                else: batch.delete(ref)
+            try:
+                batch.commit()
+                with self._lock: self.stats["written"] += len(ops); self.stats["batches"] += 1
+                return
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self._max_retries:
+                    with self._lock:
+                        self.stats["failed"] += len(ops)
+                        self.errors.append({"firstPath": ops[0][1].path, "count": len(ops), "error": f"{type(e).__name__}: {e}",
+                                            "paths": [op[1].path for op in ops]})
+                    return
+                attempt += 1
+                with self._lock: self.stats["retries"] += 1
+                delay = min(self._max_delay, self._base_delay * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def flush(self):
+        """Submit the partial batch and wait for every commit issued so far."""
+        self._submit()
+        futures, self._futures = self._futures, []
+        for fut in futures: fut.result()
+
+    def close(self) -> dict:
+        self.flush(); self._pool.shutdown(wait=True)
+        elapsed = time.perf_counter() - self._started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["docsPerSec"] = round(self.stats["written"] / elapsed, 1) if elapsed > 0 else 0.0
+        return self.stats
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Field codec shared by snapshot_tool (encode) and seed_tool (decode): Firestore
+client values <-> the {"_type": ...} form of snapshot.json / .ndjson.
+
+encode_value / decode_value are the generic path. They dispatch on the exact
+type of each value through a table that is filled in once per type. Containers
+with no typed values inside are decoded without being copied.
+
+encode_fields / decode_fields take the document path as well. Documents in a
+collection with a known schema (SCHEMAS, mirroring the payload structs in
+FirestoreLeagueRepository.swift) are checked field by field against the schema.
+Their values are plain JSON types, so a matching field is passed through as-is
+(categories only when the keys outside the category schema hold plain JSON too).
+A field that does not match is reported and falls back to the generic path.
+Other documents go straight to the generic path.
+
+Schema problems are collected into the active SchemaReport (see validating()).
+They usually mean the app's Codable decode drops the document.
+"""
+import base64, contextlib, datetime as dt, threading, typing as t
+
+try:
+    from google.cloud.firestore import DocumentReference
+except Exception:
+    DocumentReference = None
+try:
+    from google.cloud.firestore_v1 import GeoPoint
+except Exception:
+    class GeoPoint:
+        def __init__(self, latitude, longitude): self.latitude = latitude; self.longitude = longitude
+
+REPORT_SAMPLES = 20  # example problems kept per report
+
+# ---- generic path
+
+def parse_timestamp(iso: str) -> dt.datetime:
+    if iso.endswith("Z"): return dt.datetime.fromisoformat(iso[:-1]).replace(tzinfo=dt.timezone.utc)
+    return dt.datetime.fromisoformat(iso)
+
+def _encode_timestamp(v: dt.datetime) -> dict:
+    if v.tzinfo is not None: v = v.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return {"_type": "timestamp", "iso": v.isoformat(timespec="microseconds") + "Z"}
+
+def _encode_bytes(v) -> dict:
+    return {"_type": "bytes", "base64": base64.b64encode(v).decode("ascii")}
+
+def _encode_docref(v) -> dict:
+    return {"_type": "docref", "path": v.path}
+
+def _encode_geopoint(v) -> dict:
+    return {"_type": "geopoint", "lat": float(v.latitude), "lon": float(v.longitude)}
+
+def _encode_other(v):
+    if hasattr(v, "latitude") and hasattr(v, "longitude"):
+        try:
+            return _encode_geopoint(v)
+        except Exception:
+            pass
+    return v
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+def _encode_list(v) -> list:
+    return [x if type(x) in _SCALARS else encode_value(x) for x in v]
+
+def _encode_map(v) -> dict:
+    return {k: x if type(x) in _SCALARS else encode_value(x) for k, x in v.items()}
+
+_ENCODERS: t.Dict[type, t.Callable] = {**{s: (lambda v: v) for s in _SCALARS}, list: _encode_list, tuple: _encode_list, dict: _encode_map,
+                                       dt.datetime: _encode_timestamp, bytes: _encode_bytes, GeoPoint: _encode_geopoint}
+
+def _resolve_encoder(cls: type) -> t.Callable:
+    """Encoder for a type not in the table yet (subclasses, SDK value types); cached for the next value."""
+    if issubclass(cls, dt.datetime): enc = _encode_timestamp  # includes DatetimeWithNanoseconds
+    elif issubclass(cls, (bytes, bytearray)): enc = _encode_bytes
+    elif DocumentReference is not None and issubclass(cls, DocumentReference): enc = _encode_docref
+    elif issubclass(cls, GeoPoint): enc = _encode_geopoint
+    elif issubclass(cls, dict): enc = _encode_map
+    elif issubclass(cls, (list, tuple)): enc = _encode_list
+    else: enc = _encode_other
+    _ENCODERS[cls] = enc
+    return enc
+
+def encode_value(v):
+    return (_ENCODERS.get(type(v)) or _resolve_encoder(type(v)))(v)
+
+def _decode_typed(v: dict, db):
+    tname = v["_type"]
+    if tname == "timestamp": return parse_timestamp(v["iso"])
+    if tname == "bytes": return base64.b64decode(v["base64"])
+    if tname == "docref": return db.document(v["path"])
+    if tname == "geopoint": return GeoPoint(v["lat"], v["lon"])
+    return v
+
+def decode_value(v, db):
+    """Typed values become datetime / bytes / DocumentReference / GeoPoint; untouched containers are returned as they are."""
+    cls = type(v)
+    if cls is dict:
+        if "_type" in v: return _decode_typed(v, db)
+        out = None
+        for k, x in v.items():
+            if type(x) in _SCALARS: continue
+            y = decode_value(x, db)
+            if y is not x:
+                if out is None: out = dict(v)
+                out[k] = y
+        return v if out is None else out
+    if cls is list:
+        out = None
+        for i, x in enumerate(v):
+            if type(x) in _SCALARS: continue
+            y = decode_value(x, db)
+            if y is not x:
+                if out is None: out = list(v)
+                out[i] = y
+        return v if out is None else out
+    return v
+
+# ---- schemas (FirestoreLeagueRepository.swift payloads)
+
+def _is_str(v): return type(v) is str
+def _is_int(v): return type(v) is int
+def _is_bool(v): return type(v) is bool
+def _is_str_list(v): return type(v) is list and all(type(x) is str for x in v)
+def _is_str_list_map(v): return type(v) is dict and all(type(x) is list and all(type(y) is str for y in x) for x in v.values())
+def _is_int_map(v): return type(v) is dict and all(type(x) is int for x in v.values())
+
+_KINDS = {"string": _is_str, "int": _is_int, "bool": _is_bool, "[string]": _is_str_list, "[string: [string]]": _is_str_list_map, "[string: int]": _is_int_map}
+
+# field -> kind; a trailing "?" marks a Swift optional (may be missing or null)
+PHASE_CATEGORY_SCHEMA = {"id": "string", "name": "string", "columnId": "string", "totalPicks": "int", "pointsPerCorrectPick": "int?",
+                         "wagerPoints": "int?", "autoScoresRemainingContestants": "bool", "isLocked": "bool", "usesWager": "bool?"}
+SCHEMAS: t.Dict[str, t.Dict[str, str]] = {
+    "seasons/*/state": {"activePhaseId": "string?", "activatedPhaseIds": "[string]?"},                        # SeasonStateDocument
+    "seasons/*/phases": {"id": "string?", "name": "string", "sortIndex": "int?", "categories": "[category]"},  # PhaseDocument
+    "seasons/*/results": {"phaseId": "string?", "immunityWinners": "[string]", "votedOut": "[string]",
+                          "categoryWinners": "[string: [string]]?"},                                           # EpisodeResultDocument
+    "seasons/*/users": {"displayName": "string", "avatarAssetName": "string?", "avatarURL": "string?"},        # UserDocument
+    "seasons/*/weeklyPicks/*/episodes": {"seasonId": "string?", "categorySelections": "[string: [string]]?",
+                                         "categoryWagers": "[string: int]?", "isSubmitted": "bool?"},         # WeeklyPicksDocument
+}
+
+class _Schema:
+    """One SCHEMAS entry compiled to {field: (check, kind, optional)} plus the required field names."""
+    __slots__ = ("fields", "required")
+    def __init__(self, spec: t.Dict[str, str]):
+        self.fields = {}
+        for name, kind in spec.items():
+            optional = kind.endswith("?"); kind = kind.rstrip("?")
+            self.fields[name] = (_category_list_problems if kind == "[category]" else _KINDS[kind], kind, optional)
+        self.required = tuple(n for n, (_, _, optional) in self.fields.items() if not optional)
+
+    def problem(self, field: str, v) -> t.Optional[str]:
+        """None when `v` fits the field (fields outside the schema are ignored, as Codable does)."""
+        spec = self.fields.get(field)
+        if spec is None: return None
+        check, kind, optional = spec
+        if v is None: return None if optional else f"{field}: null for required {kind}"
+        if check is _category_list_problems: return check(v)
+        return None if check(v) else f"{field}: expected {kind}, got {type(v).__name__}"
+
+def _category_list_problems(v) -> t.Optional[str]:
+    if type(v) is not list: return f"categories: expected [category], got {type(v).__name__}"
+    for i, c in enumerate(v):
+        if type(c) is not dict: return f"categories[{i}]: expected category, got {type(c).__name__}"
+        for name in _CATEGORY.required:
+            if name not in c: return f"categories[{i}].{name}: missing"
+        for name, x in c.items():
+            problem = _CATEGORY.problem(name, x)
+            if problem: return f"categories[{i}].{problem}"
+    return None
+
+def _is_plain(v) -> bool:
+    """Scalars, lists and maps only, with no {"_type": ...} tags: the same in client and snapshot form."""
+    cls = type(v)
+    if cls in _SCALARS: return True
+    if cls is list: return all(_is_plain(x) for x in v)
+    if cls is dict: return "_type" not in v and all(_is_plain(x) for x in v.values())
+    return False
+
+_CATEGORY = _Schema(PHASE_CATEGORY_SCHEMA)
+_COMPILED = {template: _Schema(spec) for template, spec in SCHEMAS.items()}
+
+def _template(path: str) -> str:
+    parts = path.split("/")[:-1]
+    return "/".join("*" if i % 2 else p for i, p in enumerate(parts))
+
+# ---- schema reports
+
+class SchemaReport:
+    """Thread-safe tally of schema problems: documents checked / with problems per collection, plus samples."""
+    def __init__(self):
+        self._lock = threading.Lock(); self.checked: t.Dict[str, int] = {}; self.failed: t.Dict[str, int] = {}; self.samples: t.List[str] = []
+
+    def add(self, template: str, path: str, problems: t.List[str]):
+        with self._lock:
+            self.checked[template] = self.checked.get(template, 0) + 1
+            if not problems: return
+            self.failed[template] = self.failed.get(template, 0) + 1
+            if len(self.samples) < REPORT_SAMPLES: self.samples.append(f"{path}: {'; '.join(problems)}")
+
+    def as_dict(self) -> dict:
+        return {"checked": dict(self.checked), "withProblems": dict(self.failed), "samples": list(self.samples)}
+
+    def summary_lines(self) -> t.List[str]:
+        lines = ["## Schema check", ""]
+        for template in sorted(self.checked):
+            lines.append(f"- {template}: {self.checked[template]} documents, {self.failed.get(template, 0)} with problems")
+        lines += [f"  - e.g. {s}" for s in self.samples]
+        return lines + [""]
+
+_REPORT: t.Optional[SchemaReport] = None
+
+@contextlib.contextmanager
+def validating(enabled: bool=True):
+    """Collect schema problems from encode_fields / decode_fields into a fresh SchemaReport (None when disabled)."""
+    global _REPORT
+    if not enabled:
+        yield None; return
+    report = SchemaReport(); previous, _REPORT = _REPORT, report
+    try:
+        yield report
+    finally:
+        _REPORT = previous
+
+# ---- per-document entry points
+
+def _fields(path: str, data: dict, convert: t.Callable, validate: bool=True) -> dict:
+    template = _template(path); schema = _COMPILED.get(template) if validate else None
+    if schema is None: return convert(data)
+    problems = []; out = {}
+    for name, v in data.items():
+        if name not in schema.fields: out[name] = v if type(v) in _SCALARS else convert(v); continue
+        problem = schema.problem(name, v)
+        if problem is not None: problems.append(problem)
+        elif schema.fields[name][1] != "[category]" or _is_plain(v): out[name] = v; continue  # categories may carry extra keys
+        out[name] = v if type(v) in _SCALARS else convert(v)
+    for name in schema.required:
+        if name not in data: problems.append(f"{name}: missing")
+    report = _REPORT
+    if report is not None: report.add(template, path, problems)
+    return out
+
+def encode_fields(path: str, data: dict, validate: bool=True) -> dict:
+    """
+    A document's to_dict() in snapshot form, checked against its collection's schema when there is one.
+    Pass validate=False for partial reads (select() field masks): they lack fields the schema requires.
+    """
+    return _fields(path, data, encode_value, validate)
+
+def decode_fields(path: str, fields: dict, db) -> dict:
+    """Snapshot fields back to client values (see encode_fields)."""
+    return _fields(path, fields, lambda v: decode_value(v, db))
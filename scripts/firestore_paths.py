@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Document-path helpers shared by the tools. Firestore orders document names
+segment by segment, so every document below seasons/s1 sorts after seasons/s1
+and before seasons/s1/\uf8ff/\uf8ff, while seasons/s10/... sorts after that
+bound. A __name__ range between the two confines a collection-group query to
+one subtree on the server, so documents outside it are neither read nor billed.
+"""
+import instrumentation
+
+SUBTREE_END = "\uf8ff/\uf8ff"  # collection id + document id sorting after any real pair
+
+def under_document(query, db, doc_path: str):
+    """`query` (usually db.collection_group(id)) limited to documents below doc_path."""
+    low = instrumentation.unwrap(db.document(doc_path))
+    high = instrumentation.unwrap(db.document(f"{doc_path}/{SUBTREE_END}"))
+    return query.where("__name__", ">", low).where("__name__", "<", high)
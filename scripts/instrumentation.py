@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Run profiles for snapshot_tool and seed_tool: where the time goes and what a run
+costs in billable Firestore operations.
+
+Inside `with profiling() as prof:` the tools wrap their clients with
+instrument_firestore() / instrument_storage(). The wrappers are thin proxies
+that count operations, documents and (estimated) bytes per collection template
+(seasons/*/weeklyPicks/*/episodes) and the time spent inside each RPC, then
+hand the call to the real client. phase("export") etc. time the steps of a run,
+timer("serialize") accumulates time spread over many small calls. Outside
+profiling() all of these return the client / a no-op context unchanged.
+
+prof.save(folder) writes profile.json (plus profile.pstats with cProfile, which
+only sees the calling thread) and a "Performance and cost" section in
+snapshot_summary.md. Byte counts use Firestore's storage-size rules, so they
+approximate the payload rather than measure the wire.
+"""
+import cProfile, contextlib, datetime as dt, json, os, threading, time, typing as t
+from pathlib import Path
+
+PROFILE_NAME = "profile.json"
+PSTATS_NAME = "profile.pstats"
+SUMMARY_NAME = "snapshot_summary.md"
+# USD per 100k operations; multi-region (nam5) list prices -- adjust for your location
+PRICE_PER_100K = {"reads": 0.06, "writes": 0.18, "deletes": 0.02}
+
+_ACTIVE: t.Optional["RunProfile"] = None
+_NULL = contextlib.nullcontext()
+
+def collection_template(col_path: str) -> str:
+    """seasons/s1/weeklyPicks/u1/episodes -> seasons/*/weeklyPicks/*/episodes"""
+    return "/".join("*" if i % 2 else p for i, p in enumerate(col_path.split("/")))
+
+def value_size(v) -> int:
+    if v is None or isinstance(v, bool): return 1
+    if isinstance(v, (int, float)) or isinstance(v, dt.datetime): return 8
+    if isinstance(v, str): return len(v.encode("utf-8")) + 1
+    if isinstance(v, bytes): return len(v)
+    if isinstance(v, dict): return sum(len(k.encode("utf-8")) + 1 + value_size(x) for k, x in v.items())
+    if isinstance(v, (list, tuple)): return sum(value_size(x) for x in v)
+    if hasattr(v, "latitude"): return 16
+    path = getattr(v, "path", None)
+    return len(path) + 1 if isinstance(path, str) else 8
+
+def document_size(path: str, data: t.Optional[dict]) -> int:
+    """Firestore storage size: document name + fields + 32 bytes of overhead."""
+    return len(path.encode("utf-8")) + 1 + 16 + (value_size(data) if data else 0) + 32
+
+class RunProfile:
+    def __init__(self, cprofile: bool=False):
+        self.started = time.perf_counter(); self.started_at = dt.datetime.utcnow().isoformat() + "Z"
+        self._lock = threading.Lock()
+        self.phases: t.List[dict] = []                           # {"name", "start", "seconds"} in start order
+        self.timers: t.Dict[str, float] = {}
+        self.ops: t.Dict[t.Tuple[str, str], t.List[float]] = {}  # (op, key) -> [calls, items, bytes, seconds]
+        self.billable = {"reads": 0, "writes": 0, "deletes": 0}
+        self._cprofile = cProfile.Profile() if cprofile else None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        rec = {"name": name, "start": round(time.perf_counter() - self.started, 4), "seconds": None}
+        with self._lock: self.phases.append(rec)
+        started = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = round(time.perf_counter() - started, 4)
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock: self.timers[name] = self.timers.get(name, 0.0) + elapsed
+
+    def op(self, op: str, key: str, items: int=0, nbytes: int=0, seconds: float=0.0, billed: t.Optional[str]=None, billed_n: int=0):
+        with self._lock:
+            rec = self.ops.setdefault((op, key), [0, 0, 0, 0.0])
+            rec[0] += 1; rec[1] += items; rec[2] += nbytes; rec[3] += seconds
+            if billed: self.billable[billed] += billed_n
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            by_op: t.Dict[str, dict] = {}; by_collection: t.Dict[str, dict] = {}
+            for (op, key), (calls, items, nbytes, seconds) in sorted(self.ops.items()):
+                for bucket, name in ((by_op, op), (by_collection, key)):
+                    agg = bucket.setdefault(name, {"calls": 0, "items": 0, "bytes": 0, "seconds": 0.0})
+                    agg["calls"] += calls; agg["items"] += items; agg["bytes"] += nbytes; agg["seconds"] = round(agg["seconds"] + seconds, 4)
+            cost = sum(self.billable[k] * PRICE_PER_100K[k] / 100000 for k in self.billable)
+            return {"_type": "runProfile", "startedAt": self.started_at, "wallSeconds": round(time.perf_counter() - self.started, 4),
+                    "phases": [dict(p) for p in self.phases], "timers": {k: round(v, 4) for k, v in self.timers.items()},
+                    "operations": by_op, "collections": by_collection,
+                    "ops": [{"op": op, "key": key, "calls": c, "items": i, "bytes": b, "seconds": round(s, 4)} for (op, key), (c, i, b, s) in sorted(self.ops.items())],
+                    "billable": dict(self.billable), "estimatedCostUSD": round(cost, 6), "pricePer100k": PRICE_PER_100K}
+
+    def summary_lines(self, data: dict=None, name: str=PROFILE_NAME) -> t.List[str]:
+        data = data or self.as_dict()
+        lines = ["", "## Performance and cost", f"- Wall time: {data['wallSeconds']}s"]
+        for p in data["phases"]: lines.append(f"  - {p['name']}: {p['seconds']}s")
+        for timer_name, seconds in sorted(data["timers"].items()): lines.append(f"  - {timer_name} (accumulated): {seconds}s")
+        b = data["billable"]
+        lines.append(f"- Billable operations: {b['reads']} reads, {b['writes']} writes, {b['deletes']} deletes (~${data['estimatedCostUSD']:.4f})")
+        lines.append("- Calls by operation:")
+        for op, agg in sorted(data["operations"].items()):
+            lines.append(f"  - {op}: {agg['calls']} calls, {agg['items']} items, {agg['bytes']:,} bytes, {agg['seconds']}s in calls")
+        busiest = sorted(data["collections"].items(), key=lambda kv: -kv[1]["bytes"])[:10]
+        if busiest:
+            lines.append("- Heaviest collections / prefixes (by bytes):")
+            for key, agg in busiest: lines.append(f"  - {key}: {agg['items']} items, {agg['bytes']:,} bytes")
+        lines.append(f"- Details: {name}")
+        return lines
+
+    def save(self, folder: Path, name: str=PROFILE_NAME, summary: bool=True) -> Path:
+        """Write the profile (and pstats); append the summary section if snapshot_summary.md exists."""
+        data = self.as_dict()
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(folder / PSTATS_NAME)); data["pstats"] = PSTATS_NAME
+        out = folder / name
+        out.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        summary_path = folder / SUMMARY_NAME
+        if summary and summary_path.exists():
+            with open(summary_path, "a", encoding="utf-8") as fh: fh.write("\n".join(self.summary_lines(data, name)) + "\n")
+        return out
+
+@contextlib.contextmanager
+def profiling(enabled: bool=True, cprofile: bool=False):
+    """Make a RunProfile the active one for the duration; yields None when disabled."""
+    global _ACTIVE
+    if not enabled:
+        yield None; return
+    prof = RunProfile(cprofile); previous, _ACTIVE = _ACTIVE, prof
+    if prof._cprofile is not None: prof._cprofile.enable()
+    try:
+        yield prof
+    finally:
+        if prof._cprofile is not None: prof._cprofile.disable()
+        _ACTIVE = previous
+
+def active() -> t.Optional[RunProfile]:
+    return _ACTIVE
+
+def phase(name: str):
+    return _ACTIVE.phase(name) if _ACTIVE is not None else _NULL
+
+def timer(name: str):
+    return _ACTIVE.timer(name) if _ACTIVE is not None else _NULL
+
+# ---- proxies
+
+class _Proxy:
+    __slots__ = ("_target", "_prof")
+    def __init__(self, target, prof: RunProfile):
+        object.__setattr__(self, "_target", target); object.__setattr__(self, "_prof", prof)
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+    def __repr__(self):
+        return f"instrumented({self._target!r})"
+
+def unwrap(obj):
+    return obj._target if isinstance(obj, _Proxy) else obj
+
+def _unwrap_value(v):
+    if isinstance(v, _Proxy): return v._target
+    if isinstance(v, dict): return {k: _unwrap_value(x) for k, x in v.items()}
+    if isinstance(v, list): return [_unwrap_value(x) for x in v]
+    return v
+
+def _col_of(doc_path: str) -> str:
+    return collection_template(doc_path.rsplit("/", 1)[0])
+
+class _Snapshot(_Proxy):
+    __slots__ = ()
+    @property
+    def reference(self): return _DocumentRef(self._target.reference, self._prof)
+
+class _Query(_Proxy):
+    __slots__ = ("_key",)
+    def __init__(self, target, prof, key: str):
+        super().__init__(target, prof); object.__setattr__(self, "_key", key)
+    def _derive(self, target): return _Query(target, self._prof, self._key)
+    def select(self, field_paths): return self._derive(self._target.select(field_paths))
+    def limit(self, n): return self._derive(self._target.limit(n))
+    def order_by(self, *a, **kw): return self._derive(self._target.order_by(*a, **kw))
+    def where(self, *a, **kw): return self._derive(self._target.where(*a, **kw))
+    def start_after(self, cursor):
+        return self._derive(self._target.start_after(unwrap(cursor) if not isinstance(cursor, dict) else cursor))
+
+    def stream(self, *a, **kw):
+        started = time.perf_counter(); n = 0; nbytes = 0; spent = 0.0
+        it = iter(self._target.stream(*a, **kw)); spent += time.perf_counter() - started
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    snap = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    spent += time.perf_counter() - t0
+                n += 1
+                if snap.exists: nbytes += document_size(snap.reference.path, snap.to_dict())
+                yield _Snapshot(snap, self._prof)
+        finally:
+            self._prof.op("query", self._key, n, nbytes, spent, "reads", max(1, n))  # an empty query still bills one read
+
+    def get(self, *a, **kw): return list(self.stream(*a, **kw))
+
+    def list_documents(self, *a, **kw):
+        started = time.perf_counter(); refs = list(self._target.list_documents(*a, **kw))
+        self._prof.op("listDocuments", self._key, len(refs), 0, time.perf_counter() - started, "reads", max(1, len(refs)))
+        return [_DocumentRef(r, self._prof) for r in refs]
+
+class _CollectionRef(_Query):
+    __slots__ = ()
+    def __init__(self, target, prof):
+        super().__init__(target, prof, collection_template(target.path if hasattr(target, "path") else target.id))
+    def document(self, *a): return _DocumentRef(self._target.document(*a), self._prof)
+
+def _list_collections(prof: RunProfile, owner_key: str, call) -> list:
+    started = time.perf_counter(); cols = list(call())
+    prof.op("listCollectionIds", owner_key, len(cols), 0, time.perf_counter() - started, "reads", 1)
+    return [_CollectionRef(c, prof) for c in cols]
+
+class _DocumentRef(_Proxy):
+    __slots__ = ()
+    def collection(self, col_id): return _CollectionRef(self._target.collection(col_id), self._prof)
+    def collections(self, *a, **kw): return _list_collections(self._prof, _col_of(self._target.path), lambda: self._target.collections(*a, **kw))
+    @property
+    def parent(self): return _CollectionRef(self._target.parent, self._prof)
+
+    def get(self, *a, **kw):
+        started = time.perf_counter(); snap = self._target.get(*a, **kw)
+        nbytes = document_size(self._target.path, snap.to_dict()) if snap.exists else 0
+        self._prof.op("get", _col_of(self._target.path), 1, nbytes, time.perf_counter() - started, "reads", 1)
+        return _Snapshot(snap, self._prof)
+
+    def _write(self, op, billed, call, data=None):
+        started = time.perf_counter(); out = call()
+        nbytes = document_size(self._target.path, data) if data is not None else 0
+        self._prof.op(op, _col_of(self._target.path), 1, nbytes, time.perf_counter() - started, billed, 1)
+        return out
+
+    def set(self, document_data, merge=False): return self._write("set", "writes", lambda: self._target.set(_unwrap_value(document_data), merge=merge), document_data)
+    def update(self, field_updates): return self._write("update", "writes", lambda: self._target.update(_unwrap_value(field_updates)), field_updates)
+    def delete(self, *a, **kw): return self._write("delete", "deletes", lambda: self._target.delete(*a, **kw))
+
+class _WriteBatch(_Proxy):
+    __slots__ = ("_pending",)
+    def __init__(self, target, prof):
+        super().__init__(target, prof); object.__setattr__(self, "_pending", [])
+    def __len__(self): return len(self._pending)
+    def set(self, reference, document_data, merge=False):
+        self._pending.append(("writes", reference.path, document_data)); return self._target.set(unwrap(reference), _unwrap_value(document_data), merge=merge)
+    def update(self, reference, field_updates):
+        self._pending.append(("writes", reference.path, field_updates)); return self._target.update(unwrap(reference), _unwrap_value(field_updates))
+    def delete(self, reference, *a, **kw):
+        self._pending.append(("deletes", reference.path, None)); return self._target.delete(unwrap(reference), *a, **kw)
+
+    def commit(self, *a, **kw):
+        started = time.perf_counter(); out = self._target.commit(*a, **kw); spent = time.perf_counter() - started
+        per_col: t.Dict[t.Tuple[str, str], t.List[int]] = {}
+        for billed, path, data in self._pending:
+            agg = per_col.setdefault((billed, _col_of(path)), [0, 0]); agg[0] += 1
+            if data is not None: agg[1] += document_size(path, data)
+        for (billed, key), (n, nbytes) in per_col.items():
+            self._prof.op("commit." + ("delete" if billed == "deletes" else "set"), key, n, nbytes, spent * n / len(self._pending), billed, n)
+        self._pending.clear()
+        return out
+
+class InstrumentedFirestore(_Proxy):
+    __slots__ = ()
+    def collection(self, path): return _CollectionRef(self._target.collection(path), self._prof)
+    def document(self, path): return _DocumentRef(self._target.document(path), self._prof)
+    def collection_group(self, collection_id): return _Query(self._target.collection_group(collection_id), self._prof, f"**/{collection_id}")
+    def collections(self, *a, **kw): return _list_collections(self._prof, "(root)", lambda: self._target.collections(*a, **kw))
+    def batch(self): return _WriteBatch(self._target.batch(), self._prof)
+
+    def get_all(self, references, *a, **kw):
+        refs = [unwrap(r) for r in references]; started = time.perf_counter()
+        snaps = list(self._target.get_all(refs, *a, **kw)); spent = time.perf_counter() - started
+        per_col: t.Dict[str, t.List[int]] = {}
+        for snap in snaps:
+            agg = per_col.setdefault(_col_of(snap.reference.path), [0, 0]); agg[0] += 1
+            if snap.exists: agg[1] += document_size(snap.reference.path, snap.to_dict())
+        for key, (n, nbytes) in per_col.items(): self._prof.op("batchGet", key, n, nbytes, spent * n / max(1, len(snaps)), "reads", n)
+        return iter([_Snapshot(s, self._prof) for s in snaps])
+
+class _Blob(_Proxy):
+    __slots__ = ()
+    def _key(self) -> str:
+        return self._target.name.rsplit("/", 1)[0] + "/" if "/" in self._target.name else "/"
+    def download_to_filename(self, filename, *a, **kw):
+        started = time.perf_counter(); out = self._target.download_to_filename(filename, *a, **kw)
+        self._prof.op("download", self._key(), 1, os.path.getsize(filename), time.perf_counter() - started)
+        return out
+    def upload_from_filename(self, filename, *a, **kw):
+        started = time.perf_counter(); out = self._target.upload_from_filename(filename, *a, **kw)
+        self._prof.op("upload", self._key(), 1, os.path.getsize(filename), time.perf_counter() - started)
+        return out
+    def delete(self, *a, **kw):
+        started = time.perf_counter(); out = self._target.delete(*a, **kw)
+        self._prof.op("deleteBlob", self._key(), 1, 0, time.perf_counter() - started)
+        return out
+
+class _Bucket(_Proxy):
+    __slots__ = ()
+    def blob(self, name, *a, **kw): return _Blob(self._target.blob(name, *a, **kw), self._prof)
+
+class InstrumentedStorage(_Proxy):
+    __slots__ = ()
+    def bucket(self, name, *a, **kw): return _Bucket(self._target.bucket(name, *a, **kw), self._prof)
+    def list_blobs(self, bucket_or_name, *a, prefix=None, **kw):
+        started = time.perf_counter(); blobs = list(self._target.list_blobs(bucket_or_name, *a, prefix=prefix, **kw))
+        self._prof.op("list_blobs", prefix or "/", len(blobs), sum(b.size or 0 for b in blobs), time.perf_counter() - started)
+        return [_Blob(b, self._prof) for b in blobs]
+
+def instrument_firestore(db):
+    """The client wrapped for the active profile, or `db` itself when not profiling."""
+    if _ACTIVE is None or db is None or isinstance(db, _Proxy): return db
+    return InstrumentedFirestore(db, _ACTIVE)
+
+def instrument_storage(client):
+    if _ACTIVE is None or client is None or isinstance(client, _Proxy): return client
+    return InstrumentedStorage(client, _ACTIVE)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Resumable, point-in-time export for snapshot_tool. Every collection is read in
+pages of `page_size` documents (order_by __name__ + start_after) at one pinned
+read_time. The snapshot is therefore the database as of a single instant, however
+long the crawl takes, and only one page is held in memory at a time.
+
+The crawl is depth-first, and its whole state is a stack of [collection, last
+document written]. After each page, snapshot.ndjson is flushed and the stack, the
+file offset and the counts are saved to export_checkpoint.json. An interrupted run
+is resumed by building PagedExport on the same folder: the ndjson file is cut back
+to the checkpointed offset and the crawl carries on from the stack. A page that
+failed halfway is simply read again.
+
+Weekly picks: the walk skips weeklyPicks/{uid}/episodes, whose parent documents
+are usually missing anyway. A paged "episodes" collection-group query at the same
+read_time sits at the bottom of the stack and exports them all exactly once, so
+no set of exported paths has to be kept.
+
+read_time must be no older than an hour, or 7 days on databases with
+point-in-time recovery (READ_TIME_MAX_AGE). It is rounded down to the minute, as
+that longer window requires. stream() / collections() with read_time need
+google-cloud-firestore 2.16 or later.
+"""
+import datetime as dt, json, os, random, time, typing as t
+from pathlib import Path
+
+PAGE_SIZE = 500
+CHECKPOINT_NAME = "export_checkpoint.json"
+READ_TIME_MAX_AGE = dt.timedelta(hours=1)  # dt.timedelta(days=7) when point-in-time recovery is enabled
+PAGE_RETRIES = 6
+GROUP_MARKER = "**/episodes"  # stack entry for the weekly-picks collection-group query
+
+import firestore_codec, instrumentation
+from firestore_bulk import is_retryable
+from snapshot_io import NDJSON_NAME, NdjsonSnapshotWriter
+
+def _iso(v) -> t.Optional[str]:
+    return v.isoformat() if hasattr(v, "isoformat") else None
+
+def _entry(doc) -> dict:
+    with instrumentation.timer("serialize"):
+        return {"_id": doc.id, "_path": doc.reference.path, "_createTime": _iso(getattr(doc, "create_time", None)),
+                "_updateTime": _iso(getattr(doc, "update_time", None)), "fields": firestore_codec.encode_fields(doc.reference.path, doc.to_dict() or {})}
+
+def _is_weekly_episodes(col_path: str) -> bool:
+    """seasons/<sid>/weeklyPicks/<uid>/episodes"""
+    parts = col_path.split("/")
+    return len(parts) >= 3 and parts[-1] == "episodes" and parts[-3] == "weeklyPicks"
+
+def has_checkpoint(folder: Path) -> bool:
+    return (folder / CHECKPOINT_NAME).exists()
+
+class PagedExport:
+    """
+    Usage:
+        export = PagedExport(db, snap_dir, header)   # resumes if snap_dir holds a checkpoint
+        export.run(); export.close(storage=..., extra=...)
+    """
+    def __init__(self, db, folder: Path, header: dict=None, only_col_prefixes: t.Optional[t.List[str]]=None,
+                 page_size: int=PAGE_SIZE, retry_delay: float=0.5):
+        self.db = db; self.folder = folder; self._retry_delay = retry_delay
+        self.checkpoint_path = folder / CHECKPOINT_NAME
+        if self.checkpoint_path.exists():
+            state = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+            self.read_time = firestore_codec.parse_timestamp(state["readTime"])
+            age = dt.datetime.now(dt.timezone.utc) - self.read_time
+            if age > READ_TIME_MAX_AGE:
+                raise ValueError(f"checkpoint read time {state['readTime']} is {age} old, past the {READ_TIME_MAX_AGE} Firestore keeps; "
+                                 f"start a new export (or raise READ_TIME_MAX_AGE if point-in-time recovery is enabled)")
+            self.page_size = state["pageSize"]; self.only_col_prefixes = state["onlyPrefixes"]
+            self.stack: t.Optional[t.List[list]] = state["stack"]; self.stats = state["stats"]; self.stats["resumes"] += 1
+            self.writer = NdjsonSnapshotWriter(folder / NDJSON_NAME, None, dedupe=False, resume=state["writer"])
+        else:
+            self.read_time = dt.datetime.now(dt.timezone.utc).replace(second=0, microsecond=0)
+            self.page_size = max(1, page_size); self.only_col_prefixes = only_col_prefixes; self.stack = None
+            self.stats = {"pages": 0, "documents": 0, "listCollections": 0, "retries": 0, "resumes": 0}
+            self.writer = NdjsonSnapshotWriter(folder / NDJSON_NAME, {**(header or {}), "readTime": self.read_time.isoformat()}, dedupe=False)
+
+    def _wanted(self, path: str) -> bool:
+        return not self.only_col_prefixes or any(path.split("/", 1)[0].startswith(p) for p in self.only_col_prefixes)
+
+    def _retry(self, call: t.Callable):
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= PAGE_RETRIES: raise
+                attempt += 1; self.stats["retries"] += 1
+                time.sleep(min(30.0, self._retry_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+
+    def _page(self, col: str, after: t.Optional[str]) -> list:
+        query = self.db.collection_group("episodes") if col == GROUP_MARKER else self.db.collection(col)
+        query = query.order_by("__name__").limit(self.page_size)
+        if after: query = query.start_after({"__name__": instrumentation.unwrap(self.db.document(after))})
+        return list(query.stream(read_time=self.read_time))
+
+    def _subcollections(self, doc) -> t.List[list]:
+        self.stats["listCollections"] += 1
+        paths = [f"{doc.reference.path}/{sub.id}" for sub in doc.reference.collections(read_time=self.read_time)]
+        return [[p, None] for p in paths if not _is_weekly_episodes(p)]
+
+    def step(self):
+        """Export one page of the collection on top of the stack, then checkpoint."""
+        col, after = self.stack[-1]
+        page = self._retry(lambda: self._page(col, after))
+        if col == GROUP_MARKER:
+            docs = [d for d in page if _is_weekly_episodes(d.reference.path.rsplit("/", 1)[0]) and self._wanted(d.reference.path)]; subs = []
+        else:
+            docs = page; subs = [s for d in docs for s in self._retry(lambda: self._subcollections(d))]
+        for doc in docs: self.writer.write_doc(_entry(doc))  # reads first: a failed page leaves nothing to undo
+        self.stats["pages"] += 1; self.stats["documents"] += len(docs)
+        if len(page) < self.page_size: self.stack.pop()
+        else: self.stack[-1][1] = page[-1].reference.path
+        self.stack.extend(reversed(subs))
+        self._save()
+
+    def _save(self):
+        state = {"_type": "exportCheckpoint", "readTime": self.read_time.isoformat(), "pageSize": self.page_size,
+                 "onlyPrefixes": self.only_col_prefixes, "stack": self.stack, "writer": self.writer.checkpoint(), "stats": self.stats}
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8"); os.replace(tmp, self.checkpoint_path)
+
+    def run(self) -> dict:
+        if self.stack is None:
+            cols = [c.id for c in self._retry(lambda: list(self.db.collections(read_time=self.read_time))) if self._wanted(c.id)]
+            self.stack = [[GROUP_MARKER, None]] + [[c, None] for c in reversed(cols)]; self._save()
+        while self.stack: self.step()
+        return self.stats
+
+    def close(self, storage: dict=None, extra: dict=None) -> dict:
+        """Write the trailer and drop the checkpoint; the folder is then a normal ndjson snapshot."""
+        trailer = self.writer.close(storage=storage, extra={"readTime": self.read_time.isoformat(), **(extra or {})})
+        self.checkpoint_path.unlink(missing_ok=True)
+        return trailer
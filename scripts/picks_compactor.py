@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Folds seasons/{id}/weeklyPicks/{uid}/episodes/{n} into one aggregate per episode,
+so the weekly table costs one read per episode instead of one per user per episode:
+
+  seasons/{id}/weeklyPicksByEpisode/{n}      {"seasonId", "episodeId", "chunk": 0, "chunkCount", "userCount",
+                                              "picks": {uid: WeeklyPicksDocument fields}, "updatedAt"}
+  seasons/{id}/weeklyPicksByEpisode/{n}-{k}  chunk k, when one document would not fit under
+                                              Firestore's 1 MiB limit (MAX_CHUNK_BYTES / MAX_CHUNK_USERS)
+
+Reading the collection returns every chunk of every episode. A reader that gets
+fewer than chunkCount chunks of an episode has caught a repack in progress.
+The aggregates sit under the season document, so snapshot_tool's recursive
+export finds them without the collection-group pass that the missing
+weeklyPicks/{uid} parents make necessary.
+
+Users are packed in id order, so the same picks always give the same chunks,
+and only chunks whose content changed are written. compact_season() is the
+one-off job. PicksCompactor.start() listens to the "episodes" collection group,
+as the app does, and repacks just the episode a pick belongs to. Both read the
+group through a __name__ range on the season (season_picks_query), so other
+seasons' picks are neither read nor billed. Both report
+the reads a full table load costs before and after (savings()).
+"""
+import datetime as dt, time, typing as t
+from pathlib import Path
+
+CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
+PROJECT_ID = "survivus1514"
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+AGGREGATE_COLLECTION = "weeklyPicksByEpisode"
+MAX_CHUNK_BYTES = 900_000   # estimated storage size per chunk; headroom under the 1,048,576-byte document limit
+MAX_CHUNK_USERS = 1000      # every pick is an index entry; keeps a chunk well under the 40,000 entries per document
+MAX_BATCH_CHUNKS = 8        # chunks per commit, so a commit stays under the 10 MiB request limit
+
+import firestore_paths, instrumentation, scoring_engine
+
+def aggregate_id(episode: int, chunk: int) -> str:
+    return str(episode) if chunk == 0 else f"{episode}-{chunk}"
+
+def _aggregate_episode(doc_id: str) -> t.Optional[int]:
+    return scoring_engine.int_id(doc_id.split("-", 1)[0])
+
+def pack_episode(season_id: str, episode: int, picks: t.Dict[str, dict]) -> t.List[dict]:
+    """The chunk documents (without updatedAt) holding one episode's {uid: fields}; [] when nobody picked."""
+    if not picks: return []
+    header = {"seasonId": season_id, "episodeId": episode, "chunk": 0, "chunkCount": 0, "userCount": len(picks), "picks": {}}
+    base = instrumentation.document_size(f"seasons/{season_id}/{AGGREGATE_COLLECTION}/{episode}-000", header)
+    chunks: t.List[t.List[str]] = [[]]; size = base
+    for uid in sorted(picks):
+        n = len(uid.encode("utf-8")) + 1 + instrumentation.value_size(picks[uid])
+        if chunks[-1] and (size + n > MAX_CHUNK_BYTES or len(chunks[-1]) >= MAX_CHUNK_USERS):
+            chunks.append([]); size = base
+        chunks[-1].append(uid); size += n
+    return [{**header, "chunk": i, "chunkCount": len(chunks), "picks": {uid: picks[uid] for uid in uids}} for i, uids in enumerate(chunks)]
+
+def season_picks_query(db, season_id: str):
+    """The "episodes" collection group limited to documents under seasons/{season_id}."""
+    return firestore_paths.under_document(db.collection_group("episodes"), db, f"seasons/{season_id}")
+
+class PicksCompactor:
+    def __init__(self, db, season_id: str):
+        self.db = db; self.season_id = season_id
+        self._prefix = f"seasons/{season_id}/weeklyPicks/"
+        self._col_path = f"seasons/{season_id}/{AGGREGATE_COLLECTION}"
+        self.picks: t.Dict[int, t.Dict[str, dict]] = {}              # episode -> user -> WeeklyPicksDocument fields
+        self._chunks: t.Dict[int, t.List[dict]] = {}                 # episode -> packed chunks
+        self._published: t.Dict[int, t.Dict[str, dict]] = {}         # episode -> aggregate doc id -> content as stored
+        self._watch = None; self._started = False
+        self.stats = {"events": 0, "repacked": 0, "written": 0, "deleted": 0, "unchanged": 0, "commits": 0}
+
+    # -- state
+    def load_published(self):
+        """Read the aggregates already in the project, so unchanged chunks are not rewritten."""
+        self._published = {}
+        for doc in self.db.collection(self._col_path).stream():
+            episode = _aggregate_episode(doc.id)
+            if episode is None: continue
+            fields = dict(doc.to_dict() or {}); fields.pop("updatedAt", None)
+            self._published.setdefault(episode, {})[doc.id] = fields
+        return self
+
+    def apply_changes(self, changes: t.Iterable[t.Tuple[str, t.Optional[dict]]]) -> t.Set[int]:
+        """(path, fields or None when deleted) -> picks; returns the episodes whose picks changed."""
+        dirty = set()
+        for path, fields in changes:
+            if not path.startswith(self._prefix): continue
+            parts = path[len(self._prefix):].split("/")
+            if len(parts) != 3 or parts[1] != "episodes": continue
+            episode = scoring_engine.int_id(parts[2])
+            if episode is None: continue
+            self.stats["events"] += 1
+            by_user = self.picks.setdefault(episode, {})
+            if fields is None:
+                if by_user.pop(parts[0], None) is None: continue
+            elif by_user.get(parts[0]) == fields: continue
+            else: by_user[parts[0]] = fields
+            dirty.add(episode)
+        return dirty
+
+    # -- output
+    def publish(self, episodes: t.Optional[t.Iterable[int]]=None, dry_run: bool=False) -> int:
+        """Repack `episodes` (default: all) and write the chunks that differ; returns documents written + deleted."""
+        episodes = sorted(set(self.picks) | set(self._published) if episodes is None else set(episodes))
+        changed = 0
+        for episode in episodes:
+            self.stats["repacked"] += 1
+            chunks = pack_episode(self.season_id, episode, self.picks.get(episode, {})); self._chunks[episode] = chunks
+            published = self._published.get(episode, {})
+            wanted = {aggregate_id(episode, c["chunk"]): c for c in chunks}
+            ops = [(doc_id, doc) for doc_id, doc in wanted.items() if published.get(doc_id) != doc]
+            ops += [(doc_id, None) for doc_id in sorted(published) if doc_id not in wanted]
+            self.stats["unchanged"] += len(wanted) - sum(1 for _, doc in ops if doc is not None)
+            for _, doc in ops: self.stats["written" if doc is not None else "deleted"] += 1
+            changed += len(ops)
+            if dry_run or not ops: continue
+            now = dt.datetime.now(dt.timezone.utc)
+            for i in range(0, len(ops), MAX_BATCH_CHUNKS):  # one commit per episode in the usual case: readers see all its chunks change together
+                batch = self.db.batch()
+                for doc_id, doc in ops[i:i + MAX_BATCH_CHUNKS]:
+                    ref = self.db.collection(self._col_path).document(doc_id)
+                    if doc is None: batch.delete(ref)
+                    else: batch.set(ref, {**doc, "updatedAt": now})
+                batch.commit(); self.stats["commits"] += 1
+            if chunks: self._published[episode] = wanted
+            else: self._published.pop(episode, None)
+        return changed
+
+    def savings(self) -> dict:
+        """Reads for one full load of the weekly table: per-user documents vs. aggregate chunks."""
+        before = sum(len(by_user) for by_user in self.picks.values())
+        after = sum(len(chunks) for chunks in self._chunks.values())
+        return {"pickDocuments": before, "aggregateDocuments": after, "readsSaved": before - after,
+                "readReduction": round(before / after, 1) if after else None}
+
+    # -- listener
+    def start(self):
+        self.load_published(); self._started = False
+        self._watch = season_picks_query(self.db, self.season_id).on_snapshot(self._on_snapshot)
+        return self
+
+    def stop(self):
+        if self._watch is not None: self._watch.unsubscribe()
+        self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        dirty = self.apply_changes((c.document.reference.path, None if c.type.name == "REMOVED" else c.document.to_dict() or {}) for c in changes)
+        if not self._started:
+            self._started = True; self.publish()  # first snapshot: reconcile every episode, including ones left with no picks
+        elif dirty:
+            self.publish(dirty)
+
+def compact_season(db, season_id: str, dry_run: bool=False) -> dict:
+    """One pass: read every pick and the existing aggregates, write what differs."""
+    compactor = PicksCompactor(db, season_id).load_published()
+    compactor.apply_changes((doc.reference.path, doc.to_dict() or {}) for doc in season_picks_query(db, season_id).stream())
+    compactor.publish(dry_run=dry_run)
+    return {**compactor.stats, **compactor.savings(), "dryRun": dry_run}
+
+def estimate_from_entries(entries: t.Iterable[dict], season_id: str) -> dict:
+    """compact_season on snapshot entries, without a project: what the aggregates would look like and save."""
+    compactor = PicksCompactor(None, season_id)
+    compactor.apply_changes((e["_path"], e.get("fields") or {}) for e in entries)
+    compactor.publish(dry_run=True)
+    sizes = [instrumentation.document_size(f"{compactor._col_path}/{aggregate_id(c['episodeId'], c['chunk'])}", c)
+             for chunks in compactor._chunks.values() for c in chunks]
+    return {**compactor.savings(), "episodes": len(compactor._chunks), "largestChunkBytes": max(sizes, default=0)}
+
+def _print_report(report: dict):
+    ratio = f" ({report['readReduction']}x fewer)" if report.get("readReduction") else ""
+    print(f"  Full table load: {report['pickDocuments']} reads -> {report['aggregateDocuments']} reads, {report['readsSaved']} saved{ratio}")
+    for key in ("written", "deleted", "unchanged", "episodes", "largestChunkBytes"):
+        if key in report: print(f"  {key}: {report[key]}")
+
+def _client():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    if not firebase_admin._apps: firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+    return firestore.client()
+
+def main():
+    print("\n=== Weekly Picks Compactor ===")
+    print("1) Compact a live season now")
+    print("2) Keep a live season's aggregates in sync (Ctrl-C to stop)")
+    print("3) Estimate from a snapshot folder (no writes)")
+    choice = input("Choose [1-3]: ").strip()
+    if choice in ("1", "2"):
+        db = _client()
+        season_id = scoring_engine.choose_season(sorted(d.id for d in db.collection("seasons").stream()))
+        if not season_id: return
+        if choice == "1":
+            dry_run = input("Dry run (report only)? [Y/n]: ").strip().lower() != "n"
+            with instrumentation.profiling() as prof:
+                report = compact_season(instrumentation.instrument_firestore(db), season_id, dry_run=dry_run)
+            _print_report(report)
+            b = prof.billable
+            print(f"  This run cost {b['reads']} reads, {b['writes']} writes, {b['deletes']} deletes\n")
+            return
+        compactor = PicksCompactor(db, season_id).start()
+        print(f"Watching seasons/{season_id}/weeklyPicks; aggregates -> seasons/{season_id}/{AGGREGATE_COLLECTION}")
+        try:
+            while True: time.sleep(1)
+        except KeyboardInterrupt:
+            compactor.stop()
+        _print_report({**compactor.stats, **compactor.savings()})
+    elif choice == "3":
+        snap_dir = scoring_engine.choose_snapshot_dir(Path(SNAPSHOTS_ROOT))
+        if not snap_dir: return
+        entries = scoring_engine.snapshot_entries(snap_dir)
+        season_id = scoring_engine.choose_season(scoring_engine.season_ids(entries))
+        if not season_id: return
+        _print_report(estimate_from_entries(entries, season_id))
+    else:
+        print("Unknown choice.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo projection of the final table: each user's chance of finishing first
+or in the top 3, and their expected total.
+
+The recorded episodes are scored with scoring_engine, as the Table tab does. The
+remaining episodes are simulated with the outcome model synthetic_league uses:
+  - each episode votes out one random remaining contestant;
+  - Immunity goes to one random contestant still in the game;
+  - other pick categories are won by a random sample of totalPicks remaining contestants;
+  - wagered categories (Sole Survivor) go to one random remaining contestant, in the finale only.
+Scoring follows ScoringEngine.swift. Auto-scored categories pay per picked
+contestant still in the game after the vote, per-pick categories pay per correct
+pick, and wagers win or lose the wagered amount.
+
+Future episodes use the active phase (state/current), and the finale uses the
+last phase. A user with no picks yet for a future episode is assumed to keep
+their latest picks for that category.
+
+Contestants are bit positions. With numpy, a batch of simulations draws each
+outcome as an (n, contestants) boolean matrix, side by side for every simulated
+category. Scoring all of them for every user is then one matrix product with the
+stacked (contestants, users) selection matrices. Without numpy, the fallback uses
+Python int bitsets and popcounts, grouped by distinct selection. It is much slower
+and runs fewer simulations by default. Batches are seeded by index, so results are
+the same however they are split across the process pool.
+"""
+import datetime as dt, json, os, random, time, typing as t
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    HAS_NUMPY = False
+
+CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
+PROJECT_ID = "survivus1514"
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+SIMULATIONS = 20000              # default runs with numpy
+FALLBACK_SIMULATIONS = 2000      # default runs with the pure-Python bitset engine
+BATCH_SIMULATIONS = 2500         # simulations per vectorized batch (one pool task)
+PROJECTION_WORKERS = os.cpu_count() or 4
+PROCESS_MIN_SIMULATIONS = 10000  # smaller runs stay in this process; pool start-up would cost more than it saves
+PROJECTION_PREVIEW_ROWS = 15
+
+import scoring_engine
+from scoring_engine import SeasonData, build_leaderboard, normalized_column_id
+
+# ---- model: plain lists and ints, so it pickles cheaply to pool workers
+
+def _current_phase(season: SeasonData, active_phase_id: t.Optional[str]):
+    by_id = {p.id: p for p in season.phases}
+    if active_phase_id in by_id: return by_id[active_phase_id]
+    recorded = [r for _, r in sorted(season.results.items()) if r.phase_id in by_id]
+    if recorded: return by_id[recorded[-1].phase_id]
+    return season.phases[0] if season.phases else None
+
+def _latest_picks(season: SeasonData, user_id: str, eid: int, category_id: str):
+    """The user's picks for the episode, else their most recent earlier picks for the category."""
+    by_episode = season.picks.get(user_id, {})
+    weekly = by_episode.get(eid)
+    if weekly is None or category_id not in weekly.selections:
+        earlier = [e for e, w in by_episode.items() if e < eid and category_id in w.selections]
+        weekly = by_episode[max(earlier)] if earlier else None
+    return weekly
+
+def build_model(entries: t.Iterable[dict], season_id: str, remaining_episodes: t.Optional[int]=None) -> dict:
+    """
+    Everything a simulation needs. The episodes left are the season document's episodes
+    without recorded results, or `remaining_episodes` after the last recorded one.
+    """
+    entries = list(entries)
+    season = SeasonData.from_entries(entries, season_id)
+    season_doc = next((e.get("fields") or {} for e in entries if e["_path"] == f"seasons/{season_id}"), {})
+    state = next((e.get("fields") or {} for e in entries if e["_path"] == f"seasons/{season_id}/state/current"), {})
+    board = build_leaderboard(season)
+    recorded = set(board["scoredEpisodes"])
+    if remaining_episodes is None:
+        planned = sorted({e["id"] for e in season_doc.get("episodes") or [] if isinstance(e, dict) and isinstance(e.get("id"), int)})
+        future = [e for e in planned if e not in recorded]
+    else:
+        last = max(recorded, default=0); future = list(range(last + 1, last + 1 + remaining_episodes))
+
+    contestants = [c["id"] for c in season_doc.get("contestants") or [] if isinstance(c, dict) and isinstance(c.get("id"), str)]
+    def bit(cid: str) -> int:
+        if cid not in index: index[cid] = len(contestants); contestants.append(cid)
+        return 1 << index[cid]
+    index = {cid: i for i, cid in enumerate(contestants)}
+    out_so_far = {c for r in season.results.values() for c in r.voted_out}
+    for cid in out_so_far: bit(cid)
+
+    users = [u["id"] for u in season.users]
+    totals = {r["userId"]: r["total"] for r in board["rows"]}
+    current, finale = _current_phase(season, scoring_engine.uuid_string(state.get("activePhaseId"))), (season.phases[-1] if season.phases else None)
+    episodes = []
+    for n, eid in enumerate(future):
+        phase = finale if n == len(future) - 1 else current
+        items = []; seen = set()
+        for category in (phase.categories if phase else []):
+            if category.id in seen or not normalized_column_id(category.column_id): continue
+            seen.add(category.id)
+            if category.uses_wager:
+                if n != len(future) - 1: continue  # wagers are only decided in the finale
+                role, value = "wager", None
+            elif not category.points_per_correct_pick: continue
+            elif category.auto_scores_remaining_contestants: role, value = "auto", category.points_per_correct_pick
+            else:
+                column = normalized_column_id(category.column_id)
+                role = "votedOut" if column == "VO" else "immunity" if column == "IM" else "sample"
+                value = category.points_per_correct_pick
+            picks = []; wagers = []
+            for uid in users:
+                weekly = _latest_picks(season, uid, eid, category.id)
+                selections = weekly.selections.get(category.id, ()) if weekly else ()
+                mask = 0
+                for cid in selections: mask |= bit(cid)
+                picks.append(mask)
+                wager = weekly.wagers.get(category.id, category.wager_points) if weekly and role == "wager" else None
+                wagers.append(wager if wager and wager > 0 and mask else 0)
+            items.append({"role": role, "value": value, "k": max(1, category.total_picks), "picks": picks, "wagers": wagers})
+        episodes.append({"id": eid, "items": items})
+
+    alive = 0
+    for cid in contestants:
+        if cid not in out_so_far: alive |= 1 << index[cid]
+    return {"seasonId": season_id, "users": users, "names": {u["id"]: u["displayName"] for u in season.users},
+            "current": [totals.get(uid, 0) for uid in users], "contestants": contestants, "alive": alive,
+            "episodes": episodes, "scoredEpisodes": board["scoredEpisodes"]}
+
+# ---- numpy engine
+
+def _bits_matrix(masks: t.List[int], width: int):
+    """(contestants, len(masks)) float32 0/1 matrix of the bitsets."""
+    m = np.zeros((width, len(masks)), dtype=np.float32)
+    for j, mask in enumerate(masks):
+        while mask:
+            low = mask & -mask; m[low.bit_length() - 1, j] = 1.0; mask ^= low
+    return m
+
+def _points_matrix(model: dict):
+    """
+    Every simulated item's points are linear in its outcome mask, so the items are stacked
+    into one (items x contestants, users) matrix. A wager pays 2w for a correct pick, and
+    -w is subtracted separately.
+    """
+    width = len(model["contestants"]); users = len(model["users"]); blocks = []; wager_total = np.zeros(users)
+    for episode in model["episodes"]:
+        for item in episode["items"]:
+            sel = _bits_matrix(item["picks"], width)
+            if item["role"] == "wager":
+                wagers = np.asarray(item["wagers"], dtype=np.float32); blocks.append(sel * (2 * wagers)); wager_total += wagers
+            else: blocks.append(sel * item["value"])
+    return (np.vstack(blocks) if blocks else np.zeros((0, users), dtype=np.float32)), wager_total
+
+def _simulate_numpy(model: dict, n: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed); width = len(model["contestants"]); rows = np.arange(n)
+    weights, wager_total = _points_matrix(model)
+    alive = np.zeros((n, width), dtype=bool); alive[:] = _bits_matrix([model["alive"]], width)[:, 0].astype(bool)
+    outcomes = np.empty((n, weights.shape[0]), dtype=np.float32); col = 0; finale_open = np.zeros(n, dtype=bool)
+
+    def pick(k: int, pool):
+        keys = np.where(pool, rng.random(pool.shape), -1.0)
+        chosen = np.zeros(pool.shape, dtype=bool)
+        if k == 1: chosen[rows, keys.argmax(axis=1)] = True
+        else:
+            for c in np.argsort(-keys, axis=1)[:, :k].T: chosen[rows, c] = True
+        return chosen & pool
+
+    for episode in model["episodes"]:
+        voted = pick(1, alive) & (alive.sum(axis=1) > 1)[:, None]
+        alive &= ~voted
+        immune = pick(1, alive)
+        for item in episode["items"]:
+            role = item["role"]
+            if role == "auto": mask = alive
+            elif role == "votedOut": mask = voted
+            elif role == "immunity": mask = immune
+            elif role == "wager": mask = pick(1, alive); finale_open = alive.any(axis=1)
+            else: mask = pick(item["k"], alive)
+            outcomes[:, col:col + width] = mask; col += width
+
+    totals = np.asarray(model["current"], dtype=np.float64) + (outcomes @ weights) - finale_open[:, None] * wager_total
+    lead = totals == totals.max(axis=1, keepdims=True)
+    win = (lead / lead.sum(axis=1, keepdims=True)).sum(axis=0)
+    users = totals.shape[1]
+    third = np.partition(totals, users - 3, axis=1)[:, users - 3][:, None] if users >= 3 else totals.min(axis=1, keepdims=True)
+    return {"n": n, "win": win.tolist(), "top3": (totals >= third).sum(axis=0).tolist(), "sum": totals.sum(axis=0).tolist()}
+
+# ---- pure-Python bitset engine
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+def _groups(masks: t.List[int]) -> t.List[t.Tuple[int, t.List[int]]]:
+    """Users grouped by identical selection bitset (users without picks left out)."""
+    by_mask: t.Dict[int, t.List[int]] = {}
+    for i, mask in enumerate(masks):
+        if mask: by_mask.setdefault(mask, []).append(i)
+    return list(by_mask.items())
+
+def _simulate_bitsets(model: dict, n: int, seed: int) -> dict:
+    rng = random.Random(seed); users = len(model["users"]); width = len(model["contestants"])
+    episodes = [[(item, _groups(item["picks"])) for item in episode["items"]] for episode in model["episodes"]]
+    win = [0.0] * users; top3 = [0] * users; sums = [0.0] * users
+    for _ in range(n):
+        alive = model["alive"]; totals = list(model["current"])
+        for items in episodes:
+            bits = [i for i in range(width) if alive >> i & 1]
+            voted = 1 << rng.choice(bits) if len(bits) > 1 else 0
+            alive &= ~voted; bits = [i for i in range(width) if alive >> i & 1]
+            immune = 1 << rng.choice(bits) if bits else 0
+            for item, groups in items:
+                if item["role"] == "wager":
+                    if not bits: continue
+                    finale_winner = 1 << rng.choice(bits)
+                    for mask, members in groups:
+                        hit = bool(mask & finale_winner)
+                        for i in members: totals[i] += item["wagers"][i] if hit else -item["wagers"][i]
+                    continue
+                if item["role"] == "auto": target = alive
+                elif item["role"] == "votedOut": target = voted
+                elif item["role"] == "immunity": target = immune
+                else:
+                    target = 0
+                    for i in rng.sample(bits, min(item["k"], len(bits))): target |= 1 << i
+                for mask, members in groups:
+                    hits = _popcount(mask & target)
+                    if hits:
+                        for i in members: totals[i] += hits * item["value"]
+        best = max(totals, default=0); leaders = [i for i, v in enumerate(totals) if v == best]
+        for i in leaders: win[i] += 1 / len(leaders)
+        third = sorted(totals, reverse=True)[min(2, users - 1)] if users else 0
+        for i, v in enumerate(totals):
+            sums[i] += v
+            if v >= third: top3[i] += 1
+    return {"n": n, "win": win, "top3": top3, "sum": sums}
+
+# ---- driver
+
+def _simulate(model: dict, n: int, seed: int, use_numpy: bool) -> dict:
+    return _simulate_numpy(model, n, seed) if use_numpy else _simulate_bitsets(model, n, seed)
+
+def project(model: dict, simulations: int=None, workers: int=PROJECTION_WORKERS, seed: int=0, use_numpy: bool=None) -> dict:
+    """Run the simulations in batches (across processes for large runs) and summarize per user."""
+    use_numpy = HAS_NUMPY if use_numpy is None else use_numpy and HAS_NUMPY
+    simulations = simulations or (SIMULATIONS if use_numpy else FALLBACK_SIMULATIONS)
+    batches = [(min(BATCH_SIMULATIONS, simulations - start), seed + i) for i, start in enumerate(range(0, simulations, BATCH_SIMULATIONS))]
+    started = time.perf_counter()
+    if simulations >= PROCESS_MIN_SIMULATIONS and workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            parts = list(pool.map(_simulate, *zip(*[(model, n, s, use_numpy) for n, s in batches])))
+    else:
+        parts = [_simulate(model, n, s, use_numpy) for n, s in batches]
+    users = model["users"]; total = sum(p["n"] for p in parts)
+    rows = []
+    for i, uid in enumerate(users):
+        rows.append({"userId": uid, "displayName": model["names"].get(uid, uid), "total": model["current"][i],
+                     "expectedTotal": round(sum(p["sum"][i] for p in parts) / total, 2) if total else model["current"][i],
+                     "winProbability": round(sum(p["win"][i] for p in parts) / total, 4) if total else None,
+                     "top3Probability": round(sum(p["top3"][i] for p in parts) / total, 4) if total else None})
+    rows.sort(key=lambda r: (-(r["winProbability"] or 0), -(r["top3Probability"] or 0), -r["expectedTotal"]))
+    return {"_type": "projection", "seasonId": model["seasonId"], "generatedAt": dt.datetime.utcnow().isoformat() + "Z",
+            "simulations": total, "engine": "numpy" if use_numpy else "bitset", "seconds": round(time.perf_counter() - started, 3),
+            "scoredEpisodes": model["scoredEpisodes"], "remainingEpisodes": [e["id"] for e in model["episodes"]], "rows": rows}
+
+def print_projection(projection: dict, limit: int=PROJECTION_PREVIEW_ROWS):
+    print(f"{'Name':<16} {'Pts':>5} {'Exp':>7} {'Win%':>6} {'Top3%':>6}")
+    for row in projection["rows"][:limit]:
+        print(f"{row['displayName'][:16]:<16} {row['total']:>5} {row['expectedTotal']:>7.1f} "
+              f"{100 * row['winProbability']:>6.1f} {100 * row['top3Probability']:>6.1f}")
+    alive = sum(1 for r in projection["rows"] if r["winProbability"])
+    print(f"\n{alive} of {len(projection['rows'])} users won at least one of {projection['simulations']} simulations "
+          f"({projection['engine']}, {projection['seconds']}s)")
+
+def main():
+    base_dir = Path(SNAPSHOTS_ROOT)
+    print("\n=== Projection Engine ===")
+    if not HAS_NUMPY: print(f"(numpy not installed: using the slower bitset engine, {FALLBACK_SIMULATIONS} simulations by default)")
+    print("1) Project a season from a snapshot folder")
+    print("2) Project a season from the live project")
+    choice = input("Choose source [1-2]: ").strip()
+    if choice == "1":
+        snap_dir = scoring_engine.choose_snapshot_dir(base_dir)
+        if not snap_dir: return
+        entries = scoring_engine.snapshot_entries(snap_dir); season_id = scoring_engine.choose_season(scoring_engine.season_ids(entries)); out_dir = snap_dir
+        if not season_id: return
+    elif choice == "2":
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps: firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+        db = firestore.client()
+        season_id = scoring_engine.choose_season(sorted(d.id for d in db.collection("seasons").stream()))
+        if not season_id: return
+        season_doc = db.collection("seasons").document(season_id).get()
+        entries = [{"_path": f"seasons/{season_id}", "fields": season_doc.to_dict() or {}}] + list(scoring_engine.firestore_entries(db, season_id))
+        out_dir = base_dir / "leaderboards"
+    else:
+        print("Unknown choice."); return
+
+    model = build_model(entries, season_id)
+    if not model["episodes"]:
+        raw = input("No unplayed episodes listed in the season document. Episodes left to simulate [0]: ").strip()
+        if raw.isdigit() and int(raw): model = build_model(entries, season_id, remaining_episodes=int(raw))
+    raw = input(f"Simulations [{SIMULATIONS if HAS_NUMPY else FALLBACK_SIMULATIONS}]: ").strip()
+    projection = project(model, int(raw) if raw.isdigit() else None)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"projection_{season_id}.json"
+    out.write_text(json.dumps(projection, indent=2), encoding="utf-8")
+    print_projection(projection)
+    print(f"Projection saved to {out}\n")
+
+if __name__ == "__main__":
+    main()
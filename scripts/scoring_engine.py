@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Server-side twin of survivus/Services/ScoringEngine.swift and the Table tab.
+
+Reads a season from a snapshot folder (any format snapshot_io opens) or from the
+live project, decodes documents the way FirestoreLeagueRepository does, and
+scores every user x recorded episode x category in one pass. Eliminations before
+each episode are accumulated once up front instead of re-unioning all earlier
+results per score() call, and each episode's categories are resolved once for
+all users. The output is the TableView leaderboard (Pts, Wk and one column per
+category columnId) as JSON.
+"""
+import datetime as dt, json, re, typing as t, uuid
+from bisect import bisect_left
+from pathlib import Path
+
+CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
+PROJECT_ID = "survivus1514"
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+LEADERBOARD_PREVIEW_ROWS = 15
+
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+def uuid_string(value) -> t.Optional[str]:
+    """UUID(uuidString:) equivalent: canonical upper-case string, or None."""
+    return value.upper() if isinstance(value, str) and _UUID_RE.match(value) else None
+
+def int_id(value: str) -> t.Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def normalized_column_id(column_id: str) -> str:
+    return column_id.strip().upper()
+
+# ---- models (mirroring the Swift structs and their Firestore documents)
+
+class Category:
+    __slots__ = ("id", "name", "column_id", "total_picks", "points_per_correct_pick", "wager_points",
+                 "auto_scores_remaining_contestants", "is_locked", "uses_wager")
+
+    def __init__(self, name: str, column_id: str, total_picks: int, points_per_correct_pick: t.Optional[int], wager_points: t.Optional[int],
+                 auto_scores_remaining_contestants: bool, is_locked: bool, uses_wager: bool=False, id: str=None):
+        self.id = id or str(uuid.uuid4()).upper(); self.name = name
+        self.column_id = normalized_column_id(column_id) or column_id
+        self.total_picks = total_picks; self.points_per_correct_pick = points_per_correct_pick; self.wager_points = wager_points
+        # PickPhase.Category.init: a wager amount implies a wager category, which never auto-scores
+        self.uses_wager = uses_wager or wager_points is not None
+        self.auto_scores_remaining_contestants = False if self.uses_wager else auto_scores_remaining_contestants
+        self.is_locked = is_locked
+
+    @classmethod
+    def from_doc(cls, d: dict) -> t.Optional["Category"]:
+        """PhaseCategoryDocument.model(); missing required keys raise, like a decoding error."""
+        cid = uuid_string(d["id"])
+        if cid is None: return None
+        uses_wager = d.get("usesWager")
+        return cls(d["name"], d["columnId"], d["totalPicks"], d.get("pointsPerCorrectPick"), d.get("wagerPoints"),
+                   d["autoScoresRemainingContestants"], d["isLocked"], uses_wager if uses_wager is not None else d.get("wagerPoints") is not None, id=cid)
+
+class Phase:
+    __slots__ = ("id", "name", "sort_index", "categories")
+
+    def __init__(self, name: str, categories: t.List[Category], id: str=None, sort_index: t.Optional[int]=None):
+        self.id = id or str(uuid.uuid4()).upper(); self.name = name; self.categories = categories; self.sort_index = sort_index
+
+    @classmethod
+    def from_doc(cls, doc_id: str, d: dict) -> t.Optional["Phase"]:
+        try:
+            categories = [Category.from_doc(c) for c in d["categories"]]
+            phase_id = uuid_string(d.get("id")) or uuid_string(doc_id)
+            name = d["name"]
+        except (KeyError, TypeError):
+            return None
+        if phase_id is None: return None
+        return cls(name, [c for c in categories if c], id=phase_id, sort_index=d.get("sortIndex"))
+
+class EpisodeResult:
+    __slots__ = ("id", "phase_id", "immunity_winners", "voted_out", "category_winners")
+
+    def __init__(self, id: int, immunity_winners: t.List[str], voted_out: t.List[str], phase_id: str=None,
+                 category_winners: t.Dict[str, t.List[str]]=None):
+        self.id = id; self.phase_id = phase_id; self.immunity_winners = list(immunity_winners); self.voted_out = list(voted_out)
+        self.category_winners = {k: list(v) for k, v in (category_winners or {}).items() if v}
+
+    @property
+    def has_recorded_results(self) -> bool:
+        return bool(self.immunity_winners or self.voted_out or any(self.category_winners.values()))
+
+    @classmethod
+    def from_doc(cls, doc_id: str, d: dict) -> t.Optional["EpisodeResult"]:
+        eid = int_id(doc_id)
+        if eid is None or not isinstance(d.get("immunityWinners"), list) or not isinstance(d.get("votedOut"), list): return None
+        winners = {uuid_string(k): v for k, v in (d.get("categoryWinners") or {}).items() if uuid_string(k)}
+        return cls(eid, d["immunityWinners"], d["votedOut"], phase_id=uuid_string(d.get("phaseId")), category_winners=winners)
+
+class WeeklyPicks:
+    __slots__ = ("user_id", "episode_id", "selections", "wagers", "is_submitted")
+
+    def __init__(self, user_id: str, episode_id: int):
+        self.user_id = user_id; self.episode_id = episode_id; self.selections: t.Dict[str, t.FrozenSet[str]] = {}
+        self.wagers: t.Dict[str, int] = {}; self.is_submitted = False
+
+    def set_selections(self, selections: t.Iterable[str], category_id: str):
+        selections = frozenset(selections)
+        if selections: self.selections[category_id] = selections
+        else: self.selections.pop(category_id, None)
+
+    def set_wager(self, wager: t.Optional[int], category_id: str):
+        if wager is None: self.wagers.pop(category_id, None)
+        else: self.wagers[category_id] = wager
+
+    @classmethod
+    def from_doc(cls, user_id: str, doc_id: str, d: dict) -> t.Optional["WeeklyPicks"]:
+        eid = int_id(doc_id)
+        if eid is None: return None
+        picks = cls(user_id, eid)
+        for k, v in (d.get("categorySelections") or {}).items():
+            if uuid_string(k): picks.set_selections(v, uuid_string(k))
+        for k, v in (d.get("categoryWagers") or {}).items():
+            if uuid_string(k): picks.set_wager(v, uuid_string(k))
+        picks.is_submitted = bool(d.get("isSubmitted"))
+        return picks
+
+class SeasonData:
+    """One season's phases, results, users and weekly picks, decoded from flat snapshot entries."""
+    def __init__(self, season_id: str):
+        self.season_id = season_id; self.phases: t.List[Phase] = []; self.results: t.Dict[int, EpisodeResult] = {}
+        self.users: t.List[dict] = []; self.picks: t.Dict[str, t.Dict[int, WeeklyPicks]] = {}
+        self.activated_phase_ids: t.Set[str] = set()
+
+    @classmethod
+    def from_entries(cls, entries: t.Iterable[dict], season_id: str) -> "SeasonData":
+        season = cls(season_id); prefix = f"seasons/{season_id}/"; phases = []
+        for e in entries:
+            path = e["_path"]
+            if not path.startswith(prefix): continue
+            parts = path[len(prefix):].split("/"); fields = e.get("fields") or {}
+            if len(parts) == 2 and parts[0] == "phases":
+                phase = Phase.from_doc(parts[1], fields)
+                if phase: phases.append(phase)
+            elif len(parts) == 2 and parts[0] == "results":
+                result = EpisodeResult.from_doc(parts[1], fields)
+                if result: season.results[result.id] = result
+            elif len(parts) == 2 and parts[0] == "users":
+                if isinstance(fields.get("displayName"), str): season.users.append({"id": parts[1], "displayName": fields["displayName"]})
+            elif parts == ["state", "current"]:
+                season.activated_phase_ids = {u for u in map(uuid_string, fields.get("activatedPhaseIds") or []) if u}
+            elif len(parts) == 4 and parts[0] == "weeklyPicks" and parts[2] == "episodes":
+                picks = WeeklyPicks.from_doc(parts[1], parts[3], fields)
+                if picks: season.picks.setdefault(parts[1], {})[picks.episode_id] = picks
+        season.set_phases(phases); season.users.sort(key=lambda u: u["displayName"])
+        return season
+
+    def set_phases(self, phases: t.Iterable[Phase]):
+        """Phase order of the app: by sortIndex, phases without one last."""
+        self.phases = sorted(phases, key=lambda p: p.sort_index if p.sort_index is not None else float("inf"))
+
+def season_ids(entries: t.Iterable[dict]) -> t.List[str]:
+    return sorted({e["_path"].split("/")[1] for e in entries if e["_path"].startswith("seasons/") and e["_path"].count("/") == 1})
+
+# ---- scoring
+
+# one resolved category of an episode: (category id, column, kind, value, winners, eliminated)
+#   kind "wager": value = default wager;      "auto": value = points, eliminated = prior + this week's voted out
+#   kind "normal": value = points per hit
+_PlanItem = t.Tuple[str, str, str, t.Optional[int], t.FrozenSet[str], t.FrozenSet[str]]
+
+class ScoringEngine:
+    def __init__(self, results_by_episode: t.Dict[int, EpisodeResult]):
+        self.results_by_episode = results_by_episode
+        self._episode_ids = sorted(results_by_episode)
+        self._cumulative: t.List[t.FrozenSet[str]] = []  # eliminations up to and including _episode_ids[i]
+        running: t.Set[str] = set()
+        for eid in self._episode_ids:
+            running |= set(results_by_episode[eid].voted_out); self._cumulative.append(frozenset(running))
+
+    def prior_eliminations(self, episode_id: int) -> t.FrozenSet[str]:
+        """Everyone voted out in results with a lower episode id."""
+        i = bisect_left(self._episode_ids, episode_id)
+        return self._cumulative[i - 1] if i > 0 else frozenset()
+
+    def episode_plan(self, episode_id: int, phase_override: Phase=None, categories_by_id: t.Dict[str, Category]=None) -> t.Optional[t.List[_PlanItem]]:
+        """Everything score() derives from the episode alone; None when the episode has no result."""
+        result = self.results_by_episode.get(episode_id)
+        if result is None: return None
+        categories = phase_override.categories if phase_override is not None else list((categories_by_id or {}).values())
+        eliminated = self.prior_eliminations(episode_id) | frozenset(result.voted_out)
+        plan = []; seen = set()
+        for category in categories:
+            if category.id in seen: continue  # the first definition of an id wins, as in lookupCategory
+            seen.add(category.id)
+            column = normalized_column_id(category.column_id)
+            if not column: continue
+            winners = frozenset(result.category_winners.get(category.id, ()))
+            if category.uses_wager:
+                if winners: plan.append((category.id, column, "wager", category.wager_points, winners, frozenset()))
+                continue
+            points = category.points_per_correct_pick
+            if not points: continue
+            if category.auto_scores_remaining_contestants:
+                plan.append((category.id, column, "auto", points, frozenset(), eliminated))
+            elif winners:
+                plan.append((category.id, column, "normal", points, winners, frozenset()))
+        return plan
+
+    @staticmethod
+    def apply_plan(plan: t.Optional[t.List[_PlanItem]], weekly: WeeklyPicks) -> t.Dict[str, int]:
+        points: t.Dict[str, int] = {}
+        for cid, column, kind, value, winners, eliminated in plan or ():
+            selections = weekly.selections.get(cid)
+            if not selections: continue
+            if kind == "wager":
+                wager = weekly.wagers.get(cid, value)
+                if wager is None or wager <= 0: continue
+                points[column] = points.get(column, 0) + (wager if selections & winners else -wager)
+            elif kind == "auto":
+                remaining = len(selections - eliminated)
+                if remaining: points[column] = points.get(column, 0) + remaining * value
+            else:
+                hits = len(selections & winners)
+                if hits: points[column] = points.get(column, 0) + hits * value
+        return points
+
+    def score(self, weekly: WeeklyPicks, episode_id: int, phase_override: Phase=None, categories_by_id: t.Dict[str, Category]=None) -> t.Dict[str, int]:
+        """ScoringEngine.score(weekly:episode:phaseOverride:categoriesById:) -> categoryPointsByColumnId."""
+        return self.apply_plan(self.episode_plan(episode_id, phase_override, categories_by_id), weekly)
+
+def table_columns(season: SeasonData) -> t.List[dict]:
+    """TableView.makeDynamicColumns: one column per distinct columnId, in phase order."""
+    active = {normalized_column_id(c.column_id) for p in season.phases if p.id in season.activated_phase_ids for c in p.categories}
+    seen = {"WK", "PTS"}; columns = []
+    for phase in season.phases:
+        for category in phase.categories:
+            column = normalized_column_id(category.column_id)
+            if not column or column in seen: continue
+            seen.add(column)
+            columns.append({"id": column, "legend": category.name.strip() or "Custom scoring", "isActive": column in active})
+    return columns
+
+def season_plans(season: SeasonData, engine: ScoringEngine=None) -> t.Dict[int, t.List[_PlanItem]]:
+    """Plans of the episodes the table scores (those with recorded results), in episode order."""
+    engine = engine or ScoringEngine(season.results)
+    categories_by_id: t.Dict[str, Category] = {}
+    for c in (c for p in season.phases for c in p.categories): categories_by_id.setdefault(c.id, c)
+    phases_by_id = {p.id: p for p in season.phases}
+    scored = sorted(eid for eid, r in season.results.items() if r.has_recorded_results)
+    return {eid: engine.episode_plan(eid, phases_by_id.get(season.results[eid].phase_id), categories_by_id) for eid in scored}
+
+def rank_rows(rows: t.List[dict]) -> t.List[dict]:
+    """Rows arrive in displayName order; sort by total (ties keep that order) and number them."""
+    rows.sort(key=lambda r: -r["total"])
+    for rank, row in enumerate(rows, 1): row["rank"] = rank
+    return rows
+
+def build_leaderboard(season: SeasonData) -> dict:
+    engine = ScoringEngine(season.results)
+    plans = season_plans(season, engine); scored = list(plans)
+
+    rows = []
+    for user in season.users:
+        picks = season.picks.get(user["id"], {}); weeks = 0; totals: t.Dict[str, int] = {}; by_episode = {}
+        for eid in scored:
+            weekly = picks.get(eid)
+            if weekly is None: continue
+            weeks += 1
+            points = engine.apply_plan(plans[eid], weekly); by_episode[str(eid)] = points
+            for column, n in points.items(): totals[column] = totals.get(column, 0) + n
+        rows.append({"userId": user["id"], "displayName": user["displayName"], "total": sum(totals.values()),
+                     "weeksParticipated": weeks, "categoryPointsByColumnId": totals, "byEpisode": by_episode})
+    return {"_type": "leaderboard", "seasonId": season.season_id, "generatedAt": dt.datetime.utcnow().isoformat() + "Z",
+            "scoredEpisodes": scored, "columns": table_columns(season), "rows": rank_rows(rows)}
+
+# ---- sources
+
+def snapshot_entries(snap_dir: Path) -> t.List[dict]:
+    import snapshot_io
+    return list(snapshot_io.open_snapshot(snap_dir)[1])
+
+def firestore_entries(db, season_id: str) -> t.Iterator[dict]:
+    """The same documents the app listens to, as flat entries."""
+    season = db.collection("seasons").document(season_id)
+    for name in ("phases", "results", "users", "state"):
+        for doc in season.collection(name).stream():
+            yield {"_path": doc.reference.path, "fields": doc.to_dict() or {}}
+    prefix = f"seasons/{season_id}/weeklyPicks/"
+    for doc in db.collection_group("episodes").stream():
+        if doc.reference.path.startswith(prefix): yield {"_path": doc.reference.path, "fields": doc.to_dict() or {}}
+
+def print_leaderboard(board: dict, limit: int=LEADERBOARD_PREVIEW_ROWS):
+    columns = [c["id"] for c in board["columns"]]
+    print(f"{'#':>3} {'Name':<16} {'Pts':>5} {'Wk':>3} " + " ".join(f"{c:>4}" for c in columns))
+    for row in board["rows"][:limit]:
+        cells = " ".join(f"{row['categoryPointsByColumnId'].get(c, 0):>4}" for c in columns)
+        print(f"{row['rank']:>3} {row['displayName'][:16]:<16} {row['total']:>5} {row['weeksParticipated']:>3} {cells}")
+
+def choose_snapshot_dir(base_dir: Path) -> t.Optional[Path]:
+    dirs = [d for d in sorted(base_dir.iterdir()) if d.is_dir() and d.name.startswith("snapshot_")] if base_dir.exists() else []
+    if not dirs:
+        print("No snapshot folders found."); return None
+    for i, d in enumerate(dirs, 1): print(f"  {i}) {d.name}")
+    try:
+        return dirs[int(input("Select snapshot number: ").strip()) - 1]
+    except Exception:
+        print("Invalid selection."); return None
+
+def choose_season(ids: t.List[str]) -> t.Optional[str]:
+    if not ids:
+        print("No seasons found."); return None
+    if len(ids) == 1: return ids[0]
+    season_id = input(f"Season id {ids}: ").strip()
+    return season_id if season_id in ids else None
+
+def main():
+    base_dir = Path(SNAPSHOTS_ROOT)
+    print("\n=== Scoring Engine ===")
+    print("1) Score a season from a snapshot folder")
+    print("2) Score a season from the live project")
+    choice = input("Choose source [1-2]: ").strip()
+    if choice == "1":
+        snap_dir = choose_snapshot_dir(base_dir)
+        if not snap_dir: return
+        entries = snapshot_entries(snap_dir); season_id = choose_season(season_ids(entries)); out_dir = snap_dir
+        if not season_id: return
+    elif choice == "2":
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps: firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+        db = firestore.client()
+        season_id = choose_season(sorted(d.id for d in db.collection("seasons").stream()))
+        if not season_id: return
+        entries = firestore_entries(db, season_id); out_dir = base_dir / "leaderboards"
+    else:
+        print("Unknown choice."); return
+
+    board = build_leaderboard(SeasonData.from_entries(entries, season_id))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"leaderboard_{season_id}.json"
+    out.write_text(json.dumps(board, indent=2), encoding="utf-8")
+    print_leaderboard(board)
+    print(f"\n{len(board['rows'])} users x {len(board['scoredEpisodes'])} episodes scored; leaderboard saved to {out}\n")
+
+if __name__ == "__main__":
+    main()
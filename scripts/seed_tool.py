@@ -1,64 +1,194 @@
 #!/usr/bin/env python3
-import base64, datetime as dt, json, os
+import base64, datetime as dt, hashlib, json
 from pathlib import Path
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 
 CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
 PROJECT_ID = "survivus1514"
 SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
 DEFAULT_BUCKET = f"{PROJECT_ID}.firebasestorage.app"
 DEFAULT_PREFIXES = ["users/", "contestants/"]
+RESTORE_MAX_IN_FLIGHT = 8    # concurrent batch commits while restoring
+RESTORE_RAMP_UP = True       # honour the 500/50/5 write ramp-up; turn off for the emulator / fake
+FAKE_RPC_LATENCY = 0.05      # seconds per RPC when seeding into fake_firestore for measurement
+WIPE_MAX_WORKERS = 8         # concurrent listing queries while planning a wipe
+WIPE_COLLECTION_GROUPS = ["episodes", "results", "phases", "users", "weeklyPicks", "state"]
+DIFF_FETCH_CHUNK = 300       # documents per batchGetDocuments call while diffing against the target
+PROFILE_RUNS = True          # write seed_profile.json (timings, RPCs, bytes, billable ops) into the snapshot folder
+PROFILE_CPROFILE = False     # also dump profile.pstats (cProfile of the main thread)
+SEED_PROFILE_NAME = "seed_profile.json"
+VALIDATE_SCHEMAS = True      # check known documents against the app's payload schemas while decoding (firestore_codec)
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+import firestore_codec, firestore_paths, instrumentation, snapshot_io, storage_transfer
+from firestore_bulk import BulkWritePipeline
+from snapshot_shards import ShardedSnapshotReader, in_scopes, selection_scopes
+
 try:
     from google.cloud import storage as gcs
     HAS_GCS = True
 except Exception:
     HAS_GCS = False
 
-def _parse_timestamp(iso: str) -> dt.datetime:
-    if iso.endswith("Z"):
-        iso2 = iso[:-1]; return dt.datetime.fromisoformat(iso2).replace(tzinfo=dt.timezone.utc)
-    return dt.datetime.fromisoformat(iso)
-
-def _deserialize_value(v, db):
-    if isinstance(v, dict) and "_type" in v:
-        tname = v.get("_type")
-        if tname == "timestamp": return _parse_timestamp(v["iso"])
-        if tname == "bytes": return base64.b64decode(v["base64"])
-        if tname == "docref": return db.document(v["path"])
-        if tname == "geopoint":
-            try:
-                from google.cloud.firestore_v1 import GeoPoint
-            except Exception:
-                class GeoPoint:
-                    def __init__(self, latitude, longitude): self.latitude = latitude; self.longitude = longitude
-            return GeoPoint(v["lat"], v["lon"])
-        return v
-    if isinstance(v, list): return [_deserialize_value(x, db) for x in v]
-    if isinstance(v, dict): return {k: _deserialize_value(x, db) for k, x in v.items()}
+def _iso(ts) -> t.Optional[str]:
+    return ts.isoformat() if hasattr(ts, "isoformat") else None
+
+def _canonical_value(v):
+    """Deserialized Firestore value -> JSON-able form that is equal iff the values are."""
+    if isinstance(v, dt.datetime):
+        if v.tzinfo is not None: v = v.astimezone(dt.timezone.utc).replace(tzinfo=None)
+        return {"~ts": v.isoformat(timespec="microseconds")}
+    if isinstance(v, bytes): return {"~b": base64.b64encode(v).decode("ascii")}
+    if hasattr(v, "latitude") and hasattr(v, "longitude"): return {"~geo": [float(v.latitude), float(v.longitude)]}
+    if hasattr(v, "path") and hasattr(v, "parent"): return {"~ref": v.path}
+    if isinstance(v, (list, tuple)): return [_canonical_value(x) for x in v]
+    if isinstance(v, dict): return {k: _canonical_value(x) for k, x in v.items()}
     return v
 
-def _delete_collection_recursive(db, col_ref, batch_size=500):
-    docs = list(col_ref.limit(batch_size).stream())
-    while docs:
-        batch = db.batch()
-        for d in docs:
-            for sub in d.reference.collections(): _delete_collection_recursive(db, sub, batch_size)
-            batch.delete(d.reference)
-        batch.commit()
-        docs = list(col_ref.limit(batch_size).stream())
-
-def _restore_doc(db, entry: dict):
-    ref = db.document(entry["_path"])
-    fields = _deserialize_value(entry.get("fields", {}), db)
-    ref.set(fields)
-    for sub in entry.get("_subcollections", []) or []: _restore_collection(db, sub)
-
-def _restore_collection(db, col_dump: dict):
-    for doc_entry in col_dump.get("documents", []) or []: _restore_doc(db, doc_entry)
+def _fields_hash(fields: dict) -> str:
+    return hashlib.sha256(json.dumps(_canonical_value(fields), sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def _collection_template(doc_path: str) -> str:
+    """seasons/s1/weeklyPicks/u1/episodes/3 -> seasons/*/weeklyPicks/*/episodes"""
+    parts = doc_path.split("/")[:-1]
+    return "/".join("*" if i % 2 else p for i, p in enumerate(parts))
+
+def _list_tree(db, root_names: t.Iterable[str], max_workers: int=WIPE_MAX_WORKERS, scopes: t.Optional[t.List[str]]=None) -> t.Dict[str, t.Optional[str]]:
+    """
+    {path: update time} for every document under the given root collections,
+    enumerated with name-only queries: root documents are listed directly, everything
+    deeper comes from collection-group queries, one per subcollection id and root
+    document, each held to that document's subtree by a __name__ range
+    (firestore_paths.under_document), so documents outside the roots / scopes are
+    never read. Subcollection ids are learned from root documents, from every document
+    of a group outside WIPE_COLLECTION_GROUPS, and from the first document of each
+    collection template of a known group (seasons/*/phases, ...): one listCollectionIds
+    call per template instead of one per document. A collection that only exists below
+    other documents of a known group is therefore not found; add its id to
+    WIPE_COLLECTION_GROUPS. `scopes` (document-path prefixes, see
+    snapshot_shards.selection_scopes) narrows the result.
+    """
+    roots = set(root_names); known = set(WIPE_COLLECTION_GROUPS)
+    name_only = lambda q: list(q.select(["__name__"]).stream())
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        paths = {d.reference.path: _iso(d.update_time) for docs in pool.map(lambda n: name_only(db.collection(n)), sorted(roots)) for d in docs}
+        if scopes is None:  # list_documents includes missing root documents that still own subcollections
+            anchors = sorted({r.path for refs in pool.map(lambda n: list(db.collection(n).list_documents()), sorted(roots)) for r in refs})
+        else:
+            anchors = sorted({"/".join(s.split("/")[:2]) for s in scopes if s.split("/", 1)[0] in roots})
+        to_probe = [db.document(a) for a in anchors]
+        groups, queried, sampled = set(known), set(), set()
+        while True:
+            for subs in pool.map(lambda ref: [c.id for c in ref.collections()], to_probe): groups.update(subs)
+            pending = sorted(groups - queried)
+            if not pending: break
+            queried.update(pending); to_probe = []
+            jobs = [(g, a) for g in pending for a in anchors]
+            found = pool.map(lambda job: name_only(firestore_paths.under_document(db.collection_group(job[0]), db, job[1])), jobs)
+            for (g, _), docs in zip(jobs, found):
+                for d in docs:
+                    paths[d.reference.path] = _iso(d.update_time)
+                    template = _collection_template(d.reference.path)
+                    if g not in known or template not in sampled: sampled.add(template); to_probe.append(d.reference)
+    return {p: ut for p, ut in paths.items() if in_scopes(p, scopes)}
+
+def plan_wipe(db, root_names: t.Iterable[str], max_workers: int=WIPE_MAX_WORKERS, scopes: t.Optional[t.List[str]]=None) -> t.List[str]:
+    """Every document path under the given root collections (see _list_tree)."""
+    return sorted(_list_tree(db, root_names, max_workers, scopes))
+
+def _delete_leaves_first(pipe: BulkWritePipeline, db, paths: t.Iterable[str]):
+    by_depth: t.Dict[int, t.List[str]] = {}
+    for p in paths: by_depth.setdefault(p.count("/"), []).append(p)
+    for depth in sorted(by_depth, reverse=True):
+        for p in by_depth[depth]: pipe.delete(db.document(p))
+        pipe.flush()  # a level is gone before its parents are touched
+
+def wipe_collections(db, root_names: t.Iterable[str], dry_run: bool=False, max_in_flight: int=RESTORE_MAX_IN_FLIGHT, ramp_up: bool=RESTORE_RAMP_UP,
+                     scopes: t.Optional[t.List[str]]=None) -> dict:
+    """
+    Delete everything under the given root collections, deepest documents first,
+    through pipelined batched deletes. Report shape follows _clear_bucket_prefixes:
+    {"deleted": {collection template: n}, "errors": [...]}; dry_run only counts.
+    With `scopes` only documents under those paths are deleted.
+    """
+    paths = plan_wipe(db, root_names, scopes=scopes)
+    planned: t.Dict[str, int] = {}
+    for p in paths: planned[_collection_template(p)] = planned.get(_collection_template(p), 0) + 1
+    report = {"deleted": planned, "errors": [], "dryRun": dry_run}
+    if dry_run or not paths: return report
+
+    with BulkWritePipeline(db, max_in_flight=max_in_flight, ramp_up=ramp_up) as pipe:
+        _delete_leaves_first(pipe, db, paths)
+    for err in pipe.errors:
+        for p in err.pop("paths"): planned[_collection_template(p)] -= 1
+        report["errors"].append(err)
+    report["stats"] = pipe.stats
+    return report
+
+def restore_documents(db, entries: t.Iterable[dict], max_in_flight: int=RESTORE_MAX_IN_FLIGHT, ramp_up: bool=RESTORE_RAMP_UP) -> dict:
+    """
+    Write flat snapshot entries (subcollections arrive as their own entries from
+    snapshot_io.open_snapshot) through batched, pipelined commits. Returns the
+    pipeline stats: written, batches, retries, failed, seconds, docsPerSec.
+    """
+    with BulkWritePipeline(db, max_in_flight=max_in_flight, ramp_up=ramp_up) as pipe:
+        for entry in entries:
+            with instrumentation.timer("deserialize"): fields = firestore_codec.decode_fields(entry["_path"], entry.get("fields", {}), db)
+            pipe.set(db.document(entry["_path"]), fields)
+    for err in pipe.errors[:5]: print(f"  Failed batch at {err['firstPath']} ({err['count']} docs): {err['error']}")
+    return pipe.stats
+
+def plan_diff(db, entries: t.Iterable[dict], root_names: t.Iterable[str], max_workers: int=WIPE_MAX_WORKERS, scopes: t.Optional[t.List[str]]=None) -> dict:
+    """
+    Compare snapshot entries with what the target holds under `root_names`.
+    Documents whose update time still equals the snapshot's were not written since
+    and are taken as unchanged; the rest are batch-read and compared by a stable
+    hash of their deserialized fields. Returns {"create", "update", "delete": [paths],
+    "unchanged": n, "fields": {path: serialized fields to write}}. With `scopes`
+    documents outside those paths are neither compared nor deleted.
+    """
+    want = {e["_path"]: e for e in entries}
+    have = _list_tree(db, root_names, max_workers, scopes)
+    to_read = [p for p, ut in have.items() if p in want and (ut is None or ut != want[p].get("_updateTime"))]
+    read_set = set(to_read)
+    chunks = [to_read[i:i + DIFF_FETCH_CHUNK] for i in range(0, len(to_read), DIFF_FETCH_CHUNK)]
+
+    def read(chunk):
+        return [(s.reference.path, _fields_hash(s.to_dict() or {})) for s in db.get_all([db.document(p) for p in chunk]) if s.exists]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        target_hashes = dict(h for hashes in pool.map(read, chunks) for h in hashes)
+
+    plan = {"create": [], "update": [], "delete": sorted(p for p in have if p not in want), "unchanged": 0, "reads": len(to_read)}
+    for p, e in want.items():
+        if p not in have or (p in read_set and p not in target_hashes): plan["create"].append(p)
+        elif p in target_hashes and target_hashes[p] != _fields_hash(firestore_codec.decode_fields(p, e.get("fields", {}), db)): plan["update"].append(p)
+        else: plan["unchanged"] += 1
+    plan["fields"] = {p: want[p].get("fields", {}) for p in plan["create"] + plan["update"]}
+    return plan
+
+def _print_diff_preview(plan: dict, samples: int=5):
+    print(f"Planned changes: +{len(plan['create'])} create, ~{len(plan['update'])} update, -{len(plan['delete'])} delete, "
+          f"{plan['unchanged']} unchanged ({plan['reads']} docs read to compare)")
+    for kind in ("create", "update", "delete"):
+        paths = plan[kind]
+        if not paths: continue
+        by_col: t.Dict[str, int] = {}
+        for p in paths: by_col[_collection_template(p)] = by_col.get(_collection_template(p), 0) + 1
+        print(f"  {kind}:")
+        for col, n in sorted(by_col.items()): print(f"    {n:>5}  {col}")
+        for p in paths[:samples]: print(f"           e.g. {p}")
+
+def apply_diff(db, plan: dict, max_in_flight: int=RESTORE_MAX_IN_FLIGHT, ramp_up: bool=RESTORE_RAMP_UP) -> dict:
+    """Write creates/updates, then delete extra documents leaves-first; returns pipeline stats."""
+    with BulkWritePipeline(db, max_in_flight=max_in_flight, ramp_up=ramp_up) as pipe:
+        for p in plan["create"] + plan["update"]: pipe.set(db.document(p), firestore_codec.decode_fields(p, plan["fields"][p], db))
+        pipe.flush()
+        _delete_leaves_first(pipe, db, plan["delete"])
+    for err in pipe.errors[:5]: print(f"  Failed batch at {err['firstPath']} ({err['count']} docs): {err['error']}")
+    return pipe.stats
 
 def prefix_dir_name(prefix: str) -> str:
     p = prefix.strip("/")
@@ -66,21 +196,6 @@ def prefix_dir_name(prefix: str) -> str:
     if p == "contestants": return "contestants_avatars"
     return p if p else "root"
 
-def compute_metrics_from_snapshot(snap: dict) -> dict:
-    fs = snap.get("firestore") or {}
-    def _walk(col_dump):
-        for d in col_dump.get("documents", []) or []:
-            yield d
-            for sub in d.get("_subcollections", []) or []:
-                for x in _walk(sub): yield x
-    results = weekly_picks = 0
-    for col in fs.get("rootCollections", []):
-        for d in _walk(col):
-            p = d.get("_path", "")
-            if "/results/" in p: results += 1
-            if "/weeklyPicks/" in p and "/episodes/" in p: weekly_picks += 1
-    return {"results": results, "weeklyPicks": weekly_picks}
-
 def _clear_bucket_prefixes(client, bucket, prefixes: t.List[str]) -> dict:
     report = {"cleared": {}, "errors": []}
     for pfx in prefixes:
@@ -103,59 +218,107 @@ def _print_snapshot_summary(snap_dir: Path):
         print(summary.read_text(encoding="utf-8"))
         print("------------------------\n")
 
-def seed_from_snapshot_folder(credentials_path: str, project_id: str, snapshot_folder: Path, only_seasons: bool, wipe_before: bool=True, seed_storage: bool=False, clear_storage_prefixes: bool=False):
+def firestore_client(credentials_path: str, project_id: str):
+    """Live project client; set FIRESTORE_EMULATOR_HOST to point it at the emulator instead."""
     cred = credentials.Certificate(credentials_path)
     if not firebase_admin._apps: firebase_admin.initialize_app(cred, {"projectId": project_id} if project_id else None)
-    db = firestore.client()
+    return firestore.client()
+
+def seed_from_snapshot_folder(credentials_path: str, project_id: str, snapshot_folder: Path, only_seasons: bool, wipe_before: bool=True, seed_storage: bool=False, clear_storage_prefixes: bool=False, db=None, diff_apply: bool=False,
+                              seasons: t.Optional[t.List[str]]=None, users: t.Optional[t.List[str]]=None, ramp_up: bool=RESTORE_RAMP_UP):
+    """
+    Pass `db` (e.g. a fake_firestore.FakeFirestore, with ramp_up=False) to seed something other than the live project.
+    With `diff_apply` nothing is wiped: only documents that differ from the snapshot are
+    created, overwritten or deleted, after a preview and confirmation.
+    `seasons` restores (and wipes / diffs) only seasons/{id} for those ids; `users` narrows
+    that further to those users' weekly picks. Sharded snapshots read only the matching shards.
+    """
+    db = instrumentation.instrument_firestore(db or firestore_client(credentials_path, project_id))
 
     _print_snapshot_summary(snapshot_folder)
 
-    snap = json.loads((snapshot_folder / "snapshot.json").read_text(encoding="utf-8"))
-    metrics = snap.get("metrics") or compute_metrics_from_snapshot(snap)
+    # snapshot.json is parsed whole; .ndjson / .msgpack are streamed document by document, shards/ per selected file
+    meta, documents = snapshot_io.open_snapshot(snapshot_folder, native=True, seasons=seasons, users=users)
+    scopes = selection_scopes(seasons, users)
+    metrics = meta.get("metrics") or {}
     if metrics.get("results", 0) > 0 and metrics.get("weeklyPicks", 0) == 0:
         print("WARNING: Snapshot contains results but no weekly picks; VO/IM/RM scoring cannot be rebuilt from this snapshot.")
         if not input("Proceed with seeding anyway? [y/N]: ").strip().lower().startswith("y"): return
 
-    fs = snap.get("firestore") or {}
-    roots = fs.get("rootCollections", [])
-
     target_col_names = set()
-    for col in roots:
-        name = col.get("_collection", "").split("/")[0]
-        if only_seasons and name != "seasons": continue
+    for name in meta.get("rootCollections", []):
+        if (only_seasons or scopes) and name != "seasons": continue
         target_col_names.add(name)
 
-    if wipe_before:
-        for col_name in target_col_names:
-            print(f"Deleting collection: {col_name} ..."); _delete_collection_recursive(db, db.collection(col_name))
-
-    for col in roots:
-        name = col.get("_collection", "").split("/")[0]
-        if only_seasons and name != "seasons": continue
-        _restore_collection(db, col)
+    if diff_apply:
+        started = dt.datetime.now()
+        with instrumentation.phase("diff"):
+            plan = plan_diff(db, (e for e in documents if e["_path"].split("/", 1)[0] in target_col_names), target_col_names, scopes=scopes)
+        _print_diff_preview(plan)
+        if not (plan["create"] or plan["update"] or plan["delete"]):
+            print("Target already matches the snapshot; nothing to do.")
+        elif input("Apply these changes? [y/N]: ").strip().lower().startswith("y"):
+            with instrumentation.phase("apply"): stats = apply_diff(db, plan, ramp_up=ramp_up)
+            print(f"Applied {stats['written']} writes in {(dt.datetime.now() - started).total_seconds():.2f}s "
+                  f"({stats['batches']} batches, {stats['retries']} retries, {stats['failed']} failed)")
+        else:
+            print("Diff not applied.")
+    elif wipe_before:
+        print(f"Deleting collections: {scopes or sorted(target_col_names)} ...")
+        with instrumentation.phase("wipe"): wipe_report = wipe_collections(db, target_col_names, ramp_up=ramp_up, scopes=scopes)
+        for col, n in sorted(wipe_report["deleted"].items()): print(f"  Deleted {n} docs from {col}")
+        if wipe_report["errors"]: print(f"  Errors while deleting ({len(wipe_report['errors'])})")
 
-    print(f"Seeded Firestore collections: {sorted(target_col_names)}")
+    if not diff_apply:
+        with instrumentation.phase("restore"):
+            stats = restore_documents(db, (e for e in documents if e["_path"].split("/", 1)[0] in target_col_names), ramp_up=ramp_up)
+        print(f"Seeded Firestore collections: {scopes or sorted(target_col_names)}")
+        print(f"  {stats['written']} docs in {stats['seconds']}s ({stats['docsPerSec']} docs/sec, {stats['batches']} batches, "
+              f"{stats['retries']} retries, {stats['failed']} failed)")
 
     if seed_storage and HAS_GCS:
-        client = gcs.Client.from_service_account_json(credentials_path); bucket = client.bucket(DEFAULT_BUCKET)
-        if clear_storage_prefixes:
-            print("Clearing bucket prefixes before upload...")
-            clear_report = _clear_bucket_prefixes(client, bucket, DEFAULT_PREFIXES)
-            for pfx, n in clear_report.get("cleared", {}).items(): print(f"  Cleared {n} objects under prefix '{pfx}'")
-            if clear_report.get("errors"): print(f"  Errors while clearing ({len(clear_report['errors'])})")
-        uploaded = 0
-        for pfx in DEFAULT_PREFIXES:
-            folder = snapshot_folder / prefix_dir_name(pfx)
-            if not folder.exists(): continue
-            for fname in os.listdir(folder):
-                src = folder / fname
-                if not src.is_file(): continue
-            blob_name = f"{pfx}{fname}"; bucket.blob(blob_name).upload_from_filename(str(src)); uploaded += 1
-        print(f"Uploaded {uploaded} Storage files to {bucket.name}")
+        client = instrumentation.instrument_storage(gcs.Client.from_service_account_json(credentials_path)); bucket = client.bucket(DEFAULT_BUCKET)
+        with instrumentation.phase("storage"):
+            if clear_storage_prefixes:
+                print("Clearing bucket prefixes before upload...")
+                clear_report = _clear_bucket_prefixes(client, bucket, DEFAULT_PREFIXES)
+                for pfx, n in clear_report.get("cleared", {}).items(): print(f"  Cleared {n} objects under prefix '{pfx}'")
+                if clear_report.get("errors"): print(f"  Errors while clearing ({len(clear_report['errors'])})")
+            uploaded = skipped = 0
+            for pfx in DEFAULT_PREFIXES:
+                folder = snapshot_folder / prefix_dir_name(pfx)
+                if not folder.exists(): continue
+                r = storage_transfer.upload_folder(client, bucket, folder, pfx, snapshot_folder)
+                uploaded += r["uploaded"]; skipped += r["skipped"]
+                for err in r["errors"][:5]: print(f"  Failed to upload {err['name']}: {err['error']}")
+        print(f"Uploaded {uploaded} Storage files to {bucket.name} ({skipped} already up to date)")
 
     elif seed_storage and not HAS_GCS:
         print("google-cloud-storage not installed; skipping Storage upload.")
 
+def _profiled_seed(snapshot_folder: Path, **kwargs):
+    """seed_from_snapshot_folder, with the run's profile saved next to the snapshot as seed_profile.json."""
+    with instrumentation.profiling(PROFILE_RUNS, PROFILE_CPROFILE) as prof, firestore_codec.validating(VALIDATE_SCHEMAS) as schema:
+        seed_from_snapshot_folder(CREDENTIALS_PATH, PROJECT_ID, snapshot_folder, **kwargs)
+    if schema and schema.failed:
+        print(f"Schema check: {sum(schema.failed.values())} seeded documents do not match the app's payload types (the app will skip them)")
+        for sample in schema.samples[:5]: print(f"  {sample}")
+    if prof:
+        out = prof.save(snapshot_folder, SEED_PROFILE_NAME, summary=False)
+        for line in prof.summary_lines(name=SEED_PROFILE_NAME)[2:-1]: print(line)
+        print(f"Profile saved to {out}")
+
+def _choose_selection(snapshot_folder: Path) -> t.Tuple[t.Optional[t.List[str]], t.Optional[t.List[str]]]:
+    """(seasons, users) to restore; blank answers mean everything. Sharded snapshots list what they hold."""
+    sharded = "shards" in snapshot_io.available_formats(snapshot_folder)
+    reader = ShardedSnapshotReader(snapshot_folder) if sharded else None
+    if reader: print(f"Seasons in snapshot: {', '.join(reader.seasons()) or '(none)'}")
+    season = input("Seed only one season (id, blank = all): ").strip()
+    if not season: return None, None
+    if reader: print(f"{len(reader.users(season))} users have weekly-pick shards in {season}")
+    users = [u.strip() for u in input("Seed only these users' weekly picks (comma-separated ids, blank = whole season): ").split(",") if u.strip()]
+    return [season], users or None
+
 def main():
     base_dir = Path(SNAPSHOTS_ROOT); base_dir.mkdir(parents=True, exist_ok=True)
     dirs = [d for d in sorted(base_dir.iterdir()) if d.is_dir() and d.name.startswith("snapshot_")]
@@ -172,14 +335,29 @@ def main():
         print("Invalid selection."); return
 
     only = input("Seed only 'seasons' collection? [y/N]: ").strip().lower().startswith('y')
+    seasons, users = _choose_selection(chosen)
+    sel = {"seasons": seasons, "users": users}
+    if input("Seed into an in-process fake Firestore instead (measures the restore, touches nothing)? [y/N]: ").strip().lower().startswith('y'):
+        from fake_firestore import FakeFirestore
+        fake = FakeFirestore(latency=FAKE_RPC_LATENCY)
+        _profiled_seed(chosen, only_seasons=only, db=fake, ramp_up=False, **sel)
+        print(f"Fake RPCs: {fake.rpcs}"); return
+    if input("Diff-apply (write only documents that differ from the snapshot, no wipe)? [y/N]: ").strip().lower().startswith('y'):
+        _profiled_seed(chosen, only_seasons=only, wipe_before=False, diff_apply=True, **sel)
+        print(f"\nDiff-apply finished for {chosen}\n"); return
     both = input("Also seed Storage files (upload) if present? [y/N]: ").strip().lower().startswith('y')
     clear = False
     if both: clear = input("Clear bucket prefixes ('users/', 'contestants/') before upload? [y/N]: ").strip().lower().startswith('y')
 
+    if input("Preview how many documents the wipe would delete? [y/N]: ").strip().lower().startswith('y'):
+        roots = [n for n in snapshot_io.open_snapshot(chosen)[0].get("rootCollections", []) if not (only or seasons) or n == "seasons"]
+        preview = wipe_collections(firestore_client(CREDENTIALS_PATH, PROJECT_ID), roots, dry_run=True, scopes=selection_scopes(seasons, users))
+        for col, n in sorted(preview["deleted"].items()): print(f"  Would delete {n} docs from {col}")
+
     print("\\n*** DANGER ZONE *** This will DELETE targeted Firestore collections before seeding.")
     if input("Type 'DELETE' to confirm: ").strip() != "DELETE": print("Aborted."); return
 
-    seed_from_snapshot_folder(CREDENTIALS_PATH, PROJECT_ID, chosen, only_seasons=only, wipe_before=True, seed_storage=both, clear_storage_prefixes=clear)
+    _profiled_seed(chosen, only_seasons=only, wipe_before=True, seed_storage=both, clear_storage_prefixes=clear, **sel)
     print(f"\\nSeeding complete from {chosen}\\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+snapshot_index.sqlite: a local SQLite index of one snapshot folder, for ad-hoc
+questions that would otherwise need another full pass over the snapshot.
+
+    documents(path, collection, parent, doc_id, season, user, episode, create_time, update_time, fields)
+        collection is the template (seasons/*/weeklyPicks/*/episodes), season / user /
+        episode are parsed from the path, fields is the document's JSON (typed values in
+        their {"_type": ...} form), so json_extract() works on it.
+    fields(path, name, type, value)
+        one row per top-level field; type is the Firestore value type, value the scalar
+        (maps and arrays as JSON text).
+    meta(key, value)
+        snapshot meta plus the source signature the index was built from.
+
+The index is rebuilt when the snapshot files change. QUERIES holds the prebuilt
+questions (missing picks, results without picks, pick counts, ...); any other
+SQL can be run against the same connection.
+"""
+import json, sqlite3, time, typing as t
+from pathlib import Path
+
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+INDEX_NAME = "snapshot_index.sqlite"
+INDEX_SCHEMA_VERSION = 1
+INSERT_CHUNK = 5000  # rows per executemany while loading
+
+import snapshot_io
+from instrumentation import collection_template
+from scoring_engine import choose_snapshot_dir
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE documents (
+    path TEXT PRIMARY KEY, collection TEXT NOT NULL, parent TEXT, doc_id TEXT NOT NULL,
+    season TEXT, user TEXT, episode INTEGER, create_time TEXT, update_time TEXT, fields TEXT NOT NULL
+);
+CREATE TABLE fields (path TEXT NOT NULL, name TEXT NOT NULL, type TEXT NOT NULL, value, PRIMARY KEY (path, name));
+"""
+_INDEXES = """
+CREATE INDEX documents_collection ON documents (collection);
+CREATE INDEX documents_season ON documents (season, collection);
+CREATE INDEX documents_user ON documents (season, user);
+CREATE INDEX documents_episode ON documents (season, episode);
+CREATE INDEX fields_name ON fields (name, value);
+"""
+
+PICKS = "seasons/*/weeklyPicks/*/episodes"
+USERS = "seasons/*/users"
+RESULTS = "seasons/*/results"
+
+# name -> (description, SQL). Named parameters are asked for by main().
+QUERIES: t.Dict[str, t.Tuple[str, str]] = {
+    "collection_counts": ("Documents per collection template",
+        "SELECT collection, COUNT(*) AS documents FROM documents GROUP BY collection ORDER BY collection"),
+    "results_without_picks": ("Scored episodes with no weekly picks (the VO/IM/RM warning, per episode)",
+        f"""SELECT r.season, r.episode FROM documents r
+            WHERE r.collection = '{RESULTS}' AND NOT EXISTS (
+                SELECT 1 FROM documents p WHERE p.collection = '{PICKS}' AND p.season = r.season AND p.episode = r.episode)
+            ORDER BY r.season, r.episode"""),
+    "missing_picks": ("Users with no picks for an episode",
+        f"""SELECT u.season, u.user, json_extract(u.fields, '$.displayName') AS displayName FROM documents u
+            WHERE u.collection = '{USERS}' AND u.season = :season AND NOT EXISTS (
+                SELECT 1 FROM documents p WHERE p.collection = '{PICKS}' AND p.season = u.season AND p.user = u.user AND p.episode = :episode)
+            ORDER BY u.user"""),
+    "pick_counts": ("Weekly-pick documents per user (submitted / total)",
+        f"""SELECT season, user, SUM(COALESCE(json_extract(fields, '$.isSubmitted'), 0)) AS submitted, COUNT(*) AS picks,
+                   MIN(episode) AS firstEpisode, MAX(episode) AS lastEpisode
+            FROM documents WHERE collection = '{PICKS}' GROUP BY season, user ORDER BY season, picks DESC, user"""),
+    "picks_without_user": ("Weekly picks whose seasons/{id}/users/{uid} document is missing",
+        f"""SELECT p.season, p.user, COUNT(*) AS picks FROM documents p
+            WHERE p.collection = '{PICKS}' AND NOT EXISTS (
+                SELECT 1 FROM documents u WHERE u.collection = '{USERS}' AND u.season = p.season AND u.user = p.user)
+            GROUP BY p.season, p.user ORDER BY p.season, p.user"""),
+}
+
+def path_keys(path: str) -> t.Tuple[t.Optional[str], t.Optional[str], t.Optional[int]]:
+    """(season, user, episode) parsed from a document path; None where the path has no such part."""
+    parts = path.split("/")
+    season = parts[1] if parts[0] == "seasons" and len(parts) > 1 else None
+    user = episode = None
+    for col, doc in zip(parts[2::2], parts[3::2]):
+        if col in ("weeklyPicks", "users"): user = doc
+        elif col in ("episodes", "results") and doc.isdigit(): episode = int(doc)
+    return season, user, episode
+
+def _field_row(path: str, name: str, value) -> tuple:
+    if isinstance(value, dict) and "_type" in value:
+        kind = value["_type"]; scalar = value.get("iso") if kind == "timestamp" else json.dumps(value, separators=(",", ":"))
+    elif isinstance(value, dict): kind, scalar = "map", json.dumps(value, separators=(",", ":"))
+    elif isinstance(value, list): kind, scalar = "array", json.dumps(value, separators=(",", ":"))
+    elif isinstance(value, bool): kind, scalar = "boolean", int(value)
+    elif isinstance(value, int): kind, scalar = "integer", value
+    elif isinstance(value, float): kind, scalar = "double", value
+    elif value is None: kind, scalar = "null", None
+    else: kind, scalar = "string", str(value)
+    return path, name, kind, scalar
+
+def source_signature(folder: Path, fmt: str) -> str:
+    """Format plus size and mtime of the files it is read from; a change means the index is stale."""
+    main = folder / snapshot_io.FORMAT_FILES[fmt]
+    files = [main] + (sorted((folder / snapshot_io.SHARDS_DIR).rglob("*.ndjson")) if fmt == "shards" else [])
+    return json.dumps([fmt] + [[str(p.relative_to(folder)), p.stat().st_size, p.stat().st_mtime_ns] for p in files if p.exists()])
+
+def _read_meta(conn: sqlite3.Connection) -> dict:
+    return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+
+def build_index(folder: Path, fmt: str=None, out: Path=None) -> dict:
+    """(Re)build the index from the snapshot; returns {"path", "documents", "fields", "seconds"}."""
+    fmt = fmt or snapshot_io.snapshot_format(folder); out = out or folder / INDEX_NAME
+    started = time.perf_counter()
+    tmp = out.with_name(out.name + ".part")
+    if tmp.exists(): tmp.unlink()
+    meta, documents = snapshot_io.open_snapshot(folder, fmt)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+        docs, fields, n_docs, n_fields = [], [], 0, 0
+        def flush():
+            conn.executemany("INSERT OR REPLACE INTO documents VALUES (?,?,?,?,?,?,?,?,?,?)", docs)
+            conn.executemany("INSERT OR REPLACE INTO fields VALUES (?,?,?,?)", fields)
+            docs.clear(); fields.clear()
+        for e in documents:
+            path = e["_path"]; values = e.get("fields") or {}
+            col_path, doc_id = path.rsplit("/", 1)
+            parent = col_path.rsplit("/", 1)[0] if "/" in col_path else None
+            docs.append((path, collection_template(col_path), parent, doc_id, *path_keys(path), e.get("_createTime"), e.get("_updateTime"),
+                         json.dumps(values, separators=(",", ":"))))
+            fields.extend(_field_row(path, k, v) for k, v in values.items())
+            n_docs += 1; n_fields += len(values)
+            if len(docs) >= INSERT_CHUNK: flush()
+        flush()
+        conn.executescript(_INDEXES)
+        meta = {**meta, "indexSchemaVersion": INDEX_SCHEMA_VERSION, "sourceFormat": fmt, "sourceSignature": source_signature(folder, fmt)}
+        conn.executemany("INSERT INTO meta VALUES (?,?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    tmp.replace(out)
+    return {"path": out, "documents": n_docs, "fields": n_fields, "seconds": round(time.perf_counter() - started, 3)}
+
+def open_index(folder: Path, fmt: str=None, rebuild: bool=False) -> sqlite3.Connection:
+    """Connection to the folder's index, building it first if it is missing or stale."""
+    fmt = fmt or snapshot_io.snapshot_format(folder); path = folder / INDEX_NAME
+    if path.exists() and not rebuild:
+        conn = sqlite3.connect(path)
+        try:
+            meta = _read_meta(conn)
+            if meta.get("indexSchemaVersion") == INDEX_SCHEMA_VERSION and meta.get("sourceFormat") == fmt \
+                    and meta.get("sourceSignature") == source_signature(folder, fmt):
+                conn.row_factory = sqlite3.Row; return conn
+        except sqlite3.DatabaseError:
+            pass
+        conn.close()
+    build_index(folder, fmt, path)
+    conn = sqlite3.connect(path); conn.row_factory = sqlite3.Row
+    return conn
+
+def run_query(conn: sqlite3.Connection, name_or_sql: str, **params) -> t.List[dict]:
+    """A prebuilt query by name (see QUERIES), or raw SQL."""
+    sql = QUERIES[name_or_sql][1] if name_or_sql in QUERIES else name_or_sql
+    cur = conn.execute(sql, params)
+    cols = [c[0] for c in cur.description or []]
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+def check_index(conn: sqlite3.Connection) -> t.List[str]:
+    """Integrity problems: counts that disagree with the snapshot's metrics, scored episodes without picks, orphan picks."""
+    problems = []; meta = _read_meta(conn)
+    total = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    expected = meta.get("documentCount")
+    if expected is not None and expected != total: problems.append(f"snapshot says {expected} documents, index holds {total}")
+    metrics = meta.get("metrics") or {}
+    for key, template in (("results", RESULTS), ("weeklyPicks", PICKS)):
+        n = conn.execute("SELECT COUNT(*) FROM documents WHERE collection = ?", (template,)).fetchone()[0]
+        if key in metrics and metrics[key] != n: problems.append(f"metrics.{key} is {metrics[key]} but {n} {template} documents are indexed")
+    for r in run_query(conn, "results_without_picks"): problems.append(f"{r['season']} episode {r['episode']} has results but no weekly picks")
+    for r in run_query(conn, "picks_without_user"): problems.append(f"{r['season']}: {r['picks']} weekly-pick docs for {r['user']}, who has no users doc")
+    return problems
+
+def _print_rows(rows: t.List[dict], limit: int=50):
+    if not rows: print("  (no rows)"); return
+    cols = list(rows[0]); widths = [max(len(c), *(len(str(r[c])) for r in rows[:limit])) for c in cols]
+    print("  " + "  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in rows[:limit]: print("  " + "  ".join(str(r[c]).ljust(w) for c, w in zip(cols, widths)))
+    if len(rows) > limit: print(f"  ... {len(rows) - limit} more rows")
+
+def main():
+    print("\n=== Snapshot Index ===")
+    snap_dir = choose_snapshot_dir(Path(SNAPSHOTS_ROOT))
+    if not snap_dir: return
+    started = time.perf_counter()
+    conn = open_index(snap_dir, rebuild=input("Rebuild the index? [y/N]: ").strip().lower().startswith("y"))
+    print(f"Index ready in {time.perf_counter() - started:.2f}s ({snap_dir / INDEX_NAME})")
+    names = list(QUERIES)
+    while True:
+        for i, name in enumerate(names, 1): print(f"  {i}) {QUERIES[name][0]}")
+        print(f"  {len(names) + 1}) Integrity check\n  {len(names) + 2}) Custom SQL\n  0) Quit")
+        choice = input("Choose: ").strip()
+        if choice in ("", "0"): break
+        started = time.perf_counter()
+        try:
+            if choice == str(len(names) + 1):
+                problems = check_index(conn)
+                for p in problems: print(f"  - {p}")
+                if not problems: print("  No problems found.")
+            else:
+                if choice == str(len(names) + 2): sql = input("SQL: ").strip()
+                else: sql = QUERIES[names[int(choice) - 1]][1]
+                params = {p: input(f"{p}: ").strip() for p in dict.fromkeys(w[1:].rstrip(",;)") for w in sql.split() if w.startswith(":"))}
+                _print_rows(run_query(conn, sql, **{k: int(v) if v.isdigit() else v for k, v in params.items()}))
+        except (ValueError, IndexError, sqlite3.Error) as e:
+            print(f"  Error: {e}")
+        print(f"  ({(time.perf_counter() - started) * 1000:.1f} ms)")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
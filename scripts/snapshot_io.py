@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Snapshot file formats shared by snapshot_tool and seed_tool.
+
+snapshot.json    the nested {"firestore": {"rootCollections": [...]}} tree, read and written whole.
+snapshot.ndjson  streaming layout: a header line, one document per line
+                 ({"_path", "_createTime", "_updateTime", "fields"}), then a trailer line
+                 carrying metrics, storage report and root collection names.
+manifest.json    incremental layout: per-document object hashes into the shared
+                 content-addressed store (see snapshot_store).
+snapshot.msgpack framed, compressed binary layout with native value types (see snapshot_msgpack).
+shards/          one ndjson file per season subtree / user's weekly picks, plus a manifest
+                 with counts and hashes (see snapshot_shards).
+"""
+import json, os, tempfile, threading, time, typing as t
+from pathlib import Path
+
+import snapshot_store
+from snapshot_msgpack import HAS_MSGPACK, MSGPACK_NAME, MsgpackSnapshotReader, MsgpackSnapshotWriter
+from snapshot_shards import SHARD_MANIFEST_NAME, SHARDS_DIR, ShardedSnapshotReader, ShardedSnapshotWriter, in_scopes, selection_scopes
+from snapshot_tree import MetricsAccumulator, SnapshotTree
+
+JSON_NAME = "snapshot.json"
+NDJSON_NAME = "snapshot.ndjson"
+HEADER_TYPE = "firebaseSnapshotHeader"
+TRAILER_TYPE = "firebaseSnapshotTrailer"
+DOC_KEYS = ("_path", "_createTime", "_updateTime", "fields")
+
+FORMAT_FILES = {"msgpack": MSGPACK_NAME, "ndjson": NDJSON_NAME, "json": JSON_NAME, "manifest": snapshot_store.MANIFEST_NAME,
+                "shards": f"{SHARDS_DIR}/{SHARD_MANIFEST_NAME}"}
+
+def available_formats(folder: Path) -> t.List[str]:
+    """Formats present in the folder, fastest to load first."""
+    return [f for f in ("shards", "msgpack", "ndjson", "manifest", "json") if (folder / FORMAT_FILES[f]).exists() and (f != "msgpack" or HAS_MSGPACK)]
+
+def snapshot_format(folder: Path) -> str:
+    found = available_formats(folder)
+    return found[0] if found else "json"
+
+# ---- streaming layout
+
+class NdjsonSnapshotWriter:
+    """
+    Appends documents to snapshot.ndjson as they arrive (safe to call from export
+    worker threads). Weekly-pick paths are remembered so the collection-group pass
+    can re-offer documents the tree walk already wrote without duplicating them
+    (dedupe=False for exports that never offer a document twice).
+
+    checkpoint() flushes and returns the file offset and counts; passing that dict
+    back as `resume` truncates the file to the offset and keeps appending.
+    """
+    def __init__(self, path: Path, header: dict, dedupe: bool=True, resume: dict=None):
+        self.path = path; self.metrics = MetricsAccumulator(); self.count = 0; self.roots: t.List[str] = []
+        self._lock = threading.Lock(); self._weekly_paths = set() if dedupe else None
+        if resume is not None:
+            with open(path, "r+b") as fh: fh.truncate(resume["offset"])
+            self._fh = open(path, "a", encoding="utf-8")
+            self.count = resume["count"]; self.roots = list(resume["roots"]); self.metrics = MetricsAccumulator.from_dict(resume["metrics"])
+            return
+        self._fh = open(path, "w", encoding="utf-8")
+        self._fh.write(json.dumps({"_type": HEADER_TYPE, "formatVersion": 1, **header}, separators=(",", ":")) + "\n")
+
+    def write_doc(self, entry: dict) -> bool:
+        path = entry["_path"]
+        line = json.dumps({k: entry.get(k) for k in DOC_KEYS}, separators=(",", ":"))
+        with self._lock:
+            if self._weekly_paths is not None and "/weeklyPicks/" in path:
+                if path in self._weekly_paths: return False
+                self._weekly_paths.add(path)
+            root = path.split("/", 1)[0]
+            if root not in self.roots: self.roots.append(root)
+            self._fh.write(line + "\n"); self.count += 1; self.metrics.add(path)
+        return True
+
+    def checkpoint(self) -> dict:
+        with self._lock:
+            self._fh.flush(); os.fsync(self._fh.fileno())
+            return {"offset": os.fstat(self._fh.fileno()).st_size, "count": self.count, "roots": list(self.roots), "metrics": self.metrics.as_dict()}
+
+    def close(self, storage: dict=None, extra: dict=None) -> dict:
+        trailer = {"_type": TRAILER_TYPE, "documentCount": self.count, "rootCollections": self.roots,
+                   "metrics": self.metrics.as_dict(), "storage": storage, **(extra or {})}
+        with self._lock:
+            self._fh.write(json.dumps(trailer, separators=(",", ":")) + "\n"); self._fh.close()
+        return trailer
+
+def _read_last_line(path: Path) -> str:
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END); end = pos = fh.tell(); buf = b""
+        while pos > 0:
+            step = min(4096, pos); pos -= step; fh.seek(pos)
+            buf = fh.read(step) + buf
+            if buf.rstrip(b"\n").count(b"\n") >= 1: break
+        return buf.rstrip(b"\n").rsplit(b"\n", 1)[-1].decode("utf-8") if end else ""
+
+def read_ndjson_meta(path: Path) -> dict:
+    """Header merged with trailer, without reading the documents in between."""
+    with open(path, "r", encoding="utf-8") as fh: header = json.loads(fh.readline())
+    trailer = json.loads(_read_last_line(path) or "{}")
+    if trailer.get("_type") != TRAILER_TYPE:
+        raise ValueError(f"{path} has no trailer; the export did not finish")
+    meta = {k: v for k, v in header.items() if k != "_type"}
+    meta.update({k: v for k, v in trailer.items() if k != "_type"})
+    return meta
+
+def iter_ndjson_documents(path: Path) -> t.Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip(): continue
+            entry = json.loads(line)
+            if "_type" in entry: continue  # header / trailer
+            entry["_id"] = entry["_path"].rsplit("/", 1)[-1]
+            yield entry
+
+# ---- format-independent access
+
+def open_snapshot(folder: Path, fmt: str=None, native: bool=False, seasons: t.Optional[t.Sequence[str]]=None,
+                  users: t.Optional[t.Sequence[str]]=None) -> t.Tuple[dict, t.Iterator[dict]]:
+    """
+    (meta, documents) for a snapshot folder in any layout (`fmt` picks one when
+    several are present). meta carries kind, metrics, storage and rootCollections
+    (names); documents is a one-shot generator of flat entries, parents first,
+    without synthetic (missing) parent docs. With `native`, msgpack snapshots
+    yield datetime / bytes field values instead of their {"_type": ...} form.
+    `seasons` (and, within them, `users`' weekly picks) limit the documents; the
+    sharded layout reads only the matching files, the others filter the stream.
+    """
+    fmt = fmt or snapshot_format(folder)
+    if fmt == "shards":
+        reader = ShardedSnapshotReader(folder)
+        meta = dict(reader.meta); meta["format"] = "shards"
+        return meta, reader.documents(seasons, users if seasons else None)
+    if seasons:
+        meta, documents = open_snapshot(folder, fmt, native)
+        scopes = selection_scopes(seasons, users)
+        return meta, (d for d in documents if in_scopes(d["_path"], scopes))
+    if fmt == "msgpack":
+        reader = MsgpackSnapshotReader(folder / MSGPACK_NAME)
+        meta = dict(reader.meta); meta["format"] = "msgpack"
+        return meta, reader.documents(native)
+    if fmt == "ndjson":
+        path = folder / NDJSON_NAME
+        meta = read_ndjson_meta(path); meta["format"] = "ndjson"
+        return meta, iter_ndjson_documents(path)
+    if fmt == "manifest":
+        manifest = snapshot_store.load_manifest(folder / snapshot_store.MANIFEST_NAME)
+        meta = {k: v for k, v in manifest.items() if k not in ("_type", "documents", "collections")}; meta["format"] = "manifest"
+        return meta, snapshot_store.iter_manifest_documents(folder, manifest)
+    snap = json.loads((folder / JSON_NAME).read_text(encoding="utf-8"))
+    fs = snap.get("firestore") or {}
+    tree = SnapshotTree.from_dump(fs)
+    metrics = snap.get("metrics") or tree.metrics.as_dict()
+    meta = {"format": "json", "projectId": snap.get("projectId"), "exportedAt": snap.get("exportedAt"), "kind": snap.get("kind"),
+            "metrics": metrics, "storage": snap.get("storage"), "exportStats": snap.get("exportStats"),
+            "rootCollections": [c.get("_collection", "").split("/")[0] for c in fs.get("rootCollections", [])]}
+    return meta, tree.iter_entries(include_synthetic=False)
+
+_EXTRA_KEYS = ("exportStats", "base", "changes")
+
+def _write_streamed(writer, meta: dict, documents: t.Iterable[dict]) -> Path:
+    for d in documents: writer.write_doc(d)
+    writer.close(storage=meta.get("storage"), extra={k: meta[k] for k in _EXTRA_KEYS if meta.get(k)})
+    return writer.path
+
+def write_json(folder: Path, meta: dict, documents: t.Iterable[dict]) -> Path:
+    fs = {"_type": "firestoreDump", "projectId": meta.get("projectId"), "exportedAt": meta.get("exportedAt"),
+          "rootCollections": SnapshotTree.from_entries(documents).to_dump()}
+    snap = {"_type": "firebaseSnapshot", "projectId": meta.get("projectId"), "exportedAt": meta.get("exportedAt"), "kind": meta.get("kind"),
+            "metrics": meta.get("metrics"), "firestore": fs, "storage": meta.get("storage")}
+    if meta.get("exportStats"): snap["exportStats"] = meta["exportStats"]
+    out = folder / JSON_NAME
+    out.write_text(json.dumps(snap, indent=2), encoding="utf-8")
+    return out
+
+def write_snapshot(folder: Path, target: str, meta: dict, documents: t.Iterable[dict], compress: bool=True) -> Path:
+    header = {k: meta.get(k) for k in ("projectId", "exportedAt", "kind")}
+    if target == "json": return write_json(folder, meta, documents)
+    if target == "ndjson": return _write_streamed(NdjsonSnapshotWriter(folder / NDJSON_NAME, header), meta, documents)
+    if target == "msgpack": return _write_streamed(MsgpackSnapshotWriter(folder / MSGPACK_NAME, header, compress=compress), meta, documents)
+    if target == "shards": return _write_streamed(ShardedSnapshotWriter(folder, header), meta, documents)
+    raise ValueError(f"cannot write snapshot format {target!r}")
+
+def convert_snapshot(folder: Path, target: str, source: str=None, compress: bool=True) -> Path:
+    """Rewrite a snapshot in another layout (manifests can be materialized but not written)."""
+    source = source or next((f for f in available_formats(folder) if f != target), None)
+    if source is None: raise ValueError(f"no source format other than {target} in {folder}")
+    meta, documents = open_snapshot(folder, source)
+    return write_snapshot(folder, target, meta, documents, compress=compress)
+
+def benchmark_formats(folder: Path, formats: t.Sequence[str]=("json", "ndjson", "msgpack"), repeat: int=3) -> t.List[dict]:
+    """
+    Dump (write from an in-memory entry list) and load (open + iterate every document)
+    timings per format, best of `repeat`, plus file size. Loads use native=True, as seeding does. Written to a scratch folder;
+    the snapshot itself is left untouched.
+    """
+    meta, documents = open_snapshot(folder)
+    entries = list(documents); results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch = Path(scratch)
+        for fmt in formats:
+            if fmt == "msgpack" and not HAS_MSGPACK: continue
+            dump = load = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter(); out = write_snapshot(scratch, fmt, meta, iter(entries)); dump = min(dump, time.perf_counter() - started)
+                started = time.perf_counter(); n = sum(1 for _ in open_snapshot(scratch, fmt, native=True)[1]); load = min(load, time.perf_counter() - started)
+            size = sum(p.stat().st_size for p in out.parent.rglob("*.ndjson")) if fmt == "shards" else out.stat().st_size
+            results.append({"format": fmt, "documents": n, "bytes": size, "dumpSeconds": round(dump, 4), "loadSeconds": round(load, 4)})
+    return results
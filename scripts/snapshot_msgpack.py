@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+snapshot.msgpack: compact binary snapshot layout.
+
+    MAGIC
+    frame*            u32 length | u8 flags | msgpack payload (zlib'd when flags & 1)
+                      first frame: header map; then document blocks of up to
+                      BLOCK_DOCS documents, each [path, createTime, updateTime, fields]
+                      (the last frame is the trailer: metrics, storage, ..., and an
+                      "index" of [offset, length, [paths]] per block)
+    u64 trailer offset | END_MAGIC
+
+Field values use native msgpack types instead of the {"_type": ...} dicts of the
+JSON formats: timestamps are the msgpack Timestamp extension, bytes are bin, and
+document references / geopoints are ext types 1 / 2. Readers either get those
+back as native Python values (datetime, bytes, plus {"_type": "docref"/"geopoint"}
+dicts seed_tool already understands) or converted to the JSON-compatible form.
+"""
+import base64, datetime as dt, struct, threading, zlib, typing as t
+from pathlib import Path
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except Exception:
+    HAS_MSGPACK = False
+
+from snapshot_tree import MetricsAccumulator
+
+MSGPACK_NAME = "snapshot.msgpack"
+MAGIC = b"FSNAPMP1"
+END_MAGIC = b"FSNAPEND"
+BLOCK_DOCS = 256
+EXT_DOCREF = 1
+EXT_GEOPOINT = 2
+_FRAME = struct.Struct("<IB")
+_TAIL = struct.Struct("<Q")
+_FLAG_ZLIB = 1
+
+def _require():
+    if not HAS_MSGPACK: raise RuntimeError("msgpack is not installed; pip install msgpack to read or write snapshot.msgpack")
+
+# ---- value conversion
+
+def _to_native(v):
+    """JSON-compatible serialized value -> msgpack-ready value."""
+    if isinstance(v, dict):
+        tname = v.get("_type")
+        if tname == "timestamp":
+            iso = v["iso"][:-1] if v["iso"].endswith("Z") else v["iso"]
+            ts = dt.datetime.fromisoformat(iso)
+            return ts.replace(tzinfo=dt.timezone.utc) if ts.tzinfo is None else ts
+        if tname == "bytes": return base64.b64decode(v["base64"])
+        if tname == "docref": return msgpack.ExtType(EXT_DOCREF, v["path"].encode("utf-8"))
+        if tname == "geopoint": return msgpack.ExtType(EXT_GEOPOINT, struct.pack("<dd", v["lat"], v["lon"]))
+        return {k: _to_native(x) for k, x in v.items()}
+    if isinstance(v, list): return [_to_native(x) for x in v]
+    return v
+
+def _ext_hook(code: int, data: bytes):
+    if code == EXT_DOCREF: return {"_type": "docref", "path": data.decode("utf-8")}
+    if code == EXT_GEOPOINT:
+        lat, lon = struct.unpack("<dd", data); return {"_type": "geopoint", "lat": lat, "lon": lon}
+    return msgpack.ExtType(code, data)
+
+def _to_serialized(v):
+    """Native value (as unpacked) -> the {"_type": ...} form used by snapshot.json / .ndjson."""
+    if isinstance(v, dt.datetime):
+        return {"_type": "timestamp", "iso": v.astimezone(dt.timezone.utc).replace(tzinfo=None).isoformat(timespec="microseconds") + "Z"}
+    if isinstance(v, bytes): return {"_type": "bytes", "base64": base64.b64encode(v).decode("ascii")}
+    if isinstance(v, list): return [_to_serialized(x) for x in v]
+    if isinstance(v, dict): return {k: _to_serialized(x) for k, x in v.items()}
+    return v
+
+def _pack(obj) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True, datetime=True)
+
+def _unpack(data: bytes):
+    return msgpack.unpackb(data, raw=False, timestamp=3, ext_hook=_ext_hook, strict_map_key=False)
+
+# ---- writing
+
+class MsgpackSnapshotWriter:
+    """Same contract as snapshot_io.NdjsonSnapshotWriter: thread-safe write_doc, repeated weekly-pick paths dropped."""
+    def __init__(self, path: Path, header: dict, compress: bool=True, level: int=6):
+        _require()
+        self.path = path; self.metrics = MetricsAccumulator(); self.count = 0; self.roots: t.List[str] = []
+        self._fh = open(path, "wb"); self._compress = compress; self._level = level
+        self._block: t.List[list] = []; self._paths: t.List[str] = []; self._index: t.List[list] = []
+        self._lock = threading.Lock(); self._weekly_paths = set()
+        self._fh.write(MAGIC)
+        self._frame({"_type": "firebaseSnapshotHeader", "formatVersion": 1, **header}, compress=False)
+
+    def _frame(self, obj, compress: bool) -> t.Tuple[int, int]:
+        payload = _pack(obj)
+        if compress: payload = zlib.compress(payload, self._level)
+        offset = self._fh.tell()
+        self._fh.write(_FRAME.pack(len(payload), _FLAG_ZLIB if compress else 0)); self._fh.write(payload)
+        return offset, _FRAME.size + len(payload)
+
+    def write_doc(self, entry: dict) -> bool:
+        path = entry["_path"]
+        row = [path, entry.get("_createTime"), entry.get("_updateTime"), _to_native(entry.get("fields", {}))]
+        with self._lock:
+            if "/weeklyPicks/" in path:
+                if path in self._weekly_paths: return False
+                self._weekly_paths.add(path)
+            self._block.append(row); self._paths.append(path); self.count += 1; self.metrics.add(path)
+            root = path.split("/", 1)[0]
+            if root not in self.roots: self.roots.append(root)
+            if len(self._block) >= BLOCK_DOCS: self._flush_block()
+        return True
+
+    def _flush_block(self):
+        if not self._block: return
+        offset, length = self._frame(self._block, self._compress)
+        self._index.append([offset, length, self._paths]); self._block = []; self._paths = []
+
+    def close(self, storage: dict=None, extra: dict=None) -> dict:
+        trailer = {"_type": "firebaseSnapshotTrailer", "documentCount": self.count, "rootCollections": self.roots,
+                   "metrics": self.metrics.as_dict(), "storage": storage, **(extra or {})}
+        with self._lock:
+            self._flush_block()
+            offset, _ = self._frame({**trailer, "index": self._index}, compress=self._compress)
+            self._fh.write(_TAIL.pack(offset) + END_MAGIC); self._fh.close()
+        return trailer
+
+# ---- reading
+
+class MsgpackSnapshotReader:
+    """Reads the trailer up front; documents are decoded one block at a time, in order or by path."""
+    def __init__(self, path: Path):
+        _require()
+        self.path = path
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not a msgpack snapshot")
+            header = self._read_frame(fh, fh.tell())
+            fh.seek(-(_TAIL.size + len(END_MAGIC)), 2); tail = fh.read()
+            if not tail.endswith(END_MAGIC): raise ValueError(f"{path} has no trailer; the export did not finish")
+            trailer = self._read_frame(fh, _TAIL.unpack(tail[:_TAIL.size])[0])
+        self.index = trailer.pop("index")
+        self.meta = {k: v for k, v in header.items() if k != "_type"}
+        self.meta.update({k: v for k, v in trailer.items() if k != "_type"})
+        self._where: t.Optional[t.Dict[str, t.Tuple[int, int]]] = None
+
+    @staticmethod
+    def _read_frame(fh, offset: int):
+        fh.seek(offset); length, flags = _FRAME.unpack(fh.read(_FRAME.size)); payload = fh.read(length)
+        return _unpack(zlib.decompress(payload) if flags & _FLAG_ZLIB else payload)
+
+    @staticmethod
+    def _entry(row: list, native: bool) -> dict:
+        path, ct, ut, fields = row
+        return {"_id": path.rsplit("/", 1)[-1], "_path": path, "_createTime": ct, "_updateTime": ut,
+                "fields": fields if native else _to_serialized(fields)}
+
+    def __iter__(self) -> t.Iterator[dict]:
+        return self.documents()
+
+    def documents(self, native: bool=False) -> t.Iterator[dict]:
+        with open(self.path, "rb") as fh:
+            for offset, _, _ in self.index:
+                for row in self._read_frame(fh, offset): yield self._entry(row, native)
+
+    def get(self, path: str, native: bool=False) -> t.Optional[dict]:
+        """One document by path, decoding only the block that holds it."""
+        if self._where is None:
+            self._where = {p: (b, i) for b, (_, _, paths) in enumerate(self.index) for i, p in enumerate(paths)}
+        hit = self._where.get(path)
+        if hit is None: return None
+        with open(self.path, "rb") as fh: rows = self._read_frame(fh, self.index[hit[0]][0])
+        return self._entry(rows[hit[1]], native)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+shards/: season-sharded snapshot layout.
+
+    shards/manifest.json                       header + trailer fields, and one record per shard:
+                                               {name, file, season, user, documents, bytes, sha256}
+    shards/seasons/<sid>/_config.ndjson        the seasons/<sid> document itself
+    shards/seasons/<sid>/<collection>.ndjson   state, phases, results, users, ... (whole subtree)
+    shards/seasons/<sid>/weeklyPicks/<uid>.ndjson   one user's weeklyPicks subtree
+    shards/_root/<collection>.ndjson           any other root collection
+
+Shard files hold one document per line, in the snapshot.ndjson document shape.
+Restoring one season, or inspecting one user's picks, reads only those files.
+Shards are encoded/hashed (writing) and parsed (reading) on a process pool once
+a snapshot is large enough for that to beat the cost of starting the workers.
+"""
+import hashlib, json, os, threading, typing as t
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from snapshot_tree import MetricsAccumulator
+
+SHARDS_DIR = "shards"
+SHARD_MANIFEST_NAME = "manifest.json"
+SHARD_MANIFEST_TYPE = "firebaseShardManifest"
+SHARD_MAX_WORKERS = os.cpu_count() or 4
+SHARD_PROCESS_MIN_DOCS = 20000  # below this a thread pool is faster than spawning processes
+DOC_KEYS = ("_path", "_createTime", "_updateTime", "fields")
+
+def shard_of(path: str) -> t.Tuple[str, t.Optional[str], t.Optional[str]]:
+    """Document path -> (shard name, season id, user id)."""
+    parts = path.split("/")
+    if parts[0] != "seasons" or len(parts) < 2: return f"_root/{parts[0]}", None, None
+    sid = parts[1]
+    if len(parts) == 2: return f"seasons/{sid}/_config", sid, None
+    if parts[2] == "weeklyPicks" and len(parts) >= 4: return f"seasons/{sid}/weeklyPicks/{parts[3]}", sid, parts[3]
+    return f"seasons/{sid}/{parts[2]}", sid, None
+
+def selection_scopes(seasons: t.Optional[t.Iterable[str]]=None, users: t.Optional[t.Iterable[str]]=None) -> t.Optional[t.List[str]]:
+    """Document-path prefixes a season / user selection covers (None = everything). Users need seasons."""
+    if not seasons: return None
+    if users: return [f"seasons/{s}/weeklyPicks/{u}" for s in seasons for u in users]
+    return [f"seasons/{s}" for s in seasons]
+
+def in_scopes(path: str, scopes: t.Optional[t.List[str]]) -> bool:
+    return scopes is None or any(path == s or path.startswith(s + "/") for s in scopes)
+
+def _write_shard(folder: str, rel: str, entries: t.List[dict]) -> dict:
+    data = "".join(json.dumps({k: e.get(k) for k in DOC_KEYS}, separators=(",", ":")) + "\n" for e in entries).encode("utf-8")
+    path = Path(folder) / rel; path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part"); tmp.write_bytes(data); os.replace(tmp, path)
+    return {"bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+def _read_shard(path: str, sha256: t.Optional[str]=None) -> t.List[dict]:
+    data = Path(path).read_bytes()
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256: raise ValueError(f"{path} does not match its manifest hash")
+    entries = []
+    for line in data.decode("utf-8").splitlines():
+        if not line: continue
+        entry = json.loads(line); entry["_id"] = entry["_path"].rsplit("/", 1)[-1]; entries.append(entry)
+    return entries
+
+def _pool(total_docs: int, max_workers: int):
+    cls = ProcessPoolExecutor if total_docs >= SHARD_PROCESS_MIN_DOCS and max_workers > 1 else ThreadPoolExecutor
+    return cls(max_workers=max(1, max_workers))
+
+class ShardedSnapshotWriter:
+    """
+    Same contract as snapshot_io.NdjsonSnapshotWriter (thread-safe write_doc, repeated
+    weekly-pick paths dropped, close() returns the trailer). Documents are grouped in
+    memory and every shard is written at close, in parallel.
+    """
+    def __init__(self, folder: Path, header: dict, max_workers: int=SHARD_MAX_WORKERS):
+        self.folder = folder / SHARDS_DIR; self.header = header; self.max_workers = max_workers
+        self.metrics = MetricsAccumulator(); self.count = 0; self.roots: t.List[str] = []
+        self._shards: t.Dict[str, t.Tuple[t.Optional[str], t.Optional[str], t.List[dict]]] = {}
+        self._lock = threading.Lock(); self._weekly_paths = set()
+
+    @property
+    def path(self) -> Path:
+        return self.folder / SHARD_MANIFEST_NAME
+
+    def write_doc(self, entry: dict) -> bool:
+        path = entry["_path"]; name, season, user = shard_of(path)
+        with self._lock:
+            if "/weeklyPicks/" in path:
+                if path in self._weekly_paths: return False
+                self._weekly_paths.add(path)
+            self._shards.setdefault(name, (season, user, []))[2].append(entry)
+            self.count += 1; self.metrics.add(path)
+            root = path.split("/", 1)[0]
+            if root not in self.roots: self.roots.append(root)
+        return True
+
+    def close(self, storage: dict=None, extra: dict=None) -> dict:
+        trailer = {"documentCount": self.count, "rootCollections": self.roots, "metrics": self.metrics.as_dict(), "storage": storage, **(extra or {})}
+        with self._lock:
+            names = sorted(self._shards, key=lambda n: (not n.startswith("_root/"), n.split("/")[:2], not n.endswith("/_config"), "/weeklyPicks/" in n, n))
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with _pool(self.count, self.max_workers) as pool:
+                futures = [pool.submit(_write_shard, str(self.folder), f"{n}.ndjson", self._shards[n][2]) for n in names]
+                shards = [{"name": n, "file": f"{n}.ndjson", "season": self._shards[n][0], "user": self._shards[n][1],
+                           "documents": len(self._shards[n][2]), **fut.result()} for n, fut in zip(names, futures)]
+            manifest = {"_type": SHARD_MANIFEST_TYPE, "formatVersion": 1, **self.header, **trailer, "shards": shards}
+            tmp = self.path.with_name(self.path.name + ".part")
+            tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8"); os.replace(tmp, self.path)
+            self._shards = {}
+        return {"_type": "firebaseSnapshotTrailer", **trailer}
+
+class ShardedSnapshotReader:
+    def __init__(self, folder: Path, max_workers: int=SHARD_MAX_WORKERS):
+        self.folder = folder / SHARDS_DIR; self.max_workers = max_workers
+        manifest = json.loads((self.folder / SHARD_MANIFEST_NAME).read_text(encoding="utf-8"))
+        self.shards: t.List[dict] = manifest.pop("shards")
+        self.meta = {k: v for k, v in manifest.items() if k != "_type"}
+
+    def seasons(self) -> t.List[str]:
+        return sorted({s["season"] for s in self.shards if s["season"]})
+
+    def users(self, season: str) -> t.List[str]:
+        return sorted({s["user"] for s in self.shards if s["season"] == season and s["user"]})
+
+    def select(self, seasons: t.Optional[t.Iterable[str]]=None, users: t.Optional[t.Iterable[str]]=None) -> t.List[dict]:
+        seasons = set(seasons) if seasons else None; users = set(users) if users else None
+        return [s for s in self.shards if (seasons is None or s["season"] in seasons) and (users is None or s["user"] in users)]
+
+    def documents(self, seasons=None, users=None, verify: bool=True) -> t.Iterator[dict]:
+        """Entries of the selected shards, in manifest order; shards are parsed ahead in parallel."""
+        chosen = self.select(seasons, users)
+        if not chosen: return
+        with _pool(sum(s["documents"] for s in chosen), min(self.max_workers, len(chosen))) as pool:
+            for entries in pool.map(_read_shard, [str(self.folder / s["file"]) for s in chosen], [s["sha256"] if verify else None for s in chosen]):
+                yield from entries
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Content-addressed document store and manifests for incremental snapshots.
+
+SNAPSHOTS_ROOT/objects/ab/<sha256>.json  one serialized document body
+                                         ({"_createTime", "_updateTime", "fields"}), shared
+                                         by every snapshot folder that references it.
+snapshot_*/manifest.json                 path -> [object hash, _updateTime] for every document,
+                                         plus a Merkle-style hash per collection and for the
+                                         whole export, so two snapshots can be compared (and
+                                         unchanged subtrees skipped) without opening objects.
+"""
+import hashlib, json, os, typing as t
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_TYPE = "firebaseSnapshotManifest"
+OBJECTS_DIR = "objects"
+
+def _canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class ObjectStore:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def put(self, entry: dict) -> t.Tuple[str, bool]:
+        """Store a document body; returns (hash, newly_written)."""
+        body = _canonical({k: entry.get(k) for k in ("_createTime", "_updateTime", "fields")})
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.path(digest)
+        if path.exists(): return digest, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(body); os.replace(tmp, path)
+        return digest, True
+
+    def get(self, digest: str) -> dict:
+        return json.loads(self.path(digest).read_bytes())
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def digests(self) -> t.Iterator[str]:
+        if not self.root.exists(): return
+        for sub in self.root.iterdir():
+            if sub.is_dir():
+                for f in sub.glob("*.json"): yield f.stem
+
+    def remove(self, digest: str) -> int:
+        path = self.path(digest); size = path.stat().st_size
+        path.unlink(); return size
+
+def object_store_for(snap_dir: Path) -> ObjectStore:
+    """Snapshot folders live side by side, so the store is their shared sibling."""
+    return ObjectStore(snap_dir.parent / OBJECTS_DIR)
+
+def merkle_hashes(documents: t.Dict[str, t.Sequence[str]]) -> t.Tuple[t.Dict[str, str], str]:
+    """
+    Per-collection hashes over (doc id, doc hash, child collection hashes) and the root
+    hash over all root collections. Missing parent docs contribute only their children.
+    """
+    children: t.Dict[str, t.Dict[str, t.List[str]]] = {}   # collection path -> doc id -> [doc hash, sub=hash...]
+    for path, (digest, _) in documents.items():
+        col_path, doc_id = path.rsplit("/", 1)
+        children.setdefault(col_path, {}).setdefault(doc_id, []).append(digest)
+        # make sure every ancestor collection is known even if its doc is missing
+        parts = col_path.split("/")
+        for i in range(len(parts) - 2, 0, -2):
+            children.setdefault("/".join(parts[:i]), {}).setdefault(parts[i], [])
+    hashes: t.Dict[str, str] = {}
+    for col_path in sorted(children, key=lambda p: (-p.count("/"), p)):
+        lines = []
+        for doc_id, parts in sorted(children[col_path].items()):
+            # doc hash first, then "sub=hash" sorted: independent of the order documents arrived in
+            lines.append(f"{doc_id} {' '.join(sorted(parts, key=lambda x: ('=' in x, x)))}")
+        hashes[col_path] = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+        if "/" in col_path:
+            owner_col, owner_id = col_path.rsplit("/", 2)[0], col_path.rsplit("/", 2)[1]
+            children[owner_col][owner_id].append(f"{col_path.rsplit('/', 1)[-1]}={hashes[col_path]}")
+    roots = sorted(f"{p}={h}" for p, h in hashes.items() if "/" not in p)
+    return hashes, hashlib.sha256("\n".join(roots).encode("utf-8")).hexdigest()
+
+def latest_manifest(base_dir: Path, exclude: Path=None) -> t.Optional[Path]:
+    dirs = [d for d in sorted(base_dir.iterdir()) if d.is_dir() and d.name.startswith("snapshot_") and d != exclude and (d / MANIFEST_NAME).exists()]
+    return dirs[-1] / MANIFEST_NAME if dirs else None
+
+def load_manifest(path: Path) -> dict:
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("_type") != MANIFEST_TYPE: raise ValueError(f"{path} is not a snapshot manifest")
+    return manifest
+
+def write_manifest(snap_dir: Path, header: dict, documents: t.Dict[str, t.Sequence[str]]) -> dict:
+    col_hashes, root_hash = merkle_hashes(documents)
+    manifest = {"_type": MANIFEST_TYPE, "formatVersion": 1, **header, "root": root_hash, "collections": col_hashes,
+                "documents": {p: list(v) for p, v in documents.items()}}
+    tmp = snap_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8"); os.replace(tmp, snap_dir / MANIFEST_NAME)
+    return manifest
+
+def changed_collections(old: dict, new: dict) -> t.List[str]:
+    """Collections whose Merkle hash differs (or that only exist on one side)."""
+    a, b = old.get("collections", {}), new.get("collections", {})
+    return sorted(p for p in set(a) | set(b) if a.get(p) != b.get(p))
+
+def iter_manifest_documents(snap_dir: Path, manifest: dict) -> t.Iterator[dict]:
+    store = object_store_for(snap_dir)
+    for path, (digest, _) in manifest["documents"].items():
+        entry = store.get(digest)
+        entry["_id"] = path.rsplit("/", 1)[-1]; entry["_path"] = path
+        yield entry
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-import base64, datetime as dt, json, typing as t
+import datetime as dt, json, shutil, threading, time, typing as t
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
@@ -7,106 +8,28 @@ PROJECT_ID = "survivus1514"
 SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
 DEFAULT_BUCKET = f"{PROJECT_ID}.firebasestorage.app"
 DEFAULT_PREFIXES = ["users/", "contestants/"]
+EXPORT_MAX_WORKERS = 16  # concurrent Firestore RPCs during export; 1 = legacy serial crawl
+SNAPSHOT_FORMAT = "json"  # "json" = nested snapshot.json, "ndjson" = streamed snapshot.ndjson (constant memory), "msgpack" = streamed snapshot.msgpack, "shards" = one file per season subtree (snapshot_shards)
+INCREMENTAL_FETCH_CHUNK = 100  # documents per batchGetDocuments call when an incremental run refetches changed docs
+NAME_ONLY = ["__name__"]  # field mask: document name + timestamps, no field data
+INCREMENTAL_SCAN_RETRIES = 5  # transient errors the weekly-picks scan of an incremental run resumes from before giving up
+PROFILE_RUNS = True       # write profile.json (timings, RPCs, bytes, billable ops) and a summary section for each run
+PROFILE_CPROFILE = False  # also dump profile.pstats (cProfile of the main thread)
+VALIDATE_SCHEMAS = True   # check known documents against the app's payload schemas while encoding (firestore_codec)
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+import blob_cache, firestore_bulk, firestore_codec, instrumentation, paged_export, snapshot_io, snapshot_store, storage_transfer
+from snapshot_tree import MetricsAccumulator, SnapshotTree
+
 try:
     from google.cloud import storage as gcs
     HAS_GCS = True
 except Exception:
     HAS_GCS = False
 
-def _serialize_value(v):
-    try:
-        from google.cloud.firestore import DocumentReference
-    except Exception:
-        class DocumentReference: pass
-    import datetime as _dt
-    if isinstance(v, _dt.datetime):
-        if v.tzinfo is not None:
-            v = v.astimezone(_dt.timezone.utc).replace(tzinfo=None)
-        return {"_type": "timestamp", "iso": v.isoformat(timespec="microseconds") + "Z"}
-    if isinstance(v, bytes):
-        return {"_type": "bytes", "base64": base64.b64encode(v).decode("ascii")}
-    if 'DocumentReference' in globals() and isinstance(v, DocumentReference):
-        return {"_type": "docref", "path": v.path}
-    if hasattr(v, "latitude") and hasattr(v, "longitude"):
-        try:
-            return {"_type": "geopoint", "lat": float(v.latitude), "lon": float(v.longitude)}
-        except Exception:
-            pass
-    if isinstance(v, (list, tuple)):
-        return [_serialize_value(x) for x in v]
-    if isinstance(v, dict):
-        return {k: _serialize_value(val) for k, val in v.items()}
-    return v
-
-def _index_collections_by_path(fs_dump: dict) -> dict:
-    """Map _collection path -> collection dict object in the dump."""
-    idx = {}
-    def walk(col):
-        idx[col["_collection"]] = col
-        for d in col.get("documents", []):
-            for sub in d.get("_subcollections", []) or []:
-                walk(sub)
-    for rc in fs_dump.get("rootCollections", []):
-        walk(rc)
-    return idx
-
-def _find_doc_entry(fs_dump: dict, doc_path: str) -> t.Optional[dict]:
-    """Return the doc dict in the dump by exact _path, if present."""
-    def walk_docs(col):
-        for d in col.get("documents", []):
-            if d.get("_path") == doc_path:
-                return d
-            for sub in d.get("_subcollections", []) or []:
-                got = walk_docs(sub)
-                if got: return got
-        return None
-    for rc in fs_dump.get("rootCollections", []):
-        got = walk_docs(rc)
-        if got: return got
-    return None
-
-def _ensure_subcollection(doc_entry: dict, collection_path: str) -> dict:
-    """Ensure doc_entry has a subcollection object with this path; create if missing."""
-    subs = doc_entry.setdefault("_subcollections", [])
-    for c in subs:
-        if c.get("_collection") == collection_path:
-            return c
-    c = {"_collection": collection_path, "documents": []}
-    subs.append(c)
-    return c
-
-def _ensure_missing_parent_doc(fs_dump: dict, parent_doc_path: str) -> dict:
-    """Make a synthetic empty doc in the dump (so episodes can hang under it)."""
-    existing = _find_doc_entry(fs_dump, parent_doc_path)
-    if existing:
-        return existing
-    # parent_doc_path like: seasons/season-001/weeklyPicks/u1
-    parent_col_path = "/".join(parent_doc_path.split("/")[:-1])
-    parent_doc_id   = parent_doc_path.split("/")[-1]
-    # find the doc that owns the parent collection (e.g., seasons/season-001)
-    owner_doc_path  = "/".join(parent_col_path.split("/")[:-1])
-    owner_doc       = _find_doc_entry(fs_dump, owner_doc_path)
-    if not owner_doc:
-        # if we can't find the owner (unexpected), bail and rely on existing traversal
-        return None
-    # attach the parent collection to the owner
-    parent_col = _ensure_subcollection(owner_doc, parent_col_path)
-    # create the synthetic parent doc
-    synth = {
-        "_id": parent_doc_id,
-        "_path": parent_doc_path,
-        "_createTime": None,
-        "_updateTime": None,
-        "fields": {}
-    }
-    parent_col["documents"].append(synth)
-    return synth
-
-def _serialize_episode_doc(doc) -> dict:
+def _serialize_episode_doc(doc, validate: bool=True) -> dict:
     def _safe_iso(val):
         try:
             if hasattr(val, "isoformat"):
@@ -115,18 +38,20 @@ def _serialize_episode_doc(doc) -> dict:
             pass
         return None
 
-    return {
-        "_id": doc.id,
-        "_path": doc.reference.path,
-        "_createTime": _safe_iso(getattr(doc, "create_time", None)),
-        "_updateTime": _safe_iso(getattr(doc, "update_time", None)),
-        "fields": _serialize_value(doc.to_dict() or {}),
-    }
+    with instrumentation.timer("serialize"):
+        return {
+            "_id": doc.id,
+            "_path": doc.reference.path,
+            "_createTime": _safe_iso(getattr(doc, "create_time", None)),
+            "_updateTime": _safe_iso(getattr(doc, "update_time", None)),
+            "fields": firestore_codec.encode_fields(doc.reference.path, doc.to_dict() or {}, validate),
+        }
 
-def augment_with_weekly_picks_via_collection_group(db, fs_dump: dict) -> int:
+def augment_with_weekly_picks_via_collection_group(db, tree: SnapshotTree) -> int:
     """
     Find seasons/*/weeklyPicks/*/episodes/* using a collection group query,
-    and insert them into the dump even if weeklyPicks/<userId> parent docs are 'missing'.
+    and insert them into the tree even if weeklyPicks/<userId> parent docs are 'missing'
+    (the tree creates synthetic parents). Episodes the walk already exported are skipped.
     Returns number of episode docs added.
     """
     added = 0
@@ -141,48 +66,130 @@ def augment_with_weekly_picks_via_collection_group(db, fs_dump: dict) -> int:
         parts = ep.reference.path.split("/")
         if len(parts) < 6 or parts[-2] != "episodes" or "weeklyPicks" not in parts:
             continue
-        parent_doc_path = "/".join(parts[:-2])  # .../weeklyPicks/<uid>
-        episodes_col_path = parent_doc_path + "/episodes"
-
-        parent_doc_entry = _ensure_missing_parent_doc(fs_dump, parent_doc_path)
-        if not parent_doc_entry:
+        if ep.reference.path in tree:
             continue
-        episodes_col = _ensure_subcollection(parent_doc_entry, episodes_col_path)
+        if tree.add_entry(_serialize_episode_doc(ep)):
+            added += 1
+    return added
 
-        episodes_col["documents"].append(_serialize_episode_doc(ep))
-        added += 1
+def stream_weekly_picks_via_collection_group(db, writer) -> int:
+    """Streaming twin of augment_with_weekly_picks_via_collection_group; the writer drops episodes the walk already wrote."""
+    added = 0
+    try:
+        cg = db.collection_group("episodes").stream()
+    except Exception:
+        return 0
+    for ep in cg:
+        parts = ep.reference.path.split("/")
+        if len(parts) < 6 or parts[-2] != "episodes" or "weeklyPicks" not in parts:
+            continue
+        if writer.write_doc(_serialize_episode_doc(ep)):
+            added += 1
     return added
 
 
-def _doc_to_serializable(doc) -> dict:
-    data = doc.to_dict() or {}
-    converted = {k: _serialize_value(v) for k, v in data.items()}
+def _doc_to_serializable(doc, validate: bool=True) -> dict:
+    with instrumentation.timer("serialize"):
+        data = doc.to_dict() or {}
+        converted = firestore_codec.encode_fields(doc.reference.path, data, validate)
     return {"_id": doc.id, "_path": doc.reference.path, "_createTime": getattr(doc, "create_time", None).isoformat() if getattr(doc, "create_time", None) else None, "_updateTime": getattr(doc, "update_time", None).isoformat() if getattr(doc, "update_time", None) else None, "fields": converted}
 
-def walk_collection(col_ref, parent_doc_path=None) -> dict:
+class RpcCounter:
+    """Thread-safe tally of Firestore round trips (and documents read) during an export."""
+    def __init__(self):
+        self._lock = threading.Lock(); self.counts = {}
+    def add(self, op: str, n: int=1):
+        with self._lock: self.counts[op] = self.counts.get(op, 0) + n
+
+def _stream(col_ref, field_paths: t.Optional[t.List[str]]):
+    return col_ref.select(field_paths).stream() if field_paths is not None else col_ref.stream()
+
+def walk_collection(col_ref, parent_doc_path=None, rpc: RpcCounter=None, on_doc: t.Callable[[dict], t.Any]=None, field_paths: t.List[str]=None) -> dict:
+    """Serial crawl; with `on_doc` each document is handed off instead of kept in the tree."""
+    rpc = rpc or RpcCounter()
     col_path = f"{parent_doc_path}/{col_ref.id}" if parent_doc_path else col_ref.id
     out = {"_collection": col_path, "documents": []}
-    for doc in col_ref.stream():
-        entry = _doc_to_serializable(doc)
+    rpc.add("stream")
+    for doc in _stream(col_ref, field_paths):
+        rpc.add("documents")
+        entry = _doc_to_serializable(doc, validate=field_paths is None)
         subs = []
+        rpc.add("collections")
         for sub in doc.reference.collections():
-            subs.append(walk_collection(sub, parent_doc_path=doc.reference.path))
+            subs.append(walk_collection(sub, parent_doc_path=doc.reference.path, rpc=rpc, on_doc=on_doc, field_paths=field_paths))
+        if on_doc:
+            on_doc(entry); continue
         if subs:
             entry["_subcollections"] = subs
         out["documents"].append(entry)
     return out
 
-def dump_firestore(credentials_path: str, project_id: str, only_col_prefixes: t.List[str]=None) -> dict:
-    cred = credentials.Certificate(credentials_path)
-    if not firebase_admin._apps:
-        firebase_admin.initialize_app(cred, {"projectId": project_id} if project_id else None)
-    db = firestore.client()
+def walk_collections_concurrent(col_refs, max_workers: int=EXPORT_MAX_WORKERS, rpc: RpcCounter=None, on_doc: t.Callable[[dict], t.Any]=None, field_paths: t.List[str]=None) -> t.List[dict]:
+    """
+    Same tree as [walk_collection(c) for c in col_refs], but every `stream()` and
+    `collections()` call is a task on a bounded thread pool, so sibling collections,
+    seasons and per-user weeklyPicks subtrees are crawled at the same time.
+    Tasks never wait on each other: each returns its follow-up tasks to this loop.
+    With `on_doc` (called from worker threads) documents are streamed out, not kept;
+    `field_paths` is passed to select(), e.g. NAME_ONLY to read update times without data;
+    such partial documents are not schema-checked.
+    """
+    rpc = rpc or RpcCounter()
+
+    def stream_task(col_ref, out):
+        rpc.add("stream")
+        follow = []
+        for doc in _stream(col_ref, field_paths):
+            entry = _doc_to_serializable(doc, validate=field_paths is None)
+            if on_doc:
+                on_doc(entry); entry = None
+            else:
+                out["documents"].append(entry)
+            follow.append((list_task, doc.reference, entry))
+        rpc.add("documents", len(follow))
+        return follow
+
+    def list_task(doc_ref, entry):
+        rpc.add("collections")
+        follow = []
+        for sub in doc_ref.collections():
+            # placeholders are attached in listing order, so the tree matches the serial walk
+            col = {"_collection": f"{doc_ref.path}/{sub.id}", "documents": []}
+            if entry is not None: entry.setdefault("_subcollections", []).append(col)
+            follow.append((stream_task, sub, col))
+        return follow
+
+    outs = [{"_collection": c.id, "documents": []} for c in col_refs]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = {pool.submit(stream_task, c, out) for c, out in zip(col_refs, outs)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                for fn, *args in fut.result(): pending.add(pool.submit(fn, *args))
+    return outs
+
+def dump_firestore(credentials_path: str, project_id: str, only_col_prefixes: t.List[str]=None, max_workers: int=EXPORT_MAX_WORKERS, stats: dict=None, on_doc: t.Callable[[dict], t.Any]=None, field_paths: t.List[str]=None, db=None) -> dict:
+    """
+    Export every root collection; pass `stats` to receive wall time and RPC counts.
+    With `on_doc` documents are streamed to the callback and the returned tree stays empty.
+    Pass `db` (e.g. a fake_firestore.FakeFirestore) to export something other than the live project.
+    """
+    started = time.perf_counter(); rpc = RpcCounter()
+    if db is None:
+        cred = credentials.Certificate(credentials_path)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred, {"projectId": project_id} if project_id else None)
+        db = firestore.client()
+    db = instrumentation.instrument_firestore(db)
     root = {"_type": "firestoreDump", "projectId": project_id, "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "rootCollections": []}
-    for col in db.collections():
-        name = col.id
-        if only_col_prefixes and not any(name.startswith(pfx) for pfx in only_col_prefixes):
-            continue
-        root["rootCollections"].append(walk_collection(col))
+    rpc.add("listCollections")
+    cols = [col for col in db.collections() if not only_col_prefixes or any(col.id.startswith(pfx) for pfx in only_col_prefixes)]
+    if max_workers > 1:
+        root["rootCollections"] = walk_collections_concurrent(cols, max_workers, rpc, on_doc=on_doc, field_paths=field_paths)
+    else:
+        root["rootCollections"] = [walk_collection(col, rpc=rpc, on_doc=on_doc, field_paths=field_paths) for col in cols]
+    if stats is not None:
+        stats.update(rpc.counts); stats.update({"workers": max(1, max_workers), "wallSeconds": round(time.perf_counter() - started, 3)})
     return root
 
 def prefix_dir_name(prefix: str) -> str:
@@ -192,48 +199,20 @@ def prefix_dir_name(prefix: str) -> str:
     return p if p else "root"
 
 def list_and_download_blobs(credentials_path: str, bucket_name: str, prefixes: t.List[str], download_root: Path, max_per_prefix: int=0) -> dict:
+    """Concurrent mirror of the prefixes; objects any earlier snapshot fetched are hard-linked from the blob cache."""
     if not HAS_GCS:
         return {"_type": "storageProbe", "enabled": False, "reason": "google-cloud-storage not installed"}
-    client = gcs.Client.from_service_account_json(credentials_path)
+    client = instrumentation.instrument_storage(gcs.Client.from_service_account_json(credentials_path))
     bucket = client.bucket(bucket_name)
     report = {"_type": "storageProbe", "projectId": PROJECT_ID, "bucket": bucket.name, "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "prefixReports": []}
-    prefixes = prefixes or [""]
-    for pfx in prefixes:
-        folder = download_root / prefix_dir_name(pfx); folder.mkdir(parents=True, exist_ok=True)
-        names = []; count = 0
-        for blob in client.list_blobs(bucket.name, prefix=pfx):
-            name = blob.name; names.append(name)
-            if not name.endswith("/"):
-                dest = folder / Path(name).name; blob.download_to_filename(str(dest))
-            count += 1
-            if max_per_prefix > 0 and count >= max_per_prefix: break
-        report["prefixReports"].append({"prefix": pfx, "objectNames": names, "countListed": len(names), "truncated": (max_per_prefix > 0 and len(names) >= max_per_prefix)})
+    report["prefixReports"] = storage_transfer.download_prefixes(client, bucket, prefixes or [""], download_root, prefix_dir_name,
+                                                                 max_per_prefix, cache=blob_cache.blob_cache_for(download_root))
+    for r in report["prefixReports"]:
+        print(f"  {r['prefix'] or '/'}: {r['downloaded']} downloaded, {r['linked']} linked from cache, {r['skipped']} unchanged, {r['failed']} failed")
     return report
 
-def _walk_docs(col_dump: dict):
-    for d in col_dump.get("documents", []) or []:
-        yield d
-        for sub in d.get("_subcollections", []) or []:
-            for x in _walk_docs(sub): yield x
-
 def compute_metrics(fs_dump: dict) -> dict:
-    results = weekly_picks = 0
-    per_user_weekly = {}
-    for col in fs_dump.get("rootCollections", []):
-        for d in _walk_docs(col):
-            p = d.get("_path","")
-            if "/results/" in p: results += 1
-            if "/weeklyPicks/" in p and "/episodes/" in p:
-                weekly_picks += 1
-                # capture user id if present: seasons/<sid>/weeklyPicks/<uid>/episodes/<eid>
-                parts = p.split("/")
-                try:
-                    ui = parts.index("weeklyPicks")+1
-                    uid = parts[ui]
-                    per_user_weekly[uid] = per_user_weekly.get(uid, 0) + 1
-                except Exception:
-                    pass
-    return {"results": results, "weeklyPicks": weekly_picks, "weeklyPicksByUser": per_user_weekly}
+    return SnapshotTree.from_dump(fs_dump).metrics.as_dict()
 
 def write_summary_file(snap_dir: Path, kind: str, metrics: dict):
     lines = []
@@ -257,83 +236,333 @@ def write_summary_file(snap_dir: Path, kind: str, metrics: dict):
     cont_dir = snap_dir / "contestants_avatars"
     lines.append("")
     lines.append("## Storage (local snapshot folders)")
-    lines.append(f"- users_avatars/: {len(list(users_dir.glob('*')))} files" if users_dir.exists() else "- users_avatars/: (missing)")
-    lines.append(f"- contestants_avatars/: {len(list(cont_dir.glob('*')))} files" if cont_dir.exists() else "- contestants_avatars/: (missing)")
+    for d in (users_dir, cont_dir):
+        if not d.exists(): lines.append(f"- {d.name}/: (missing)"); continue
+        b = blob_cache.folder_bytes(d)
+        lines.append(f"- {d.name}/: {b['files']} files, {b['logicalBytes']:,} bytes logical, {b['physicalBytes']:,} bytes physical "
+                     f"(the rest is hard-linked from {blob_cache.BLOBS_DIR}/)")
 
     (snap_dir / "snapshot_summary.md").write_text("\n".join(lines), encoding="utf-8")
 
-def make_snapshot_dir(base_dir: Path, run_key: str) -> Path:
-    ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    snap_dir = base_dir / f"snapshot_{run_key}_{ts}"
-    snap_dir.mkdir(parents=True, exist_ok=True); return snap_dir
+def _print_export_stats(stats: dict):
+    print(f"Exported {stats.get('documents', 0)} docs in {stats['wallSeconds']}s "
+          f"({stats.get('stream', 0)} stream + {stats.get('collections', 0)} collections RPCs, {stats['workers']} workers).")
 
-def main():
-    base_dir = Path(SNAPSHOTS_ROOT); base_dir.mkdir(parents=True, exist_ok=True)
-    print("\n=== Snapshot Tool ===")
-    print("1) Dry — Firestore JSON only")
-    print("2) Full — Firestore JSON + download Storage blobs")
-    print("3) Only collection 'seasons'")
-    print(f"4) Only bucket: {DEFAULT_BUCKET}")
-    choice = input("\nChoose run type [1-4]: ").strip()
+def _dump_with_weekly_picks(only_col_prefixes: t.Optional[t.List[str]]) -> t.Tuple[dict, SnapshotTree, dict]:
+    """Export, index and augment in one pass; fs_dump["rootCollections"] is rebuilt from the tree."""
+    stats = {}
+    with instrumentation.phase("export"):
+        fs_dump = dump_firestore(CREDENTIALS_PATH, PROJECT_ID, only_col_prefixes, stats=stats)
+    _print_export_stats(stats)
 
-    if choice == "1":
-        fs_dump = dump_firestore(CREDENTIALS_PATH, PROJECT_ID, None)
-
-        added = augment_with_weekly_picks_via_collection_group(firestore.client(), fs_dump)
+    with instrumentation.phase("augment"):
+        tree = SnapshotTree.from_dump(fs_dump)
+        added = augment_with_weekly_picks_via_collection_group(instrumentation.instrument_firestore(firestore.client()), tree)
         if added > 0:
             print(f"Included {added} weekly-pick episode docs via collection-group (parent docs were missing).")
+            fs_dump["rootCollections"] = tree.to_dump()
+    return fs_dump, tree, stats
 
-        metrics = compute_metrics(fs_dump)
-        if metrics["results"] > 0 and metrics["weeklyPicks"] == 0:
-            print("WARNING: Results exist but no weekly picks found. VO/IM/RM scoring won't restore.")
-            if not input("Continue with dry snapshot? [y/N]: ").strip().lower().startswith("y"): return
-        snap_dir = make_snapshot_dir(base_dir, "dry")
-        storage_report = {"_type": "storageProbe", "enabled": False, "reason": "dry"}
-        (snap_dir/"snapshot.json").write_text(json.dumps({"_type":"firebaseSnapshot","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","kind":"snapshot_dry","metrics":metrics,"firestore":fs_dump,"storage":storage_report}, indent=2), encoding="utf-8")
-        write_summary_file(snap_dir, "snapshot_dry", metrics)
-        print(f"\nSnapshot (dry) saved to: {snap_dir}\n")
-
-    elif choice == "2":
-        fs_dump = dump_firestore(CREDENTIALS_PATH, PROJECT_ID, None)
-
-        added = augment_with_weekly_picks_via_collection_group(firestore.client(), fs_dump)
-        if added > 0:
-            print(f"Included {added} weekly-pick episode docs via collection-group (parent docs were missing).")
-
-        metrics = compute_metrics(fs_dump)
-        if metrics["results"] > 0 and metrics["weeklyPicks"] == 0:
-            print("WARNING: Results exist but no weekly picks found. VO/IM/RM scoring won't restore.")
-            if not input("Continue with FULL snapshot? [y/N]: ").strip().lower().startswith("y"): return
-        snap_dir = make_snapshot_dir(base_dir, "full")
-        storage_report = list_and_download_blobs(CREDENTIALS_PATH, DEFAULT_BUCKET, DEFAULT_PREFIXES, snap_dir)
-        (snap_dir/"snapshot.json").write_text(json.dumps({"_type":"firebaseSnapshot","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","kind":"snapshot_full","metrics":metrics,"firestore":fs_dump,"storage":storage_report}, indent=2), encoding="utf-8")
-        write_summary_file(snap_dir, "snapshot_full", metrics)
-        print(f"\nSnapshot (full) saved to: {snap_dir}\n")
-
-    elif choice == "3":
-        fs_dump = dump_firestore(CREDENTIALS_PATH, PROJECT_ID, ["seasons"])
-
-        added = augment_with_weekly_picks_via_collection_group(firestore.client(), fs_dump)
-        if added > 0:
-            print(f"Included {added} weekly-pick episode docs via collection-group (parent docs were missing).")
+def make_snapshot_dir(base_dir: Path, run_key: str) -> Path:
+    ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    snap_dir = base_dir / f"snapshot_{run_key}_{ts}"
+    snap_dir.mkdir(parents=True, exist_ok=True); return snap_dir
 
-        metrics = compute_metrics(fs_dump)
-        snap_dir = make_snapshot_dir(base_dir, "seasons")
-        storage_report = {"_type": "storageProbe", "enabled": False, "reason": "only_seasons"}
-        (snap_dir/"snapshot.json").write_text(json.dumps({"_type":"firebaseSnapshot","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","kind":"snapshot_seasons","metrics":metrics,"firestore":fs_dump,"storage":storage_report}, indent=2), encoding="utf-8")
-        write_summary_file(snap_dir, "snapshot_seasons", metrics)
-        print(f"\nSnapshot (only seasons) saved to: {snap_dir}\n")
+def _storage_report(snap_dir: Path, skip_reason: t.Optional[str]) -> dict:
+    if skip_reason:
+        return {"_type": "storageProbe", "enabled": False, "reason": skip_reason}
+    with instrumentation.phase("storage"):
+        return list_and_download_blobs(CREDENTIALS_PATH, DEFAULT_BUCKET, DEFAULT_PREFIXES, snap_dir)
+
+def _snapshot_nested(base_dir: Path, run_key: str, kind: str, only_col_prefixes, confirm: t.Optional[str], skip_storage: t.Optional[str]) -> t.Optional[Path]:
+    fs_dump, tree, export_stats = _dump_with_weekly_picks(only_col_prefixes)
+
+    metrics = tree.metrics.as_dict()
+    if confirm and metrics["results"] > 0 and metrics["weeklyPicks"] == 0:
+        print("WARNING: Results exist but no weekly picks found. VO/IM/RM scoring won't restore.")
+        if not input(f"Continue with {confirm} snapshot? [y/N]: ").strip().lower().startswith("y"): return None
+    snap_dir = make_snapshot_dir(base_dir, run_key)
+    storage_report = _storage_report(snap_dir, skip_storage)
+    with instrumentation.phase("encode"):
+        text = json.dumps({"_type":"firebaseSnapshot","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","kind":kind,"metrics":metrics,"exportStats":export_stats,"firestore":fs_dump,"storage":storage_report}, indent=2)
+    with instrumentation.phase("write"):
+        (snap_dir/snapshot_io.JSON_NAME).write_text(text, encoding="utf-8")
+    write_summary_file(snap_dir, kind, metrics)
+    return snap_dir
+
+def _snapshot_streaming(base_dir: Path, run_key: str, kind: str, only_col_prefixes, confirm: t.Optional[str], skip_storage: t.Optional[str]) -> t.Optional[Path]:
+    """Like _snapshot_nested, but documents go to snapshot.ndjson (or .msgpack, or shards/) as they are read."""
+    snap_dir = make_snapshot_dir(base_dir, run_key)
+    header = {"projectId": PROJECT_ID, "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "kind": kind}
+    if SNAPSHOT_FORMAT == "msgpack":
+        writer = snapshot_io.MsgpackSnapshotWriter(snap_dir / snapshot_io.MSGPACK_NAME, header)
+    elif SNAPSHOT_FORMAT == "shards":
+        writer = snapshot_io.ShardedSnapshotWriter(snap_dir, header)
+    else:
+        writer = snapshot_io.NdjsonSnapshotWriter(snap_dir / snapshot_io.NDJSON_NAME, header)
+    stats = {}
+    with instrumentation.phase("export"):
+        dump_firestore(CREDENTIALS_PATH, PROJECT_ID, only_col_prefixes, stats=stats, on_doc=writer.write_doc)
+    _print_export_stats(stats)
+
+    with instrumentation.phase("augment"):
+        added = stream_weekly_picks_via_collection_group(instrumentation.instrument_firestore(firestore.client()), writer)
+    if added > 0:
+        print(f"Included {added} weekly-pick episode docs via collection-group (parent docs were missing).")
+
+    metrics = writer.metrics.as_dict()
+    if confirm and metrics["results"] > 0 and metrics["weeklyPicks"] == 0:
+        print("WARNING: Results exist but no weekly picks found. VO/IM/RM scoring won't restore.")
+        if not input(f"Keep {confirm} snapshot? [y/N]: ").strip().lower().startswith("y"):
+            writer.close(); shutil.rmtree(snap_dir); return None
+    storage_report = _storage_report(snap_dir, skip_storage)
+    with instrumentation.phase("finalize"):
+        writer.close(storage=storage_report, extra={"exportStats": stats})
+    write_summary_file(snap_dir, kind, metrics)
+    return snap_dir
+
+def _fetch_changed(db, paths: t.List[str], store: "snapshot_store.ObjectStore", max_workers: int=EXPORT_MAX_WORKERS) -> t.Tuple[t.Dict[str, list], int, int]:
+    """Batch-get `paths` into the object store; returns ({path: [hash, updateTime]}, get_all calls, new objects)."""
+    chunks = [paths[i:i + INCREMENTAL_FETCH_CHUNK] for i in range(0, len(paths), INCREMENTAL_FETCH_CHUNK)]
+
+    def fetch(chunk):
+        out = {}; new = 0
+        for snap in db.get_all([db.document(p) for p in chunk]):
+            if not snap.exists: continue  # deleted since the metadata crawl
+            entry = _doc_to_serializable(snap)
+            digest, written = store.put(entry); new += written
+            out[entry["_path"]] = [digest, entry["_updateTime"]]
+        return out, new
+
+    fetched = {}; new_objects = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for out, new in pool.map(fetch, chunks):
+            fetched.update(out); new_objects += new
+    return fetched, len(chunks), new_objects
+
+def _scan_weekly_picks(db, on_meta: t.Callable[[dict], t.Any], retry_delay: float=0.5) -> int:
+    """
+    Name-only "episodes" collection-group scan for _snapshot_incremental. A transient
+    error resumes the scan after the last document seen; anything else (or too many
+    retries) propagates, so a manifest is never written from a partial scan.
+    """
+    last = None; attempt = 0; seen = 0
+    while True:
+        query = db.collection_group("episodes").select(NAME_ONLY).order_by("__name__")
+        if last is not None: query = query.start_after({"__name__": instrumentation.unwrap(db.document(last))})
+        try:
+            for ep in query.stream():
+                last = ep.reference.path; seen += 1
+                if "/weeklyPicks/" in last: on_meta(_serialize_episode_doc(ep, validate=False))
+            return seen
+        except Exception as e:
+            if not firestore_bulk.is_retryable(e) or attempt >= INCREMENTAL_SCAN_RETRIES: raise
+            attempt += 1
+            time.sleep(min(30.0, retry_delay * 2 ** (attempt - 1)))
+
+def _snapshot_incremental(base_dir: Path, only_col_prefixes=None, db=None) -> t.Optional[Path]:
+    """
+    Name-only crawl for update times, then fetch just the documents whose _updateTime
+    differs from the latest manifest. Bodies go to the shared object store and the new
+    folder only holds manifest.json. Firestore cannot filter on update time server-side,
+    so the crawl still lists every document, but without transferring field data.
+    Only the refetched documents are schema-checked. Pass `db` to run against a fake.
+    """
+    started = time.perf_counter()
+    prev_path = snapshot_store.latest_manifest(base_dir)
+    prev = snapshot_store.load_manifest(prev_path) if prev_path else {"documents": {}, "collections": {}}
+    prev_docs = prev["documents"]
+
+    seen: t.Dict[str, str] = {}; lock = threading.Lock()
+    def on_meta(entry):
+        with lock: seen.setdefault(entry["_path"], entry["_updateTime"])
+    stats = {}
+    with instrumentation.phase("scan"):
+        dump_firestore(CREDENTIALS_PATH, PROJECT_ID, only_col_prefixes, stats=stats, on_doc=on_meta, field_paths=NAME_ONLY, db=db)
+        db = instrumentation.instrument_firestore(db if db is not None else firestore.client())
+        _scan_weekly_picks(db, on_meta)
+
+    snap_dir = make_snapshot_dir(base_dir, "incremental")
+    store = snapshot_store.object_store_for(snap_dir)
+    changed = [p for p, ut in seen.items() if not (p in prev_docs and prev_docs[p][1] == ut and store.exists(prev_docs[p][0]))]
+    with instrumentation.phase("fetch"):
+        fetched, calls, new_objects = _fetch_changed(db, changed, store)
+    documents = {p: fetched[p] if p in fetched else prev_docs[p] for p in seen if p in fetched or p not in changed}
+
+    metrics = MetricsAccumulator()
+    for p in documents: metrics.add(p)
+    roots = list(dict.fromkeys(p.split("/", 1)[0] for p in documents))
+    changes = {"added": sum(1 for p in fetched if p not in prev_docs), "modified": sum(1 for p in fetched if p in prev_docs),
+               "removed": sum(1 for p in prev_docs if p not in documents), "unchanged": len(documents) - len(fetched)}
+    stats.update({"batchGetDocuments": calls, "newObjects": new_objects, "wallSeconds": round(time.perf_counter() - started, 3)})
+    header = {"projectId": PROJECT_ID, "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "kind": "snapshot_incremental",
+              "base": prev_path.parent.name if prev_path else None, "metrics": metrics.as_dict(), "rootCollections": roots,
+              "storage": {"_type": "storageProbe", "enabled": False, "reason": "incremental"}, "changes": changes, "exportStats": stats}
+    with instrumentation.phase("manifest"):
+        manifest = snapshot_store.write_manifest(snap_dir, header, documents)
+    write_summary_file(snap_dir, "snapshot_incremental", metrics.as_dict())
+
+    print(f"Scanned {len(seen)} docs in {stats['wallSeconds']}s; fetched {len(fetched)} changed docs in {calls} batch gets, {new_objects} new objects.")
+    print(f"  +{changes['added']} added, ~{changes['modified']} modified, -{changes['removed']} removed, {changes['unchanged']} unchanged"
+          f" (base: {header['base'] or 'none, full baseline'})")
+    dirty = snapshot_store.changed_collections(prev, manifest)
+    if prev_path and dirty:
+        print(f"  Changed collections ({len(dirty)}): {', '.join(dirty[:8])}{' ...' if len(dirty) > 8 else ''}")
+    return snap_dir
+
+def _snapshot_paged(base_dir: Path, only_col_prefixes=None) -> t.Optional[Path]:
+    """
+    Paged crawl at one pinned read time, checkpointed after every page (see paged_export).
+    Picks up an interrupted run when there is one and the user agrees to resume it.
+    """
+    pending = [d for d in sorted(base_dir.iterdir()) if d.is_dir() and paged_export.has_checkpoint(d)]
+    snap_dir = None
+    if pending and input(f"Resume the interrupted export in {pending[-1].name}? [Y/n]: ").strip().lower() != "n":
+        snap_dir = pending[-1]
+    if snap_dir is None: snap_dir = make_snapshot_dir(base_dir, "paged")
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+    db = instrumentation.instrument_firestore(firestore.client())
+    header = {"projectId": PROJECT_ID, "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "kind": "snapshot_paged"}
+    started = time.perf_counter()
+    try:
+        export = paged_export.PagedExport(db, snap_dir, header, only_col_prefixes)
+    except ValueError as e:
+        print(f"Cannot resume: {e}"); return None
+    with instrumentation.phase("export"):
+        try:
+            stats = export.run()
+        except Exception as e:
+            print(f"Export stopped after {export.stats['documents']} docs ({type(e).__name__}: {e}). Run option 9 again to resume from the last page.")
+            return None
+    stats = {**stats, "pageSize": export.page_size, "wallSeconds": round(time.perf_counter() - started, 3)}
+    with instrumentation.phase("finalize"):
+        export.close(storage={"_type": "storageProbe", "enabled": False, "reason": "paged"}, extra={"exportStats": stats})
+    write_summary_file(snap_dir, "snapshot_paged", export.writer.metrics.as_dict())
+    print(f"Exported {stats['documents']} docs as of {export.read_time.isoformat()} in {stats['pages']} pages of {export.page_size} "
+          f"({stats['retries']} retries, {stats['resumes']} resumes).")
+    return snap_dir
+
+def _choose_snapshot_dir(base_dir: Path, prefix: str="snapshot_") -> t.Optional[Path]:
+    dirs = [d for d in sorted(base_dir.iterdir()) if d.is_dir() and d.name.startswith(prefix)]
+    if not dirs:
+        print("No snapshot folders found."); return None
+    for i, d in enumerate(dirs, 1): print(f"  {i}) {d.name}")
+    try:
+        return dirs[int(input("Select snapshot number: ").strip()) - 1]
+    except Exception:
+        print("Invalid selection."); return None
+
+def _convert_snapshot(snap_dir: Path):
+    present = snapshot_io.available_formats(snap_dir)
+    print(f"Formats present: {', '.join(present) or '(none)'}")
+    target = input("Convert to [json/ndjson/msgpack/shards]: ").strip().lower()
+    if target not in ("json", "ndjson", "msgpack", "shards"): print("Unknown format."); return
+    if target == "msgpack" and not snapshot_io.HAS_MSGPACK: print("msgpack is not installed."); return
+    if target in present and not input(f"{snapshot_io.FORMAT_FILES[target]} exists. Rebuild it? [y/N]: ").strip().lower().startswith("y"): return
+    started = time.perf_counter()
+    out = snapshot_io.convert_snapshot(snap_dir, target)
+    print(f"Wrote {out} in {time.perf_counter() - started:.2f}s")
+
+def _benchmark_formats(snap_dir: Path):
+    print(f"{'format':<8} {'docs':>7} {'bytes':>12} {'dump s':>8} {'load s':>8}")
+    for r in snapshot_io.benchmark_formats(snap_dir):
+        print(f"{r['format']:<8} {r['documents']:>7} {r['bytes']:>12} {r['dumpSeconds']:>8} {r['loadSeconds']:>8}")
+
+def _collect_garbage(base_dir: Path):
+    if input("First replace avatar copies in older snapshot folders with links into the cache? [y/N]: ").strip().lower().startswith("y"):
+        cache = blob_cache.BlobCache(base_dir / blob_cache.BLOBS_DIR); freed = 0
+        for d in sorted(base_dir.iterdir()):
+            if not (d.is_dir() and d.name.startswith("snapshot_")): continue
+            for p in DEFAULT_PREFIXES: freed += blob_cache.import_folder(cache, d / prefix_dir_name(p), storage_transfer.local_checksums)["bytesFreed"]
+        print(f"  Freed {freed:,} bytes of duplicate avatars")
+    plan = blob_cache.collect_garbage(base_dir, dry_run=True)
+    for kind in ("blobs", "objects"):
+        r = plan[kind]; print(f"  {kind}: {r['removed']} removable ({r['bytes']:,} bytes), {r['kept']} kept")
+    if not (plan["blobs"]["removed"] or plan["objects"]["removed"]): return
+    if input("Delete them? [y/N]: ").strip().lower().startswith("y"):
+        done = blob_cache.collect_garbage(base_dir)
+        print(f"  Removed {done['blobs']['removed']} blobs and {done['objects']['removed']} objects "
+              f"({done['blobs']['bytes'] + done['objects']['bytes']:,} bytes)")
+
+def _run_choice(base_dir: Path, choice: str) -> t.Optional[Path]:
+    """Runs one menu entry; returns the snapshot folder a run (1-4, 6, 9) produced."""
+    # choice: (run_key, kind, root prefixes, label, confirm wording, reason Storage is skipped)
+    firestore_runs = {
+        "1": ("dry", "snapshot_dry", None, "dry", "dry", "dry"),
+        "2": ("full", "snapshot_full", None, "full", "FULL", None),
+        "3": ("seasons", "snapshot_seasons", ["seasons"], "only seasons", None, "only_seasons"),
+    }
+    if choice in firestore_runs:
+        run_key, kind, only, label, confirm, skip_storage = firestore_runs[choice]
+        run = _snapshot_streaming if SNAPSHOT_FORMAT in ("ndjson", "msgpack", "shards") else _snapshot_nested
+        snap_dir = run(base_dir, run_key, kind, only, confirm, skip_storage)
+        if snap_dir: print(f"\nSnapshot ({label}) saved to: {snap_dir}\n")
+        return snap_dir
 
     elif choice == "4":
         prefixes = input(f"Enter prefixes (comma sep) [default: {', '.join(DEFAULT_PREFIXES)}]: ").strip()
         pfx_list = [p.strip() if p.strip().endswith('/') else p.strip() + '/' for p in prefixes.split(",")] if prefixes else DEFAULT_PREFIXES
-        snap_dir = make_snapshot_dir(base_dir, "bucket")
-        storage_report = list_and_download_blobs(CREDENTIALS_PATH, DEFAULT_BUCKET, pfx_list, snap_dir)
+        resume = input("Resume an interrupted bucket snapshot folder? [y/N]: ").strip().lower().startswith("y")
+        # only bucket-only folders: their snapshot.json and summary are rewritten below
+        snap_dir = _choose_snapshot_dir(base_dir, "snapshot_bucket_") if resume else make_snapshot_dir(base_dir, "bucket")
+        if not snap_dir: return
+        with instrumentation.phase("storage"):
+            storage_report = list_and_download_blobs(CREDENTIALS_PATH, DEFAULT_BUCKET, pfx_list, snap_dir)
         (snap_dir/"snapshot.json").write_text(json.dumps({"_type":"firebaseSnapshot","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","kind":"snapshot_only_bucket","metrics":{"results":0,"seasonPicks":0,"weeklyPicks":0},"firestore":{"_type":"firestoreDump","projectId":PROJECT_ID,"exportedAt":dt.datetime.utcnow().isoformat()+"Z","rootCollections":[]},"storage":storage_report}, indent=2), encoding="utf-8")
         write_summary_file(snap_dir, "snapshot_only_bucket", {"results":0,"seasonPicks":0,"weeklyPicks":0,"weeklyPicksByUser":{}})
         print(f"\nSnapshot (only bucket) saved to: {snap_dir}\n")
+        return snap_dir
+
+    elif choice == "5":
+        snap_dir = _choose_snapshot_dir(base_dir)
+        if snap_dir: _convert_snapshot(snap_dir)
+    elif choice == "6":
+        snap_dir = _snapshot_incremental(base_dir)
+        if snap_dir: print(f"\nSnapshot (incremental) saved to: {snap_dir}\n")
+        return snap_dir
+    elif choice == "7":
+        snap_dir = _choose_snapshot_dir(base_dir)
+        if snap_dir: _benchmark_formats(snap_dir)
+    elif choice == "8":
+        _collect_garbage(base_dir)
+    elif choice == "9":
+        snap_dir = _snapshot_paged(base_dir)
+        if snap_dir: print(f"\nSnapshot (paged) saved to: {snap_dir}\n")
+        return snap_dir
     else:
         print("Unknown choice.")
+    return None
+
+def _report_schema(snap_dir: Path, report: firestore_codec.SchemaReport):
+    checked = sum(report.checked.values()); failed = sum(report.failed.values())
+    print(f"Schema check: {failed} of {checked} known documents do not match the app's payload types")
+    for sample in report.samples[:5]: print(f"  {sample}")
+    summary = snap_dir / "snapshot_summary.md"
+    if summary.exists():
+        with open(summary, "a", encoding="utf-8") as fh: fh.write("\n".join(report.summary_lines()) + "\n")
+
+def main():
+    base_dir = Path(SNAPSHOTS_ROOT); base_dir.mkdir(parents=True, exist_ok=True)
+    print("\n=== Snapshot Tool ===")
+    print(f"(Firestore snapshots are written as {snapshot_io.FORMAT_FILES.get(SNAPSHOT_FORMAT, snapshot_io.JSON_NAME)})")
+    print("1) Dry — Firestore JSON only")
+    print("2) Full — Firestore JSON + download Storage blobs")
+    print("3) Only collection 'seasons'")
+    print(f"4) Only bucket: {DEFAULT_BUCKET}")
+    print("5) Convert a snapshot between snapshot.json, snapshot.ndjson and snapshot.msgpack")
+    print("6) Incremental — Firestore only, store just the docs changed since the last incremental snapshot")
+    print("7) Benchmark load/dump of the snapshot formats on a snapshot")
+    print(f"8) Garbage-collect the blob cache and object store (unreferenced for {blob_cache.BLOB_RETENTION_DAYS}+ days)")
+    print(f"9) Paged — Firestore only, consistent as of one read time, resumable after a failure ({paged_export.PAGE_SIZE} docs per page)")
+    choice = input("\nChoose run type [1-9]: ").strip()
+    with instrumentation.profiling(PROFILE_RUNS and choice in ("1", "2", "3", "4", "6", "9"), PROFILE_CPROFILE) as prof, \
+            firestore_codec.validating(VALIDATE_SCHEMAS) as schema:
+        snap_dir = _run_choice(base_dir, choice)
+    if schema and snap_dir and schema.checked: _report_schema(snap_dir, schema)
+    if prof and snap_dir:
+        out = prof.save(snap_dir); data = prof.as_dict()
+        print(f"Profile: {data['wallSeconds']}s, {data['billable']['reads']} billable reads, {data['billable']['writes']} writes -> {out}")
 
 if __name__ == "__main__":
     main()
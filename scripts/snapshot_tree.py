@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Path-indexed in-memory snapshot tree shared by snapshot_tool and seed_tool.
+
+Every document and collection is reachable by its full path in O(1), missing
+parents (e.g. weeklyPicks/<uid> docs that only exist as a container for
+episodes/*) are created on demand as synthetic nodes, and the snapshot
+metrics are kept up to date as documents are inserted, so building the tree,
+collection-group augmentation and metrics are a single pass.
+"""
+import typing as t
+
+class MetricsAccumulator:
+    """Results / weekly-pick counts, fed one document path at a time."""
+    __slots__ = ("results", "weekly_picks", "by_user")
+
+    def __init__(self):
+        self.results = 0; self.weekly_picks = 0; self.by_user = {}
+
+    def add(self, path: str):
+        if "/results/" in path: self.results += 1
+        if "/weeklyPicks/" in path and "/episodes/" in path:
+            self.weekly_picks += 1
+            # seasons/<sid>/weeklyPicks/<uid>/episodes/<eid>
+            parts = path.split("/")
+            try:
+                uid = parts[parts.index("weeklyPicks") + 1]
+                self.by_user[uid] = self.by_user.get(uid, 0) + 1
+            except Exception:
+                pass
+
+    def as_dict(self) -> dict:
+        return {"results": self.results, "weeklyPicks": self.weekly_picks, "weeklyPicksByUser": dict(self.by_user)}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "MetricsAccumulator":
+        m = cls(); m.results = d["results"]; m.weekly_picks = d["weeklyPicks"]; m.by_user = dict(d["weeklyPicksByUser"])
+        return m
+
+class DocNode:
+    __slots__ = ("path", "create_time", "update_time", "fields", "subcollections", "synthetic")
+
+    def __init__(self, path: str, fields: dict, create_time=None, update_time=None, synthetic: bool=False):
+        self.path = path; self.fields = fields; self.create_time = create_time; self.update_time = update_time
+        self.subcollections: t.Optional[t.Dict[str, "CollectionNode"]] = None; self.synthetic = synthetic
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def entry(self) -> dict:
+        """Flat snapshot entry (the per-line shape of snapshot.ndjson, plus _id)."""
+        return {"_id": self.id, "_path": self.path, "_createTime": self.create_time, "_updateTime": self.update_time, "fields": self.fields}
+
+class CollectionNode:
+    __slots__ = ("path", "docs")
+
+    def __init__(self, path: str):
+        self.path = path; self.docs: t.Dict[str, DocNode] = {}  # doc id -> node, in insertion order
+
+class SnapshotTree:
+    def __init__(self):
+        self.roots: t.Dict[str, CollectionNode] = {}
+        self.docs: t.Dict[str, DocNode] = {}
+        self.collections: t.Dict[str, CollectionNode] = {}
+        self.metrics = MetricsAccumulator()
+
+    @classmethod
+    def from_dump(cls, fs_dump: dict) -> "SnapshotTree":
+        tree = cls()
+        stack = list(reversed(fs_dump.get("rootCollections", []) or []))
+        while stack:
+            col = stack.pop()
+            tree.collection(col.get("_collection", ""))
+            for d in col.get("documents", []) or []:
+                tree.add_entry(d)
+            # push in reverse so subcollections keep their listing order
+            for d in reversed(col.get("documents", []) or []):
+                stack.extend(reversed(d.get("_subcollections", []) or []))
+        return tree
+
+    @classmethod
+    def from_entries(cls, entries: t.Iterable[dict]) -> "SnapshotTree":
+        tree = cls()
+        for e in entries: tree.add_entry(e)
+        return tree
+
+    # ---- lookup
+    def doc(self, path: str) -> t.Optional[DocNode]:
+        return self.docs.get(path)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.docs
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ---- insertion
+    def collection(self, col_path: str) -> CollectionNode:
+        col = self.collections.get(col_path)
+        if col is None:
+            col = self.collections[col_path] = CollectionNode(col_path)
+            if "/" in col_path:
+                owner = self.ensure_doc(col_path.rsplit("/", 1)[0])
+                if owner.subcollections is None: owner.subcollections = {}
+                owner.subcollections[col_path.rsplit("/", 1)[-1]] = col
+            else:
+                self.roots[col_path] = col
+        return col
+
+    def ensure_doc(self, path: str) -> DocNode:
+        """Existing node, or an empty synthetic one so children can hang under it."""
+        node = self.docs.get(path)
+        if node is None:
+            node = self.docs[path] = DocNode(path, {}, synthetic=True)
+            col_path, doc_id = path.rsplit("/", 1)
+            self.collection(col_path).docs[doc_id] = node
+        return node
+
+    def add(self, path: str, fields: dict, create_time=None, update_time=None) -> bool:
+        """Insert or overwrite a document; returns True if it was not already a real document."""
+        node = self.docs.get(path)
+        if node is not None and not node.synthetic:
+            node.fields = fields; node.create_time = create_time; node.update_time = update_time
+            return False
+        node = self.ensure_doc(path)
+        node.fields = fields; node.create_time = create_time; node.update_time = update_time; node.synthetic = False
+        self.metrics.add(path)
+        return True
+
+    def add_entry(self, entry: dict) -> bool:
+        if entry.get("_createTime") is None and not entry.get("fields"):
+            # synthetic parent written by an earlier export; real documents always have a create time
+            self.ensure_doc(entry["_path"]); return False
+        return self.add(entry["_path"], entry.get("fields", {}), entry.get("_createTime"), entry.get("_updateTime"))
+
+    # ---- output
+    def iter_nodes(self, include_synthetic: bool=True) -> t.Iterator[DocNode]:
+        """Documents parents-first, in insertion order."""
+        stack = [iter(list(self.roots.values()))]
+        while stack:
+            col = next(stack[-1], None)
+            if col is None:
+                stack.pop(); continue
+            docs = []
+            for node in col.docs.values():
+                if include_synthetic or not node.synthetic: yield node
+                docs.append(node)
+            subs = [c for n in docs if n.subcollections for c in n.subcollections.values()]
+            if subs: stack.append(iter(subs))
+
+    def iter_entries(self, include_synthetic: bool=True) -> t.Iterator[dict]:
+        for node in self.iter_nodes(include_synthetic): yield node.entry()
+
+    def to_dump(self) -> t.List[dict]:
+        """rootCollections in the nested snapshot.json shape; synthetic parents are emitted as empty docs."""
+        def col_dict(col: CollectionNode) -> dict:
+            out = {"_collection": col.path, "documents": []}
+            for node in col.docs.values():
+                entry = node.entry()
+                if node.subcollections:
+                    entry["_subcollections"] = [col_dict(c) for c in node.subcollections.values()]
+                out["documents"].append(entry)
+            return out
+        return [col_dict(c) for c in self.roots.values()]
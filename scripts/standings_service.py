@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Keeps seasons/{id}/standings/current up to date so clients can read the table in
+one fetch instead of streaming every result and weekly pick.
+
+Listens (on_snapshot) to the season's phases, results, users and state, plus the
+"episodes" collection group for weekly picks, and applies each change to an
+in-memory copy of the season:
+
+  - a weekly pick rescores just that user x episode;
+  - a result or phase change rebuilds the per-episode plans (cheap: no user data)
+    and rescores only the episodes whose plan actually changed -- the edited
+    episode, plus later auto-scored ones when its votedOut list moved;
+  - user totals are adjusted by the difference, never re-summed.
+
+The published document is the leaderboard scoring_engine.build_leaderboard
+produces, minus the per-episode breakdown. It is only rewritten when it changes.
+Works against the live project, the emulator, or fake_firestore.FakeFirestore.
+"""
+import datetime as dt, threading, time, typing as t
+from pathlib import Path
+
+CREDENTIALS_PATH = "/Users/zachariasalad/Desktop/firestore-tools/service-account.json"
+PROJECT_ID = "survivus1514"
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+STANDINGS_COLLECTION = "standings"
+STANDINGS_DOC_ID = "current"
+FAKE_RPC_LATENCY = 0.05  # seconds per RPC when measuring against fake_firestore
+
+import scoring_engine
+from scoring_engine import EpisodeResult, Phase, ScoringEngine, SeasonData, WeeklyPicks, rank_rows, season_plans, table_columns
+
+_WATCHED = ("phases", "results", "users", "state")
+
+def _percentile(values: t.List[float], q: float) -> t.Optional[float]:
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class StandingsMaterializer:
+    def __init__(self, db, season_id: str):
+        self.db = db; self.season_id = season_id; self.season = SeasonData(season_id)
+        self._prefix = f"seasons/{season_id}/"
+        self._season_ref = db.collection("seasons").document(season_id)
+        self._phases: t.Dict[str, Phase] = {}                           # phase doc id -> phase
+        self._plans: t.Dict[int, list] = {}                              # scored episode -> plan
+        self._points: t.Dict[str, t.Dict[int, t.Dict[str, int]]] = {}    # user -> scored episode with picks -> points
+        self._totals: t.Dict[str, t.Dict[str, t.List[int]]] = {}         # user -> column -> [sum, contributing episodes]
+        self._lock = threading.RLock(); self._watches = []; self._waiting: t.Set[str] = set()
+        self._published: t.Optional[dict] = None
+        self.latencies_ms: t.Dict[str, t.List[float]] = {"results": [], "weeklyPicks": [], "other": []}
+        self.stats = {"events": 0, "rescored": 0, "planRebuilds": 0, "published": 0, "unchanged": 0}
+
+    # -- listeners
+    def start(self):
+        self._waiting = set(_WATCHED) | {"weeklyPicks"}
+        queries = [(name, self._season_ref.collection(name)) for name in _WATCHED] + [("weeklyPicks", self.db.collection_group("episodes"))]
+        for name, query in queries: self._watches.append(query.on_snapshot(self._listener(name)))
+        return self
+
+    def stop(self):
+        for watch in self._watches: watch.unsubscribe()
+        self._watches = []
+
+    def _listener(self, name: str):
+        def on_snapshot(docs, changes, read_time):
+            with self._lock:
+                initial = bool(self._waiting)
+                saved = [c.document.update_time for c in changes if c.type.name != "REMOVED" and c.document.update_time]
+                relevant = self.apply_changes((c.document.reference.path, None if c.type.name == "REMOVED" else c.document.to_dict() or {}) for c in changes)
+                self._waiting.discard(name)
+                if self._waiting or (not relevant and not initial): return
+                self.publish()
+                if not initial and saved:
+                    ms = (dt.datetime.now(dt.timezone.utc) - min(saved)).total_seconds() * 1000
+                    self.latencies_ms[name if name in self.latencies_ms else "other"].append(ms)
+        return on_snapshot
+
+    # -- applying changes
+    def apply_changes(self, changes: t.Iterable[t.Tuple[str, t.Optional[dict]]]) -> bool:
+        """(path, fields or None when deleted) -> season state; returns False if nothing here was touched."""
+        rebuild = False; picks = []; touched = False
+        with self._lock:
+            for path, fields in changes:
+                if not path.startswith(self._prefix): continue
+                parts = path[len(self._prefix):].split("/"); touched = True; self.stats["events"] += 1
+                if len(parts) == 2 and parts[0] == "phases":
+                    phase = Phase.from_doc(parts[1], fields) if fields is not None else None
+                    if phase: self._phases[parts[1]] = phase
+                    else: self._phases.pop(parts[1], None)
+                    self.season.set_phases(self._phases.values()); rebuild = True
+                elif len(parts) == 2 and parts[0] == "results":
+                    eid = scoring_engine.int_id(parts[1])
+                    if eid is None: continue
+                    result = EpisodeResult.from_doc(parts[1], fields) if fields is not None else None
+                    if result: self.season.results[eid] = result
+                    else: self.season.results.pop(eid, None)
+                    rebuild = True
+                elif len(parts) == 2 and parts[0] == "users":
+                    users = [u for u in self.season.users if u["id"] != parts[1]]
+                    if fields and isinstance(fields.get("displayName"), str): users.append({"id": parts[1], "displayName": fields["displayName"]})
+                    self.season.users = sorted(users, key=lambda u: u["displayName"])
+                elif parts == ["state", "current"]:
+                    self.season.activated_phase_ids = {u for u in map(scoring_engine.uuid_string, (fields or {}).get("activatedPhaseIds") or []) if u}
+                elif len(parts) == 4 and parts[0] == "weeklyPicks" and parts[2] == "episodes":
+                    weekly = WeeklyPicks.from_doc(parts[1], parts[3], fields) if fields is not None else None
+                    eid = weekly.episode_id if weekly else scoring_engine.int_id(parts[3])
+                    if eid is None: continue
+                    if weekly: self.season.picks.setdefault(parts[1], {})[eid] = weekly
+                    else: self.season.picks.get(parts[1], {}).pop(eid, None)
+                    picks.append((parts[1], eid))
+            if rebuild: self._rebuild_plans()
+            for user_id, eid in picks: self._rescore(user_id, eid)
+        return touched
+
+    def _rebuild_plans(self):
+        self.stats["planRebuilds"] += 1
+        plans = season_plans(self.season, ScoringEngine(self.season.results))
+        stale = [eid for eid in set(plans) | set(self._plans) if plans.get(eid) != self._plans.get(eid)]
+        self._plans = plans
+        for eid in stale:
+            for user_id in {u for u, by_episode in self.season.picks.items() if eid in by_episode} | {u for u, pts in self._points.items() if eid in pts}:
+                self._rescore(user_id, eid)
+
+    def _rescore(self, user_id: str, eid: int):
+        weekly = self.season.picks.get(user_id, {}).get(eid); plan = self._plans.get(eid)
+        points = self._points.setdefault(user_id, {}); totals = self._totals.setdefault(user_id, {})
+        for column, n in points.pop(eid, {}).items():
+            entry = totals[column]; entry[0] -= n; entry[1] -= 1
+            if not entry[1]: del totals[column]
+        if weekly is None or eid not in self._plans: return
+        self.stats["rescored"] += 1
+        points[eid] = new = ScoringEngine.apply_plan(plan, weekly)
+        for column, n in new.items():
+            entry = totals.setdefault(column, [0, 0]); entry[0] += n; entry[1] += 1
+
+    # -- output
+    def standings(self) -> dict:
+        with self._lock:
+            rows = []
+            for user in self.season.users:
+                totals = {column: entry[0] for column, entry in self._totals.get(user["id"], {}).items()}
+                rows.append({"userId": user["id"], "displayName": user["displayName"], "total": sum(totals.values()),
+                             "weeksParticipated": len(self._points.get(user["id"], {})), "categoryPointsByColumnId": totals})
+            return {"seasonId": self.season_id, "scoredEpisodes": list(self._plans), "columns": table_columns(self.season), "rows": rank_rows(rows)}
+
+    def publish(self) -> bool:
+        """Write the standings document if it differs from the last one written."""
+        with self._lock:
+            doc = self.standings()
+            if doc == self._published:
+                self.stats["unchanged"] += 1; return False
+            self._season_ref.collection(STANDINGS_COLLECTION).document(STANDINGS_DOC_ID).set({**doc, "updatedAt": dt.datetime.now(dt.timezone.utc)})
+            self._published = doc; self.stats["published"] += 1
+            return True
+
+    def latency_summary(self) -> dict:
+        return {name: {"count": len(v), "p50Ms": _percentile(v, 0.5), "p95Ms": _percentile(v, 0.95), "maxMs": max(v) if v else None}
+                for name, v in self.latencies_ms.items() if v}
+
+def _print_summary(service: StandingsMaterializer):
+    for name, s in service.latency_summary().items():
+        print(f"  {name:<12} n={s['count']:<5} p50={s['p50Ms']:.1f}ms p95={s['p95Ms']:.1f}ms max={s['maxMs']:.1f}ms")
+    print(f"  {service.stats}")
+
+def measure_with_fake(entries: t.List[dict], season_id: str, latency: float=FAKE_RPC_LATENCY) -> dict:
+    """Replay the season's results through a fake project and time save -> standings updated."""
+    from fake_firestore import FakeFirestore
+    db = FakeFirestore(latency=latency)
+    db.load({e["_path"]: e.get("fields") or {} for e in entries})
+    service = StandingsMaterializer(db, season_id).start()
+    try:
+        prefix = f"seasons/{season_id}/results/"
+        for path in sorted((p for p in db.paths() if p.startswith(prefix)), key=lambda p: scoring_engine.int_id(p.rsplit("/", 1)[1]) or 0):
+            fields = db.data(path); db.document(path).set({**fields, "votedOut": []}); db.document(path).set(fields)
+        expected = scoring_engine.build_leaderboard(SeasonData.from_entries(entries, season_id))
+        got = db.data(f"seasons/{season_id}/{STANDINGS_COLLECTION}/{STANDINGS_DOC_ID}")
+        matches = [(r["userId"], r["total"]) for r in expected["rows"]] == [(r["userId"], r["total"]) for r in got["rows"]]
+    finally:
+        service.stop()
+    return {"service": service, "matchesBatch": matches}
+
+def main():
+    print("\n=== Standings Service ===")
+    print("1) Watch the live project and keep standings current (Ctrl-C to stop)")
+    print("2) Measure update latency against an in-process fake loaded from a snapshot")
+    choice = input("Choose [1-2]: ").strip()
+    if choice == "1":
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps: firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH), {"projectId": PROJECT_ID})
+        db = firestore.client()
+        season_id = scoring_engine.choose_season(sorted(d.id for d in db.collection("seasons").stream()))
+        if not season_id: return
+        service = StandingsMaterializer(db, season_id).start()
+        print(f"Watching seasons/{season_id}; standings -> seasons/{season_id}/{STANDINGS_COLLECTION}/{STANDINGS_DOC_ID}")
+        try:
+            while True: time.sleep(1)
+        except KeyboardInterrupt:
+            service.stop()
+        _print_summary(service)
+    elif choice == "2":
+        snap_dir = scoring_engine.choose_snapshot_dir(Path(SNAPSHOTS_ROOT))
+        if not snap_dir: return
+        entries = scoring_engine.snapshot_entries(snap_dir)
+        season_id = scoring_engine.choose_season(scoring_engine.season_ids(entries))
+        if not season_id: return
+        report = measure_with_fake(entries, season_id)
+        print(f"\nStandings match a full rebuild: {report['matchesBatch']}")
+        _print_summary(report["service"])
+    else:
+        print("Unknown choice.")
+
+if __name__ == "__main__":
+    main()
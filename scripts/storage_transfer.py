@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Concurrent, checksum-aware Storage transfers for snapshot_tool and seed_tool.
+
+Objects whose local copy already matches the blob (crc32c when google_crc32c is
+available, otherwise md5; composite objects only carry crc32c) are not transferred
+again. Finished transfers are appended to transfer_log.jsonl in the snapshot
+folder, so an interrupted run resumed into the same folder only redoes what
+is missing, without re-hashing files it already verified. With a blob_cache.BlobCache,
+downloads become hard links to objects any earlier snapshot already fetched.
+"""
+import base64, hashlib, json, os, threading, typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import google_crc32c
+    HAS_CRC32C = True
+except Exception:
+    HAS_CRC32C = False
+
+TRANSFER_MAX_WORKERS = 16
+TRANSFER_LOG_NAME = "transfer_log.jsonl"
+_CHUNK = 1 << 20
+
+def local_checksums(path: Path) -> dict:
+    """Base64 digests in the same encoding as Blob.md5_hash / Blob.crc32c."""
+    md5 = hashlib.md5(); crc = google_crc32c.Checksum() if HAS_CRC32C else None
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            md5.update(chunk)
+            if crc is not None: crc.update(chunk)
+    out = {"md5": base64.b64encode(md5.digest()).decode("ascii")}
+    if crc is not None: out["crc32c"] = base64.b64encode(crc.digest()).decode("ascii")
+    return out
+
+def blob_checksums(blob) -> dict:
+    return {k: v for k, v in (("md5", getattr(blob, "md5_hash", None)), ("crc32c", getattr(blob, "crc32c", None))) if v}
+
+def same_content(local: dict, remote: dict) -> bool:
+    for key in ("crc32c", "md5"):
+        if key in local and key in remote: return local[key] == remote[key]
+    return False
+
+class TransferLog:
+    """Append-only record of completed transfers: {"op", "name", "size", checksums...}."""
+    def __init__(self, path: Path):
+        self.path = path; self._lock = threading.Lock(); self.done: t.Dict[t.Tuple[str, str], dict] = {}
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                self.done[(rec["op"], rec["name"])] = rec
+
+    def verified(self, op: str, name: str, remote: t.Optional[dict], local_path: Path) -> bool:
+        """
+        True if an earlier run already moved this exact object and the local file is intact.
+        With remote=None (uploads, checked before the bucket is listed) the file must still
+        have the mtime recorded with it, so nothing is hashed.
+        """
+        rec = self.done.get((op, name))
+        if not rec or not local_path.exists(): return False
+        st = local_path.stat()
+        if st.st_size != rec.get("size"): return False
+        if remote is None: return rec.get("mtimeNs") == st.st_mtime_ns
+        return same_content(rec, remote)
+
+    def record(self, op: str, name: str, size: int, checksums: dict, mtime_ns: t.Optional[int]=None):
+        rec = {"op": op, "name": name, "size": size, **checksums}
+        if mtime_ns is not None: rec["mtimeNs"] = mtime_ns
+        with self._lock:
+            self.done[(op, name)] = rec
+            with open(self.path, "a", encoding="utf-8") as fh: fh.write(json.dumps(rec) + "\n")
+
+def _share(cache, key: t.Optional[str], dest: Path):
+    """Make a verified local file a link into the cache (adding it to the cache if it is new)."""
+    if cache is None or key is None: return
+    if cache.has(key): cache.link(key, dest)
+    else: cache.adopt(dest, key)
+
+def _download_one(blob, dest: Path, log: TransferLog, cache) -> str:
+    remote = blob_checksums(blob); key = cache.key_for(remote, blob.size) if cache is not None else None
+    if log.verified("download", blob.name, remote, dest):
+        _share(cache, key, dest); return "skipped"
+    if dest.exists() and same_content(local_checksums(dest), remote):
+        _share(cache, key, dest); log.record("download", blob.name, dest.stat().st_size, remote); return "skipped"
+    if key is not None and cache.link(key, dest):
+        log.record("download", blob.name, dest.stat().st_size, remote); return "linked"
+    tmp = dest.with_name(dest.name + ".part")
+    blob.download_to_filename(str(tmp)); os.replace(tmp, dest)
+    if key is not None and same_content(local_checksums(dest), remote): cache.adopt(dest, key)  # only verified bytes enter the cache
+    log.record("download", blob.name, dest.stat().st_size, remote)
+    return "downloaded"
+
+def download_prefixes(client, bucket, prefixes: t.List[str], download_root: Path, dir_name: t.Callable[[str], str],
+                      max_per_prefix: int=0, cache=None, max_workers: int=TRANSFER_MAX_WORKERS) -> t.List[dict]:
+    """
+    Mirror each prefix into download_root/<dir_name(prefix)>/ (flat file names, as before).
+    Objects already in `cache` (a blob_cache.BlobCache) are hard-linked instead of
+    downloaded, and new downloads are added to it. Returns one report per prefix.
+    """
+    log = TransferLog(download_root / TRANSFER_LOG_NAME)
+    reports = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for pfx in prefixes:
+            folder = download_root / dir_name(pfx); folder.mkdir(parents=True, exist_ok=True)
+            names, futures = [], []
+            for blob in client.list_blobs(bucket.name, prefix=pfx):
+                names.append(blob.name)
+                if not blob.name.endswith("/"):
+                    futures.append((blob.name, pool.submit(_download_one, blob, folder / Path(blob.name).name, log, cache)))
+                if max_per_prefix > 0 and len(names) >= max_per_prefix: break
+            counts = {"downloaded": 0, "linked": 0, "skipped": 0, "failed": 0}; errors = []
+            for name, fut in futures:
+                try:
+                    counts[fut.result()] += 1
+                except Exception as e:
+                    counts["failed"] += 1; errors.append({"name": name, "error": str(e)})
+            reports.append({"prefix": pfx, "objectNames": names, "countListed": len(names),
+                            "truncated": (max_per_prefix > 0 and len(names) >= max_per_prefix), **counts, "errors": errors})
+    return reports
+
+def upload_folder(client, bucket, folder: Path, prefix: str, log_dir: Path, max_workers: int=TRANSFER_MAX_WORKERS) -> dict:
+    """
+    Upload every file in `folder` as <prefix><file name>, skipping blobs that already match.
+    Files the log shows as uploaded (same size and mtime) are skipped before anything is
+    hashed, and the prefix is only listed when some file is left to check.
+    """
+    log = TransferLog(log_dir / TRANSFER_LOG_NAME)
+    files = sorted(p for p in folder.iterdir() if p.is_file() and not p.name.endswith(".part"))
+    pending = [f for f in files if not log.verified("upload", f"{prefix}{f.name}", None, f)]
+    resumed = len(files) - len(pending)
+    report = {"prefix": prefix, "uploaded": 0, "skipped": resumed, "resumed": resumed, "failed": 0, "errors": []}
+    remote = {b.name: blob_checksums(b) for b in client.list_blobs(bucket.name, prefix=prefix)} if pending else {}
+
+    def upload(src: Path) -> str:
+        name = f"{prefix}{src.name}"; local = local_checksums(src); st = src.stat()
+        matched = name in remote and same_content(local, remote[name])
+        if not matched: bucket.blob(name).upload_from_filename(str(src))
+        log.record("upload", name, st.st_size, local, st.st_mtime_ns)  # matches too, so a resumed run skips them unhashed
+        return "skipped" if matched else "uploaded"
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for src, fut in [(f, pool.submit(upload, f)) for f in pending]:
+            try:
+                report[fut.result()] += 1
+            except Exception as e:
+                report["failed"] += 1; report["errors"].append({"name": src.name, "error": str(e)})
+    return report
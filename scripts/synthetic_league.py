@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic leagues in the seasons/{id} layout the app reads.
+
+generate_league() returns flat snapshot entries (the snapshot.ndjson shape) for
+one season: the season doc with its contestants and episodes, state/current,
+phases built from PickPhase.preconfigured, one result per episode, users, and
+weeklyPicks/{uid}/episodes/{n} -- with the weeklyPicks/{uid} parents missing,
+as they are in production. Same arguments, same documents (ids included), so
+benchmark runs are comparable.
+"""
+import datetime as dt, random, typing as t, uuid
+from pathlib import Path
+
+SNAPSHOTS_ROOT = "/Users/zachariasalad/Desktop/firestore-tools/snapshots"
+DEFAULT_SEASON_ID = "season-001"
+
+import snapshot_io
+from snapshot_tree import MetricsAccumulator
+
+# PickPhase.preconfigured: (name, [(name, columnId, totalPicks, pointsPerCorrectPick, wagerPoints, autoScores, isLocked)])
+PRECONFIGURED_PHASES = [
+    ("Pre-merge", [("Mergers", "MG", 3, 1, None, False, True), ("Immunity", "IM", 3, 3, None, False, False), ("Voted out", "VO", 3, 3, None, False, False)]),
+    ("Post-merge", [("Immunity", "IM", 2, 5, None, False, False), ("Voted out", "VO", 2, 5, None, False, False)]),
+    ("Finals", [("Carried", "CA", 1, 10, None, False, False), ("Fire", "FI", 2, 10, None, False, False),
+                ("Fire Winner", "FW", 1, 15, None, False, False), ("Sole Survivor", "SS", 1, None, 30, False, False)]),
+]
+TRIBES = ["Luvu", "Gata", "Yase"]
+_EPOCH = dt.datetime(2025, 2, 26, 20, tzinfo=dt.timezone.utc)
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper()
+
+def _ts(when: dt.datetime) -> dict:
+    return {"_type": "timestamp", "iso": when.astimezone(dt.timezone.utc).replace(tzinfo=None).isoformat(timespec="microseconds") + "Z"}
+
+def _entry(path: str, fields: dict, when: dt.datetime) -> dict:
+    return {"_id": path.rsplit("/", 1)[-1], "_path": path, "_createTime": when.isoformat(), "_updateTime": when.isoformat(), "fields": fields}
+
+def generate_league(users: int=500, episodes: int=14, phases: int=3, categories: t.Optional[int]=None, pick_density: float=0.9,
+                    contestants: int=18, season_id: str=DEFAULT_SEASON_ID, seed: int=0) -> t.List[dict]:
+    """
+    `phases` cycles through the preconfigured phases (episodes are split evenly between
+    them), `categories` caps how many of each phase's categories are used, and
+    `pick_density` is the chance a user submitted picks for a given episode.
+    """
+    rng = random.Random(seed); entries = []; prefix = f"seasons/{season_id}"
+    cast = [{"id": f"c{i:02d}", "name": f"Contestant {i}", "tribe": TRIBES[i % len(TRIBES)]} for i in range(1, contestants + 1)]
+    phase_docs = []
+    for i in range(max(1, phases)):
+        name, cats = PRECONFIGURED_PHASES[i % len(PRECONFIGURED_PHASES)]
+        cats = cats[:categories] if categories else cats
+        phase_docs.append({"id": _uuid(rng), "name": name if i < len(PRECONFIGURED_PHASES) else f"{name} {i + 1}", "sortIndex": i, "categories": [
+            {"id": _uuid(rng), "name": n, "columnId": col, "totalPicks": total, "pointsPerCorrectPick": pts, "wagerPoints": wager,
+             "autoScoresRemainingContestants": auto, "isLocked": locked, "usesWager": wager is not None}
+            for n, col, total, pts, wager, auto, locked in cats]})
+    phase_of = {e: phase_docs[min(len(phase_docs) - 1, (e - 1) * len(phase_docs) // max(1, episodes))] for e in range(1, episodes + 1)}
+    air = {e: _EPOCH + dt.timedelta(weeks=e - 1) for e in range(1, episodes + 1)}
+    merge = next((e for e in range(2, episodes + 1) if phase_of[e] is not phase_of[e - 1]), None)
+
+    entries.append(_entry(prefix, {"seasonId": season_id, "name": f"Synthetic season ({users} users)", "contestants": cast, "lockHourUTC": 23,
+                                   "episodes": [{"id": e, "title": f"Week {e}", "airDate": _ts(air[e]), "isMergeEpisode": e == merge} for e in air]}, _EPOCH))
+    entries.append(_entry(f"{prefix}/state/current", {"activePhaseId": phase_of[episodes]["id"] if episodes else None,
+                                                      "activatedPhaseIds": list(dict.fromkeys(p["id"] for p in phase_of.values()))}, _EPOCH))
+    for p in phase_docs: entries.append(_entry(f"{prefix}/phases/{p['id']}", p, _EPOCH))
+
+    remaining = [c["id"] for c in cast]; alive_before = {}
+    for e in range(1, episodes + 1):
+        alive_before[e] = list(remaining)
+        voted_out = [rng.choice(remaining)] if len(remaining) > 1 else []
+        remaining = [c for c in remaining if c not in voted_out]
+        immunity = [rng.choice(remaining)] if remaining else []
+        winners = {}
+        for c in phase_of[e]["categories"]:
+            if c["autoScoresRemainingContestants"]: continue
+            if c["columnId"] == "VO": winners[c["id"]] = voted_out
+            elif c["columnId"] == "IM": winners[c["id"]] = immunity
+            elif c["usesWager"]:
+                if e == episodes and remaining: winners[c["id"]] = [rng.choice(remaining)]
+            else: winners[c["id"]] = rng.sample(remaining, min(c["totalPicks"], len(remaining)))
+        entries.append(_entry(f"{prefix}/results/{e}", {"phaseId": phase_of[e]["id"], "immunityWinners": immunity, "votedOut": voted_out,
+                                                        "categoryWinners": {k: v for k, v in winners.items() if v}}, air[e] + dt.timedelta(hours=3)))
+
+    for u in range(1, users + 1):
+        uid = f"user{u:05d}"
+        entries.append(_entry(f"{prefix}/users/{uid}", {"displayName": f"Player {u:05d}", "avatarAssetName": uid}, _EPOCH))
+        for e in range(1, episodes + 1):
+            if rng.random() >= pick_density: continue
+            selections = {}; wagers = {}
+            for c in phase_of[e]["categories"]:
+                selections[c["id"]] = rng.sample(alive_before[e], min(c["totalPicks"], len(alive_before[e])))
+                if c["usesWager"] and rng.random() < 0.5: wagers[c["id"]] = rng.choice([10, 20, 30, 40, 50])
+            fields = {"seasonId": season_id, "categorySelections": selections, "isSubmitted": True}
+            if wagers: fields["categoryWagers"] = wagers
+            entries.append(_entry(f"{prefix}/weeklyPicks/{uid}/episodes/{e}", fields, air[e] - dt.timedelta(minutes=rng.randrange(60, 6000))))
+    return entries
+
+def league_meta(entries: t.Iterable[dict], kind: str="synthetic") -> dict:
+    """Header/trailer fields snapshot_io.write_snapshot expects, computed from the entries."""
+    metrics = MetricsAccumulator(); roots = []
+    for e in entries:
+        metrics.add(e["_path"]); root = e["_path"].split("/", 1)[0]
+        if root not in roots: roots.append(root)
+    return {"projectId": "synthetic", "exportedAt": dt.datetime.utcnow().isoformat() + "Z", "kind": kind, "rootCollections": roots,
+            "metrics": metrics.as_dict(), "storage": {"_type": "storageProbe", "enabled": False, "reason": "synthetic"}}
+
+def write_league_snapshot(folder: Path, entries: t.List[dict], fmt: str="json") -> Path:
+    folder.mkdir(parents=True, exist_ok=True)
+    return snapshot_io.write_snapshot(folder, fmt, league_meta(entries), iter(entries))
+
+def _ask_int(prompt: str, default: int) -> int:
+    raw = input(f"{prompt} [{default}]: ").strip()
+    return int(raw) if raw else default
+
+def main():
+    print("\n=== Synthetic League ===")
+    users = _ask_int("Users", 500); episodes = _ask_int("Episodes", 14); phases = _ask_int("Phases", len(PRECONFIGURED_PHASES))
+    density = float(input("Pick density 0-1 [0.9]: ").strip() or 0.9); seed = _ask_int("Seed", 0)
+    fmt = input("Format (json/ndjson/msgpack) [json]: ").strip().lower() or "json"
+    entries = generate_league(users, episodes, phases, pick_density=density, seed=seed)
+    folder = Path(SNAPSHOTS_ROOT) / f"snapshot_synthetic_{users}u_{episodes}e_{dt.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    out = write_league_snapshot(folder, entries, fmt)
+    print(f"Wrote {len(entries)} documents to {out}")
+
+if __name__ == "__main__":
+    main()
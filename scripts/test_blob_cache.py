@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""BlobCache in a temporary snapshots root: links, concurrent adopts of one object, folder sizes, imports and retention-aware GC."""
+import base64, hashlib, os, tempfile, time, unittest
+from pathlib import Path
+from unittest import mock
+
+import blob_cache, snapshot_store
+from blob_cache import BlobCache, collect_garbage, folder_bytes, import_folder
+
+def _checksums(f: Path) -> dict:
+    return {"md5": base64.b64encode(hashlib.md5(f.read_bytes()).digest()).decode("ascii")}
+
+class BlobCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.base = Path(self.tmp.name)
+        self.snap = self.base / "snapshot_full_1" / "users_avatars"; self.snap.mkdir(parents=True)
+        self.cache = blob_cache.blob_cache_for(self.snap.parent)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes, folder: Path=None) -> Path:
+        f = (folder or self.snap) / name; f.write_bytes(data); return f
+
+    def key(self, f: Path) -> str:
+        return BlobCache.key_for(_checksums(f), f.stat().st_size)
+
+    def test_adopt_then_link(self):
+        a = self.write("a.png", b"avatar-a"); key = self.key(a)
+        self.assertTrue(self.cache.adopt(a, key))
+        self.assertTrue(os.path.samefile(a, self.cache.path(key)))
+        other = self.base / "snapshot_full_2" / "users_avatars"; other.mkdir(parents=True)
+        self.assertTrue(self.cache.link(key, other / "a.png"))
+        self.assertEqual(self.cache.path(key).stat().st_nlink, 3)
+        self.assertFalse(self.cache.link("md5-ffff", other / "missing.png"))
+
+    def test_concurrent_adopt_keeps_the_first_entry(self):
+        first = self.write("a.png", b"same bytes"); second = self.write("b.png", b"same bytes"); key = self.key(first)
+        self.assertTrue(self.cache.adopt(first, key))
+        with mock.patch.object(self.cache, "has", return_value=False):  # both threads passed the "already cached?" check
+            self.assertFalse(self.cache.adopt(second, key))
+        entry = self.cache.path(key)
+        self.assertTrue(os.path.samefile(first, entry)); self.assertTrue(os.path.samefile(second, entry))
+        self.assertEqual(entry.stat().st_nlink, 3)
+
+    def test_folder_bytes_counts_only_unshared_files(self):
+        a = self.write("a.png", b"x" * 10); self.cache.adopt(a, self.key(a))
+        self.write("b.png", b"y" * 7)
+        self.assertEqual(folder_bytes(self.snap), {"files": 2, "logicalBytes": 17, "physicalBytes": 7})
+
+    def test_import_folder_links_known_objects(self):
+        a = self.write("a.png", b"known"); self.cache.adopt(a, self.key(a))
+        old = self.base / "snapshot_old" / "users_avatars"; old.mkdir(parents=True)
+        copy = self.write("a.png", b"known", old); fresh = self.write("n.png", b"new", old)
+        self.assertEqual(import_folder(self.cache, old, _checksums), {"linked": 1, "adopted": 1, "bytesFreed": 5})
+        self.assertTrue(os.path.samefile(copy, a)); self.assertTrue(self.cache.has(self.key(fresh)))
+
+    def test_garbage_collection_honours_retention(self):
+        kept = self.write("kept.png", b"still linked"); self.cache.adopt(kept, self.key(kept))
+        gone = self.write("gone.png", b"unlinked"); gone_key = self.key(gone); self.cache.adopt(gone, gone_key); gone.unlink()
+        store = snapshot_store.object_store_for(self.snap.parent)
+        used, _ = store.put({"_path": "a/1", "fields": {"n": 1}}); unused, _ = store.put({"_path": "a/2", "fields": {"n": 2}})
+        snapshot_store.write_manifest(self.snap.parent, {}, {"a/1": [used, None]})
+
+        self.assertEqual(collect_garbage(self.base)["blobs"]["removed"], 0)  # unreferenced, but younger than the retention
+        later = time.time() + 2 * 86400
+        with mock.patch.object(blob_cache.time, "time", return_value=later):
+            dry = collect_garbage(self.base, retention_days=1, dry_run=True)
+            self.assertTrue(self.cache.has(gone_key))
+            report = collect_garbage(self.base, retention_days=1)
+        self.assertEqual((dry["blobs"], dry["objects"]["removed"]), (report["blobs"], 1))
+        self.assertEqual((report["blobs"]["removed"], report["blobs"]["kept"]), (1, 1))
+        self.assertEqual((report["objects"]["removed"], report["objects"]["kept"]), (1, 1))
+        self.assertFalse(self.cache.has(gone_key)); self.assertTrue(self.cache.has(self.key(kept)))
+        self.assertEqual(sorted(store.digests()), [used])
+        self.assertNotEqual(used, unused)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""bundle_builder round trips: every bundle is parsed back with read_bundle and compared with its source documents."""
+import tempfile, unittest
+from pathlib import Path
+
+import bundle_builder
+from bundle_builder import BundleBuilder, BundleService, bundle_entries, read_bundle
+from fake_firestore import FakeFirestore
+from synthetic_league import generate_league
+
+class BundleBuilderTests(unittest.TestCase):
+    def setUp(self):
+        self.entries = generate_league(users=6, episodes=4, seed=3) + generate_league(users=2, episodes=2, season_id="s2", seed=4)
+        self.builder = BundleBuilder("season-001", project_id="demo")
+        self.builder.apply(self.entries)
+
+    def test_round_trip_matches_source_documents(self):
+        bundle = read_bundle(self.builder.build())
+        got = {e["_path"]: e["fields"] for e in bundle_entries(bundle)}
+        # season-001's documents plus every "episodes" document (the app's collection-group listener is unfiltered)
+        want = {e["_path"]: e["fields"] for e in self.entries if e["_path"].startswith("seasons/season-001") or "/episodes/" in e["_path"]}
+        self.assertEqual(got, want)
+        self.assertEqual(sorted(bundle["namedQueries"]), ["season-001/phases", "season-001/results", "season-001/users", "season-001/weeklyPicks"])
+        self.assertTrue(bundle["namedQueries"]["season-001/weeklyPicks"]["bundledQuery"]["structuredQuery"]["from"][0]["allDescendants"])
+        self.assertEqual(bundle["documents"]["seasons/season-001/results/2"]["metadata"]["queries"], ["season-001/results"])
+        self.assertNotIn("queries", bundle["documents"]["seasons/season-001"]["metadata"])
+
+    def test_typed_values_and_missing_documents(self):
+        builder = BundleBuilder("s9", project_id="demo")
+        fields = {"when": {"_type": "timestamp", "iso": "2025-03-01T12:00:00.250000Z"}, "ref": {"_type": "docref", "path": "seasons/s9/users/u"},
+                  "raw": {"_type": "bytes", "base64": "AAE="}, "at": {"_type": "geopoint", "lat": 1.5, "lon": -2.0},
+                  "n": 7, "x": 0.5, "none": None, "empty": [], "nested": {"a": [1, {"b": True}]}}
+        builder.apply([{"_path": "seasons/s9/phases/p", "fields": fields}])
+        bundle = read_bundle(builder.build())
+        self.assertEqual(bundle_entries(bundle)[0]["fields"], fields)
+        self.assertFalse(bundle["documents"]["seasons/s9/state/current"]["metadata"]["exists"])
+        self.assertEqual(bundle["metadata"]["totalDocuments"], 3)
+
+    def test_unchanged_documents_are_not_reencoded(self):
+        version, encoded = self.builder.version, self.builder.stats["encoded"]
+        self.assertEqual(self.builder.apply(self.entries), 0)
+        self.assertEqual((self.builder.version, self.builder.stats["encoded"]), (version, encoded))
+        result = next(e for e in self.entries if e["_path"] == "seasons/season-001/results/1")
+        self.assertEqual(self.builder.apply([{**result, "fields": {**result["fields"], "votedOut": []}, "_updateTime": "2030-01-01T00:00:00+00:00"}]), 1)
+        self.assertEqual(self.builder.stats["encoded"], encoded + 1)
+
+    def test_service_rewrites_bundle_when_results_change(self):
+        db = FakeFirestore(); db.load({e["_path"]: e["fields"] for e in self.entries})
+        with tempfile.TemporaryDirectory() as scratch:
+            out = bundle_builder.bundle_path(Path(scratch), "season-001")
+            service = BundleService(db, "season-001", out, project_id="demo").start()
+            try:
+                self.assertEqual(service.stats["writes"], 1)
+                db.document("seasons/season-001/results/1").set({"phaseId": None, "immunityWinners": [], "votedOut": ["c01"]})
+                db.document("seasons/other/users/u").set({"displayName": "Not bundled"})
+                self.assertEqual(service.stats["writes"], 2)
+                docs = read_bundle(out.read_bytes())["documents"]
+                self.assertEqual(bundle_entries({"documents": {"r": docs["seasons/season-001/results/1"]}})[0]["fields"]["votedOut"], ["c01"])
+                self.assertNotIn("seasons/other/users/u", docs)
+            finally:
+                service.stop()
+
+if __name__ == "__main__":
+    unittest.main()
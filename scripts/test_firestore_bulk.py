@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""BulkWritePipeline against fake_firestore: transient failures are retried, exhausted ones are reported with their paths."""
+import unittest
+from unittest import mock
+
+from fake_firestore import FakeFirestore
+import firestore_bulk
+from firestore_bulk import BulkWritePipeline, RampUpLimiter, is_retryable
+
+class BulkWritePipelineTests(unittest.TestCase):
+    def test_transient_failures_are_retried_until_everything_lands(self):
+        db = FakeFirestore(fail_rate=0.3, seed=4)
+        with BulkWritePipeline(db, batch_size=7, max_in_flight=3, base_delay=0, ramp_up=False) as pipe:
+            for i in range(60): pipe.set(db.document(f"items/{i:02d}"), {"n": i})
+            pipe.flush()
+            for i in range(0, 60, 3): pipe.delete(db.document(f"items/{i:02d}"))
+        self.assertEqual((pipe.stats["failed"], pipe.errors), (0, []))
+        self.assertGreater(pipe.stats["retries"], 0)
+        self.assertEqual(pipe.stats["written"], 80)
+        self.assertEqual(db.paths(), [f"items/{i:02d}" for i in range(60) if i % 3])
+        self.assertEqual(db.data("items/59"), {"n": 59})
+
+    def test_exhausted_retries_report_every_path(self):
+        db = FakeFirestore(fail_rate=1.0)
+        with BulkWritePipeline(db, batch_size=4, max_retries=2, base_delay=0, ramp_up=False) as pipe:
+            for i in range(10): pipe.set(db.document(f"items/{i}"), {"n": i})
+        self.assertEqual((pipe.stats["written"], pipe.stats["failed"], pipe.stats["retries"]), (0, 10, 6))
+        self.assertEqual(sorted(p for err in pipe.errors for p in err["paths"]), sorted(f"items/{i}" for i in range(10)))
+        self.assertTrue(all(err["error"].startswith("ServiceUnavailable") for err in pipe.errors))
+        self.assertEqual(db.paths(), [])
+
+    def test_retryable_errors_are_matched_by_name(self):
+        DeadlineExceeded = type("DeadlineExceeded", (Exception,), {})
+        self.assertTrue(is_retryable(DeadlineExceeded()))
+        self.assertFalse(is_retryable(ValueError("bad document")))
+
+    def test_ramp_up_grows_half_again_every_step(self):
+        clock = {"now": 1000.0}
+        with mock.patch.object(firestore_bulk.time, "monotonic", lambda: clock["now"]):
+            limiter = RampUpLimiter(start_ops=500, step_seconds=300, max_ops=1500)
+            self.assertEqual(limiter.rate(), 500)
+            clock["now"] += 300; self.assertEqual(limiter.rate(), 750)
+            clock["now"] += 600; self.assertEqual(limiter.rate(), 1500)  # 1687.5, capped
+            limiter.acquire(1500)  # a full bucket is granted without waiting
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""firestore_codec: schema-checked documents must still round-trip typed values the schema does not know about."""
+import datetime as dt, json, unittest
+
+import firestore_codec
+from fake_firestore import FakeFirestore
+
+PHASE_PATH = "seasons/s1/phases/p1"
+
+def _phase(**extra):
+    category = {"id": "c1", "name": "Voted out", "columnId": "VO", "totalPicks": 1, "pointsPerCorrectPick": 3,
+                "wagerPoints": None, "autoScoresRemainingContestants": False, "isLocked": False, **extra}
+    return {"name": "Finals", "sortIndex": 0, "categories": [category]}
+
+class FirestoreCodecTests(unittest.TestCase):
+    def test_plain_categories_pass_through(self):
+        data = _phase(note="keep me")
+        with firestore_codec.validating(True) as report:
+            encoded = firestore_codec.encode_fields(PHASE_PATH, data)
+        self.assertIs(encoded["categories"], data["categories"])
+        self.assertEqual(report.as_dict()["withProblems"], {})
+
+    def test_typed_values_in_category_extras_round_trip(self):
+        data = _phase(lockedAt=dt.datetime(2026, 3, 4, 20, 0, tzinfo=dt.timezone.utc), icon=b"\x89PNG")
+        with firestore_codec.validating(True) as report:
+            encoded = firestore_codec.encode_fields(PHASE_PATH, data)
+            snapshot_form = json.loads(json.dumps(encoded))
+            decoded = firestore_codec.decode_fields(PHASE_PATH, snapshot_form, FakeFirestore())
+        self.assertEqual(snapshot_form["categories"][0]["lockedAt"]["_type"], "timestamp")
+        self.assertEqual(decoded["categories"][0]["icon"], b"\x89PNG")
+        self.assertEqual(decoded["categories"][0]["lockedAt"], data["categories"][0]["lockedAt"])
+        self.assertEqual(report.as_dict()["withProblems"], {})
+
+    def test_name_only_reads_are_not_checked(self):
+        with firestore_codec.validating(True) as report:
+            self.assertEqual(firestore_codec.encode_fields(PHASE_PATH, {}, validate=False), {})
+        self.assertEqual(report.checked, {})
+
+if __name__ == "__main__":
+    unittest.main()
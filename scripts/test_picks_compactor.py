@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""PicksCompactor against fake_firestore: the aggregates must always hold exactly the per-user picks documents."""
+import unittest
+from unittest import mock
+
+import instrumentation, picks_compactor
+from fake_firestore import FakeFirestore
+from picks_compactor import AGGREGATE_COLLECTION, PicksCompactor, compact_season
+from synthetic_league import generate_league
+
+AGGREGATES = f"seasons/season-001/{AGGREGATE_COLLECTION}"
+
+class PicksCompactorTests(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.db.load({e["_path"]: e["fields"] for e in generate_league(users=12, episodes=3, seed=5) + generate_league(users=3, episodes=2, season_id="s2", seed=6)})
+
+    def assertAggregatesMatchPicks(self):
+        expected = {}
+        for path in self.db.paths():
+            parts = path.split("/")
+            if path.startswith("seasons/season-001/weeklyPicks/") and len(parts) == 6: expected.setdefault(int(parts[5]), {})[parts[3]] = self.db.data(path)
+        got = {}
+        for path in self.db.paths():
+            if path.startswith(AGGREGATES + "/"):
+                doc = self.db.data(path)
+                self.assertEqual(doc["userCount"], len(expected.get(doc["episodeId"], {})))
+                got.setdefault(doc["episodeId"], {}).update(doc["picks"])
+        self.assertEqual(got, expected)
+
+    def test_compaction_and_rerun(self):
+        report = compact_season(self.db, "season-001")
+        self.assertAggregatesMatchPicks()
+        self.assertEqual((report["aggregateDocuments"], report["written"]), (3, 3))
+        self.assertEqual(report["readsSaved"], report["pickDocuments"] - 3)
+        again = compact_season(self.db, "season-001")
+        self.assertEqual((again["written"], again["deleted"], again["unchanged"]), (0, 0, 3))
+
+    def test_only_the_seasons_picks_are_read(self):
+        self.db.load({e["_path"]: e["fields"] for e in generate_league(users=4, episodes=2, season_id="season-0012", seed=7)})
+        picks = sum(1 for p in self.db.paths() if p.startswith("seasons/season-001/weeklyPicks/"))
+        with instrumentation.profiling() as prof:
+            report = compact_season(instrumentation.instrument_firestore(self.db), "season-001")
+        self.assertAggregatesMatchPicks()
+        self.assertEqual(report["pickDocuments"], picks)
+        self.assertEqual(prof.billable["reads"], picks + 1)  # + the (empty) aggregates query
+
+    def test_large_episodes_are_split_into_chunks(self):
+        with mock.patch.object(picks_compactor, "MAX_CHUNK_USERS", 5):
+            report = compact_season(self.db, "season-001")
+        self.assertAggregatesMatchPicks()
+        self.assertGreater(report["aggregateDocuments"], 3)
+        first = self.db.data(f"{AGGREGATES}/1")
+        self.assertEqual([self.db.data(f"{AGGREGATES}/1-{k}")["chunk"] for k in range(1, first["chunkCount"])], list(range(1, first["chunkCount"])))
+
+    def test_listener_keeps_aggregates_in_sync(self):
+        compactor = PicksCompactor(self.db, "season-001").start()
+        try:
+            self.assertAggregatesMatchPicks()
+            written = compactor.stats["written"]
+            user = next(p for p in self.db.paths() if p.startswith("seasons/season-001/users/")).rsplit("/", 1)[1]
+            self.db.document(f"seasons/season-001/weeklyPicks/{user}/episodes/2").set({"categorySelections": {}, "isSubmitted": True})
+            self.db.document(f"seasons/season-001/weeklyPicks/{user}/episodes/9").set({"isSubmitted": False})
+            self.db.document("seasons/s2/weeklyPicks/x/episodes/2").set({"isSubmitted": True})
+            self.assertEqual(compactor.stats["written"], written + 2)
+            self.assertAggregatesMatchPicks()
+            self.db.document(f"seasons/season-001/weeklyPicks/{user}/episodes/9").delete()
+            self.assertNotIn(f"{AGGREGATES}/9", self.db.paths())
+            self.assertAggregatesMatchPicks()
+        finally:
+            compactor.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""projection_engine: hand-checked odds, engines agreeing with each other, and results independent of how batches are run."""
+import unittest
+from unittest import mock
+
+import projection_engine
+from projection_engine import HAS_NUMPY, build_model, project
+from synthetic_league import generate_league
+
+VO = "11111111-1111-1111-1111-111111111111"; RM = "22222222-2222-2222-2222-222222222222"; SS = "44444444-4444-4444-4444-444444444444"
+PHASE = "33333333-3333-3333-3333-333333333333"
+
+def _category(cid, column, points, auto, wager=None):
+    return {"id": cid, "name": column, "columnId": column, "totalPicks": 1, "pointsPerCorrectPick": points,
+            "wagerPoints": wager, "autoScoresRemainingContestants": auto, "isLocked": False}
+
+def _season(categories, picks, contestants=("c1", "c2", "c3"), episodes=(1, 2)):
+    """Episode 1 recorded (c3 voted out), the rest still to play."""
+    entries = [
+        {"_path": "seasons/s1", "fields": {"contestants": [{"id": c} for c in contestants], "episodes": [{"id": e} for e in episodes]}},
+        {"_path": f"seasons/s1/phases/{PHASE}", "fields": {"name": "Finals", "sortIndex": 0, "categories": categories}},
+        {"_path": "seasons/s1/state/current", "fields": {"activePhaseId": PHASE, "activatedPhaseIds": [PHASE]}},
+        {"_path": "seasons/s1/results/1", "fields": {"phaseId": PHASE, "immunityWinners": [], "votedOut": ["c3"]}},
+        {"_path": "seasons/s1/users/a", "fields": {"displayName": "Ann"}},
+        {"_path": "seasons/s1/users/b", "fields": {"displayName": "Bob"}},
+    ]
+    return entries + [{"_path": f"seasons/s1/weeklyPicks/{uid}/episodes/{eid}", "fields": fields} for (uid, eid), fields in picks.items()]
+
+class ProjectionEngineTests(unittest.TestCase):
+    def engines(self):
+        return [False, True] if HAS_NUMPY else [False]
+
+    def test_two_contestants_left_is_a_coin_flip(self):
+        # c1 and c2 remain; whoever goes home next decides the Voted-out pick, and the finale's wager follows the survivor
+        entries = _season([_category(VO, "VO", 3, False), _category(SS, "SS", None, False, wager=10)],
+                          {("a", 1): {"categorySelections": {VO: ["c1"], SS: ["c2"]}}, ("b", 1): {"categorySelections": {VO: ["c2"], SS: ["c1"]}}})
+        model = build_model(entries, "s1")
+        self.assertEqual([e["id"] for e in model["episodes"]], [2])
+        for use_numpy in self.engines():
+            rows = {r["userId"]: r for r in project(model, 4000, use_numpy=use_numpy)["rows"]}
+            self.assertAlmostEqual(rows["a"]["winProbability"], 0.5, delta=0.04)
+            self.assertAlmostEqual(rows["a"]["winProbability"] + rows["b"]["winProbability"], 1.0, places=3)
+            self.assertAlmostEqual(rows["a"]["expectedTotal"], 3 * 0.5 + 10 * 0.5 - 10 * 0.5, delta=0.3)
+
+    def test_remaining_contestant_picks_carry_forward(self):
+        # a's pick was voted out already; b keeps scoring 2 per episode while c1 survives
+        entries = _season([_category(RM, "RM", 2, True)], {("a", 1): {"categorySelections": {RM: ["c3"]}}, ("b", 1): {"categorySelections": {RM: ["c1"]}}},
+                          episodes=(1, 2, 3))
+        for use_numpy in self.engines():
+            rows = {r["userId"]: r for r in project(build_model(entries, "s1"), 2000, use_numpy=use_numpy)["rows"]}
+            self.assertEqual((rows["a"]["winProbability"], rows["a"]["expectedTotal"]), (0.0, 0))
+            self.assertEqual(rows["b"]["winProbability"], 1.0)
+            # c1 survives episode 2 half the time, and then is the only one left (no vote in episode 3)
+            self.assertAlmostEqual(rows["b"]["expectedTotal"], 2 + 2 * 0.5 + 2 * 0.5, delta=0.15)
+
+    def test_finished_season_ranks_by_current_totals(self):
+        model = build_model(generate_league(users=6, episodes=3, seed=4), "season-001")
+        self.assertEqual(model["episodes"], [])
+        rows = project(model, 10, use_numpy=False)["rows"]
+        self.assertEqual(rows[0]["total"], max(r["total"] for r in rows))
+        self.assertEqual([r["expectedTotal"] for r in rows], [r["total"] for r in rows])
+
+    def test_batches_and_workers_do_not_change_results(self):
+        entries = [e for e in generate_league(users=10, episodes=6, seed=7) if not e["_path"].endswith(("/results/5", "/results/6"))]
+        model = build_model(entries, "season-001")
+        self.assertEqual([e["id"] for e in model["episodes"]], [5, 6])
+        with mock.patch.object(projection_engine, "BATCH_SIMULATIONS", 100), mock.patch.object(projection_engine, "PROCESS_MIN_SIMULATIONS", 300):
+            serial = project(model, 400, workers=1, use_numpy=False, seed=3)
+            pooled = project(model, 400, workers=2, use_numpy=False, seed=3)
+        self.assertEqual(serial["rows"], pooled["rows"])
+        self.assertAlmostEqual(sum(r["winProbability"] for r in serial["rows"]), 1.0, places=3)
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+    def test_numpy_and_bitset_engines_agree(self):
+        entries = [e for e in generate_league(users=40, episodes=8, seed=9) if not any(e["_path"].endswith(f"/results/{n}") for n in (6, 7, 8))]
+        model = build_model(entries, "season-001")
+        fast = {r["userId"]: r for r in project(model, 6000, use_numpy=True, seed=1)["rows"]}
+        slow = {r["userId"]: r for r in project(model, 3000, use_numpy=False, seed=1)["rows"]}
+        for uid, row in fast.items():
+            self.assertAlmostEqual(row["winProbability"], slow[uid]["winProbability"], delta=0.05)
+            self.assertAlmostEqual(row["expectedTotal"], slow[uid]["expectedTotal"], delta=1.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Port of survivusTests/ScoringEngineTests.swift against scoring_engine.py (python -m pytest scripts)."""
+import unittest
+
+from scoring_engine import Category, EpisodeResult, Phase, ScoringEngine, SeasonData, WeeklyPicks, build_leaderboard
+
+class ScoringEngineTests(unittest.TestCase):
+    def test_remain_picks_do_not_score_for_previously_eliminated_contestants(self):
+        results = {
+            1: EpisodeResult(1, immunity_winners=[], voted_out=["playerA"]),
+            2: EpisodeResult(2, immunity_winners=[], voted_out=["playerB"]),
+        }
+        remain = Category("Remain", "RM", 3, 1, None, auto_scores_remaining_contestants=True, is_locked=False)
+        weekly = WeeklyPicks("user", 2); weekly.set_selections(["playerA"], remain.id)
+
+        breakdown = ScoringEngine(results).score(weekly, 2, None, {remain.id: remain})
+
+        self.assertEqual(breakdown.get("RM", 0), 0)
+
+    def test_score_respects_phase_specific_point_values(self):
+        remain = Category("Remain", "RM", 3, 2, None, auto_scores_remaining_contestants=True, is_locked=False)
+        voted_out = Category("Voted out", "VO", 2, 5, None, auto_scores_remaining_contestants=False, is_locked=False)
+        immunity = Category("Immunity", "IM", 2, 4, None, auto_scores_remaining_contestants=False, is_locked=False)
+        phase = Phase("Post-merge", [remain, voted_out, immunity])
+        result = EpisodeResult(1, immunity_winners=[], voted_out=["playerC"], phase_id=phase.id,
+                               category_winners={voted_out.id: ["playerC"], immunity.id: ["playerB"]})
+        weekly = WeeklyPicks("user", 1)
+        weekly.set_selections(["playerA", "playerB"], remain.id)
+        weekly.set_selections(["playerC"], voted_out.id)
+        weekly.set_selections(["playerB"], immunity.id)
+
+        breakdown = ScoringEngine({1: result}).score(weekly, 1, phase, {c.id: c for c in (remain, voted_out, immunity)})
+
+        self.assertEqual(breakdown["RM"], 4)
+        self.assertEqual(breakdown["VO"], 5)
+        self.assertEqual(breakdown["IM"], 4)
+
+    def test_remain_category_does_not_auto_score_when_toggle_disabled(self):
+        remain = Category("Remain", "RM", 2, 2, None, auto_scores_remaining_contestants=False, is_locked=False)
+        phase = Phase("Custom", [remain])
+        result = EpisodeResult(1, immunity_winners=[], voted_out=[], phase_id=phase.id)
+        weekly = WeeklyPicks("user", 1); weekly.set_selections(["playerA", "playerB"], remain.id)
+
+        breakdown = ScoringEngine({1: result}).score(weekly, 1, phase, {remain.id: remain})
+
+        self.assertNotIn("RM", breakdown)  # no winners configured
+
+    def test_score_ignores_categories_outside_active_phase(self):
+        active = Category("Fire Winner", "FW", 1, 5, None, auto_scores_remaining_contestants=False, is_locked=False)
+        inactive = Category("Sole Survivor", "SS", 1, None, 30, auto_scores_remaining_contestants=False, is_locked=False)
+        phase = Phase("Finals", [active])
+        result = EpisodeResult(1, immunity_winners=[], voted_out=[], phase_id=phase.id,
+                               category_winners={active.id: ["playerA"], inactive.id: ["playerA"]})
+        weekly = WeeklyPicks("user", 1)
+        weekly.set_selections(["playerA"], active.id)
+        weekly.set_selections(["playerA"], inactive.id)
+
+        breakdown = ScoringEngine({1: result}).score(weekly, 1, phase, {active.id: active, inactive.id: inactive})
+
+        self.assertEqual(breakdown, {"FW": 5})
+
+    def _finals(self, winners, wager=None):
+        sole_survivor = Category("Sole Survivor", "SS", 1, None, 30, auto_scores_remaining_contestants=False, is_locked=False)
+        phase = Phase("Finals", [sole_survivor])
+        result = EpisodeResult(1, immunity_winners=[], voted_out=[], phase_id=phase.id, category_winners={sole_survivor.id: winners})
+        weekly = WeeklyPicks("user", 1); weekly.set_selections(["playerA"], sole_survivor.id); weekly.set_wager(wager, sole_survivor.id)
+        return ScoringEngine({1: result}).score(weekly, 1, phase, {sole_survivor.id: sole_survivor})
+
+    def test_wager_category_awards_points_when_correct(self):
+        self.assertEqual(self._finals(["playerA"])["SS"], 30)
+
+    def test_wager_category_subtracts_points_when_incorrect(self):
+        self.assertEqual(self._finals(["playerB"])["SS"], -30)
+
+    def test_wager_category_uses_custom_wager_value(self):
+        self.assertEqual(self._finals(["playerA"], wager=50)["SS"], 50)
+
+    def test_auto_score_awards_points_for_remaining_contestants(self):
+        auto = Category("Auto Challenge", "AC", 2, 3, None, auto_scores_remaining_contestants=True, is_locked=False)
+        phase = Phase("Custom", [auto])
+        results = {
+            1: EpisodeResult(1, immunity_winners=[], voted_out=["playerA"]),
+            2: EpisodeResult(2, immunity_winners=[], voted_out=[], phase_id=phase.id),
+        }
+        weekly = WeeklyPicks("user", 2); weekly.set_selections(["playerA", "playerB"], auto.id)
+
+        breakdown = ScoringEngine(results).score(weekly, 2, phase, {auto.id: auto})
+
+        self.assertEqual(breakdown["AC"], 3)
+
+class LeaderboardTests(unittest.TestCase):
+    def test_leaderboard_matches_table_rules(self):
+        vo = "11111111-1111-1111-1111-111111111111"; ss = "22222222-2222-2222-2222-222222222222"
+        phase = "33333333-3333-3333-3333-333333333333"
+        category = lambda cid, col, pts, wager: {"id": cid, "name": col, "columnId": col, "totalPicks": 1, "pointsPerCorrectPick": pts,
+                                                 "wagerPoints": wager, "autoScoresRemainingContestants": False, "isLocked": False}
+        entries = [
+            {"_path": f"seasons/s1/phases/{phase}", "fields": {"name": "Finals", "sortIndex": 0, "categories": [category(vo, "vo", 5, None), category(ss, "SS", None, 30)]}},
+            {"_path": "seasons/s1/state/current", "fields": {"activatedPhaseIds": [phase]}},
+            {"_path": "seasons/s1/results/1", "fields": {"phaseId": phase, "immunityWinners": [], "votedOut": ["c1"], "categoryWinners": {vo: ["c1"], ss: ["c2"]}}},
+            {"_path": "seasons/s1/results/2", "fields": {"immunityWinners": [], "votedOut": []}},  # nothing recorded: not scored
+            {"_path": "seasons/s1/users/a", "fields": {"displayName": "Ann"}},
+            {"_path": "seasons/s1/users/b", "fields": {"displayName": "Bob"}},
+            {"_path": "seasons/s1/weeklyPicks/a/episodes/1", "fields": {"categorySelections": {vo.lower(): ["c1"], ss: ["c1"]}, "categoryWagers": {ss: 10}}},
+            {"_path": "seasons/s1/weeklyPicks/b/episodes/1", "fields": {"categorySelections": {vo: ["c1"], ss: ["c2"]}}},
+            {"_path": "seasons/s1/weeklyPicks/b/episodes/2", "fields": {"categorySelections": {vo: ["c1"]}}},
+        ]
+        board = build_leaderboard(SeasonData.from_entries(entries, "s1"))
+
+        self.assertEqual(board["scoredEpisodes"], [1])
+        self.assertEqual([c["id"] for c in board["columns"]], ["VO", "SS"])
+        self.assertTrue(all(c["isActive"] for c in board["columns"]))
+        self.assertEqual([(r["userId"], r["total"], r["weeksParticipated"]) for r in board["rows"]], [("b", 35, 1), ("a", -5, 1)])
+        self.assertEqual(board["rows"][1]["categoryPointsByColumnId"], {"VO": 5, "SS": -10})
+
+if __name__ == "__main__":
+    unittest.main()
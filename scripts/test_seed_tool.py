@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""seed_tool's destructive paths against fake_firestore (needs firebase_admin importable, as the tool does)."""
+import datetime as dt, tempfile, unittest
+from pathlib import Path
+
+import firestore_codec, instrumentation, snapshot_io
+from fake_firestore import FakeFirestore
+from snapshot_msgpack import HAS_MSGPACK
+from synthetic_league import generate_league
+
+try:
+    import seed_tool
+    HAS_FIREBASE_ADMIN = True
+except ImportError:
+    HAS_FIREBASE_ADMIN = False
+
+def _league_db() -> FakeFirestore:
+    db = FakeFirestore()
+    db.load({e["_path"]: e["fields"] for e in generate_league(users=8, episodes=3, seed=11)})
+    return db
+
+def _snapshot_entries() -> list:
+    """A league plus one document of every typed value, in snapshot (encoded) form."""
+    typed = {"minVersion": "1.2", "releasedAt": dt.datetime(2026, 5, 1, 12, 30, 15, 250000, tzinfo=dt.timezone.utc),
+             "icon": b"\x00\xffpng", "venue": firestore_codec.GeoPoint(-17.7, 177.4), "nested": {"at": [dt.datetime(2026, 1, 2, tzinfo=dt.timezone.utc)]}}
+    entries = [{"_path": e["_path"], "fields": firestore_codec.encode_fields(e["_path"], e["fields"])} for e in generate_league(users=6, episodes=3, seed=12)]
+    return entries + [{"_path": "config/app", "fields": firestore_codec.encode_fields("config/app", typed)}]
+
+def _dump(db) -> dict:
+    """{path: snapshot fields} of everything in `db`, encoded as snapshot_tool does."""
+    return {p: firestore_codec.encode_fields(p, db.data(p)) for p in db.paths()}
+
+@unittest.skipUnless(HAS_FIREBASE_ADMIN, "firebase_admin not installed")
+class WipeTests(unittest.TestCase):
+    def test_wipe_removes_every_document(self):
+        db = _league_db()
+        phase = next(p for p in db.paths() if "/phases/" in p)
+        db.document(f"{phase}/notes/n1").set({"text": "below a known group"})
+        db.document(f"{phase}/notes/n1/replies/r1").set({"text": "and deeper"})
+        db.document("config/app").set({"minVersion": "1.2"})
+        self.assertTrue(any("/weeklyPicks/" in p for p in db.paths()))
+        self.assertIsNone(db.data(next(p for p in db.paths() if "/weeklyPicks/" in p).rsplit("/", 2)[0]))  # parents are missing
+        seasons = [p for p in db.paths() if p.startswith("seasons/")]
+        self.assertEqual(seed_tool.plan_wipe(db, ["seasons"]), sorted(seasons))
+        report = seed_tool.wipe_collections(db, ["seasons"], ramp_up=False)
+        self.assertEqual(report["errors"], [])
+        self.assertEqual(db.paths(), ["config/app"])
+
+    def test_listing_reads_only_the_selected_subtree(self):
+        db = _league_db()
+        db.load({e["_path"]: e["fields"] for e in generate_league(users=5, episodes=2, season_id="season-0012", seed=13)})
+        wanted = [p for p in db.paths() if p == "seasons/season-001" or p.startswith("seasons/season-001/")]
+        db.reset_counters()
+        with instrumentation.profiling() as prof:
+            self.assertEqual(seed_tool.plan_wipe(instrumentation.instrument_firestore(db), ["seasons"], scopes=["seasons/season-001"]), sorted(wanted))
+        groups = len(seed_tool.WIPE_COLLECTION_GROUPS)
+        self.assertLessEqual(prof.billable["reads"], len(wanted) + 1 + 2 * groups)  # + root listing, + one read per empty query
+        self.assertLess(db.rpcs["listCollectionIds"], 10)  # one probe per collection template, not one per document
+
+@unittest.skipUnless(HAS_FIREBASE_ADMIN, "firebase_admin not installed")
+class DiffTests(unittest.TestCase):
+    def test_plan_is_empty_after_apply(self):
+        entries = _snapshot_entries(); db = FakeFirestore()
+        db.load({e["_path"]: firestore_codec.decode_fields(e["_path"], e["fields"], db) for e in entries})
+        paths = sorted(db.paths())
+        db.document(paths[3]).delete()
+        db.document(next(p for p in paths if "/weeklyPicks/" in p)).set({"isSubmitted": False})
+        db.document("seasons/season-001/weeklyPicks/ghost/episodes/1").set({"isSubmitted": True})
+        db.document(f"{next(p for p in paths if '/phases/' in p)}/notes/n1").set({"text": "not in the snapshot"})
+        plan = seed_tool.plan_diff(db, entries, ["seasons", "config"])
+        self.assertEqual((len(plan["create"]), len(plan["update"]), len(plan["delete"])), (1, 1, 2))
+        seed_tool.apply_diff(db, plan, ramp_up=False)
+        again = seed_tool.plan_diff(db, entries, ["seasons", "config"])
+        self.assertEqual((again["create"], again["update"], again["delete"]), ([], [], []))
+        self.assertEqual(again["unchanged"], len(entries))
+        self.assertEqual(_dump(db), {e["_path"]: e["fields"] for e in entries})
+
+@unittest.skipUnless(HAS_FIREBASE_ADMIN, "firebase_admin not installed")
+class RoundTripTests(unittest.TestCase):
+    def test_seed_then_dump_is_exact_in_every_format(self):
+        entries = _snapshot_entries(); expected = {e["_path"]: e["fields"] for e in entries}
+        meta = {"projectId": "fake-project", "exportedAt": "2026-06-01T00:00:00Z", "kind": "test"}
+        for fmt in ("json", "ndjson", "msgpack", "shards"):
+            if fmt == "msgpack" and not HAS_MSGPACK: continue
+            with self.subTest(fmt=fmt), tempfile.TemporaryDirectory() as tmp:
+                snapshot_io.write_snapshot(Path(tmp), fmt, meta, entries)
+                db = FakeFirestore(); db.document("seasons/stale").set({"left": "over"})
+                seed_tool.seed_from_snapshot_folder(None, None, Path(tmp), only_seasons=False, db=db, ramp_up=False)
+                self.assertEqual(_dump(db), expected)
+
+if __name__ == "__main__":
+    unittest.main()
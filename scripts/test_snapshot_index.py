@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""snapshot_index over a small hand-built league: every prebuilt query against rows worked out by hand, and rebuilds on stale snapshots."""
+import tempfile, unittest
+from pathlib import Path
+from unittest import mock
+
+import snapshot_index, snapshot_io
+from snapshot_index import check_index, open_index, path_keys, run_query
+
+META = {"projectId": "fake-project", "exportedAt": "2026-06-01T00:00:00Z", "kind": "test"}
+
+def _entries(extra=()):
+    """Season s1: users a, b, c; results for episodes 1-3; picks a/1, a/2, b/1 (not submitted) and ghost/1 (no users doc)."""
+    docs = {"seasons/s1": {"name": "Season 1"},
+            "seasons/s1/users/a": {"displayName": "Ann"}, "seasons/s1/users/b": {"displayName": "Bob"}, "seasons/s1/users/c": {"displayName": "Cy"},
+            "seasons/s1/results/1": {"votedOut": ["c1"]}, "seasons/s1/results/2": {"votedOut": ["c2"]}, "seasons/s1/results/3": {"votedOut": []},
+            "seasons/s1/weeklyPicks/a/episodes/1": {"isSubmitted": True}, "seasons/s1/weeklyPicks/a/episodes/2": {"isSubmitted": True},
+            "seasons/s1/weeklyPicks/b/episodes/1": {"isSubmitted": False}, "seasons/s1/weeklyPicks/ghost/episodes/1": {"isSubmitted": True},
+            "config/app": {"minVersion": "1.2", "releasedAt": {"_type": "timestamp", "iso": "2026-05-01T12:00:00.000000Z"}}}
+    docs.update(extra)
+    return [{"_path": p, "_updateTime": "2026-06-01T00:00:00+00:00", "fields": f} for p, f in docs.items()]
+
+class SnapshotIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.folder = Path(self.tmp.name)
+        snapshot_io.write_snapshot(self.folder, "ndjson", META, _entries())
+        self.conn = open_index(self.folder)
+
+    def tearDown(self):
+        self.conn.close(); self.tmp.cleanup()
+
+    def test_path_keys(self):
+        self.assertEqual(path_keys("seasons/s1/weeklyPicks/u1/episodes/7"), ("s1", "u1", 7))
+        self.assertEqual(path_keys("seasons/s1/results/3"), ("s1", None, 3))
+        self.assertEqual(path_keys("seasons/s1/users/u1"), ("s1", "u1", None))
+        self.assertEqual(path_keys("seasons/s1/phases/p1"), ("s1", None, None))
+        self.assertEqual(path_keys("seasons/s1/results/final"), ("s1", None, None))
+        self.assertEqual(path_keys("config/app"), (None, None, None))
+
+    def test_prebuilt_queries(self):
+        counts = {r["collection"]: r["documents"] for r in run_query(self.conn, "collection_counts")}
+        self.assertEqual(counts, {"config": 1, "seasons": 1, "seasons/*/users": 3, "seasons/*/results": 3, "seasons/*/weeklyPicks/*/episodes": 4})
+        self.assertEqual(run_query(self.conn, "results_without_picks"), [{"season": "s1", "episode": 3}])
+        self.assertEqual(run_query(self.conn, "missing_picks", season="s1", episode=1), [{"season": "s1", "user": "c", "displayName": "Cy"}])
+        self.assertEqual([r["user"] for r in run_query(self.conn, "missing_picks", season="s1", episode=2)], ["b", "c"])
+        self.assertEqual(run_query(self.conn, "pick_counts"), [
+            {"season": "s1", "user": "a", "submitted": 2, "picks": 2, "firstEpisode": 1, "lastEpisode": 2},
+            {"season": "s1", "user": "b", "submitted": 0, "picks": 1, "firstEpisode": 1, "lastEpisode": 1},
+            {"season": "s1", "user": "ghost", "submitted": 1, "picks": 1, "firstEpisode": 1, "lastEpisode": 1}])
+        self.assertEqual(run_query(self.conn, "picks_without_user"), [{"season": "s1", "user": "ghost", "picks": 1}])
+        self.assertEqual(run_query(self.conn, "SELECT type, value FROM fields WHERE path = 'config/app' AND name = 'releasedAt'"),
+                         [{"type": "timestamp", "value": "2026-05-01T12:00:00.000000Z"}])
+
+    def test_check_index(self):
+        self.assertEqual(check_index(self.conn), ["s1 episode 3 has results but no weekly picks", "s1: 1 weekly-pick docs for ghost, who has no users doc"])
+
+    def test_changed_snapshot_is_reindexed(self):
+        with mock.patch.object(snapshot_index, "build_index", wraps=snapshot_index.build_index) as build:
+            open_index(self.folder).close()
+            self.assertEqual(build.call_count, 0)
+            snapshot_io.write_snapshot(self.folder, "ndjson", META, _entries({"seasons/s1/weeklyPicks/c/episodes/3": {"isSubmitted": True}}))
+            conn = open_index(self.folder)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(run_query(conn, "results_without_picks"), [])
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
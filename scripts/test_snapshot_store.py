@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""snapshot_store: Merkle hashes must depend on manifest content only, never on the order documents were crawled in."""
+import hashlib, random, tempfile, unittest
+from pathlib import Path
+
+import snapshot_store
+from synthetic_league import generate_league
+
+def _documents(entries) -> dict:
+    return {e["_path"]: [hashlib.sha256(e["_path"].encode("utf-8")).hexdigest(), None] for e in entries}
+
+class MerkleHashTests(unittest.TestCase):
+    def setUp(self):
+        self.documents = _documents(generate_league(users=5, episodes=3, seed=8))
+        self.documents["seasons/season-001/phases/p9/notes/n1"] = ["ab" * 32, None]  # below a missing parent
+
+    def test_order_does_not_change_hashes(self):
+        paths = list(self.documents); runs = []
+        for seed in (1, 2, 3):
+            random.Random(seed).shuffle(paths)
+            runs.append(snapshot_store.merkle_hashes({p: self.documents[p] for p in paths}))
+        self.assertEqual(runs[0], runs[1]); self.assertEqual(runs[0], runs[2])
+
+    def test_changed_collections_names_only_real_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp)
+            old = snapshot_store.write_manifest(folder, {}, dict(reversed(list(self.documents.items()))))
+            self.assertEqual(snapshot_store.changed_collections(old, snapshot_store.write_manifest(folder, {}, self.documents)), [])
+            pick = next(p for p in self.documents if "/weeklyPicks/" in p)
+            edited = {**self.documents, pick: ["cd" * 32, None]}
+            uid = pick.split("/")[3]
+            self.assertEqual(snapshot_store.changed_collections(old, snapshot_store.write_manifest(folder, {}, edited)),
+                             ["seasons", "seasons/season-001/weeklyPicks", f"seasons/season-001/weeklyPicks/{uid}/episodes"])
+
+if __name__ == "__main__":
+    unittest.main()
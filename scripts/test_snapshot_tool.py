@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""snapshot_tool's incremental snapshot against fake_firestore (needs firebase_admin importable, as the tool does)."""
+import tempfile, unittest
+from pathlib import Path
+from unittest import mock
+
+import firestore_codec, snapshot_store
+from fake_firestore import FakeFirestore, FakeQuery, ServiceUnavailable
+from synthetic_league import generate_league
+
+try:
+    import snapshot_tool
+    HAS_FIREBASE_ADMIN = True
+except ImportError:
+    HAS_FIREBASE_ADMIN = False
+
+@unittest.skipUnless(HAS_FIREBASE_ADMIN, "firebase_admin not installed")
+class IncrementalSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.db.load({e["_path"]: e["fields"] for e in generate_league(users=6, episodes=3, seed=3)})
+        self.tmp = tempfile.TemporaryDirectory(); self.base = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_valid_league_reports_no_schema_problems(self):
+        with firestore_codec.validating(True) as report:
+            snap_dir = snapshot_tool._snapshot_incremental(self.base, db=self.db)
+        self.assertEqual(report.as_dict()["withProblems"], {})
+        # every document is checked once, when it is refetched, and never on the name-only crawl
+        self.assertEqual(sum(report.checked.values()), sum(1 for p in self.db.paths() if firestore_codec._template(p) in firestore_codec.SCHEMAS))
+        manifest = snapshot_store.load_manifest(snap_dir / snapshot_store.MANIFEST_NAME)
+        self.assertEqual(sorted(manifest["documents"]), sorted(self.db.paths()))
+
+    def failing_group_scan(self, error, after=4, times=1):
+        """Patch FakeQuery.stream so the "episodes" group scan raises `error` after `after` documents, `times` times."""
+        real_stream = FakeQuery.stream; left = {"n": times}
+        def stream(query, *args, **kwargs):
+            docs = real_stream(query, *args, **kwargs)
+            if query._group_id != "episodes" or left["n"] == 0: return docs
+            left["n"] -= 1
+            def broken():
+                for i, doc in enumerate(docs):
+                    if i == after: raise error
+                    yield doc
+            return broken()
+        return mock.patch.object(FakeQuery, "stream", stream)
+
+    def test_transient_scan_error_resumes_the_scan(self):
+        with self.failing_group_scan(ServiceUnavailable("try again"), times=2), mock.patch.object(snapshot_tool.time, "sleep"):
+            snap_dir = snapshot_tool._snapshot_incremental(self.base, db=self.db)
+        manifest = snapshot_store.load_manifest(snap_dir / snapshot_store.MANIFEST_NAME)
+        self.assertEqual(sorted(manifest["documents"]), sorted(self.db.paths()))
+
+    def test_failed_scan_writes_no_manifest(self):
+        with self.failing_group_scan(RuntimeError("stream broken")):
+            with self.assertRaises(RuntimeError): snapshot_tool._snapshot_incremental(self.base, db=self.db)
+        self.assertIsNone(snapshot_store.latest_manifest(self.base))
+
+if __name__ == "__main__":
+    unittest.main()
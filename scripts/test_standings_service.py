@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""StandingsMaterializer against fake_firestore: published standings must equal a full rebuild after every change."""
+import unittest
+
+from fake_firestore import FakeFirestore
+from scoring_engine import SeasonData, build_leaderboard
+from standings_service import StandingsMaterializer
+
+VO = "11111111-1111-1111-1111-111111111111"; RM = "22222222-2222-2222-2222-222222222222"
+PHASE = "33333333-3333-3333-3333-333333333333"
+STANDINGS = "seasons/s1/standings/current"
+
+def _category(cid, column, points, auto):
+    return {"id": cid, "name": column, "columnId": column, "totalPicks": 2, "pointsPerCorrectPick": points,
+            "wagerPoints": None, "autoScoresRemainingContestants": auto, "isLocked": False}
+
+class StandingsMaterializerTests(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeFirestore()
+        self.db.load({
+            f"seasons/s1/phases/{PHASE}": {"name": "Pre-merge", "sortIndex": 0, "categories": [_category(VO, "VO", 3, False), _category(RM, "RM", 1, True)]},
+            "seasons/s1/state/current": {"activatedPhaseIds": [PHASE]},
+            "seasons/s1/results/1": {"phaseId": PHASE, "immunityWinners": [], "votedOut": ["c1"], "categoryWinners": {VO: ["c1"]}},
+            "seasons/s1/results/2": {"phaseId": PHASE, "immunityWinners": [], "votedOut": ["c2"], "categoryWinners": {VO: ["c2"]}},
+            "seasons/s1/users/a": {"displayName": "Ann"},
+            "seasons/s1/users/b": {"displayName": "Bob"},
+            "seasons/s1/weeklyPicks/a/episodes/1": {"categorySelections": {VO: ["c1"], RM: ["c2", "c3"]}},
+            "seasons/s1/weeklyPicks/a/episodes/2": {"categorySelections": {VO: ["c3"], RM: ["c2", "c3"]}},
+            "seasons/s1/weeklyPicks/b/episodes/2": {"categorySelections": {VO: ["c2"], RM: ["c1", "c3"]}},
+            "seasons/s2/weeklyPicks/a/episodes/2": {"categorySelections": {VO: ["c2"]}},
+        })
+        self.service = StandingsMaterializer(self.db, "s1").start()
+
+    def tearDown(self):
+        self.service.stop()
+
+    def assertMatchesRebuild(self):
+        entries = [{"_path": p, "fields": self.db.data(p)} for p in self.db.paths()]
+        expected = build_leaderboard(SeasonData.from_entries(entries, "s1"))
+        for row in expected["rows"]: del row["byEpisode"]
+        got = self.db.data(STANDINGS)
+        self.assertEqual(got["rows"], expected["rows"])
+        self.assertEqual(got["columns"], expected["columns"])
+        self.assertEqual(got["scoredEpisodes"], expected["scoredEpisodes"])
+
+    def test_initial_standings_match_full_rebuild(self):
+        self.assertMatchesRebuild()
+        self.assertEqual([(r["userId"], r["total"]) for r in self.db.data(STANDINGS)["rows"]], [("a", 6), ("b", 4)])
+
+    def test_pick_change_rescores_only_that_episode(self):
+        before = self.service.stats["rescored"]
+        self.db.document("seasons/s1/weeklyPicks/b/episodes/2").set({"categorySelections": {VO: ["c3"], RM: ["c3"]}})
+        self.assertEqual(self.service.stats["rescored"], before + 1)
+        self.assertMatchesRebuild()
+
+    def test_result_change_updates_later_auto_scored_episodes(self):
+        self.db.document("seasons/s1/results/1").set({"phaseId": PHASE, "immunityWinners": [], "votedOut": ["c3"], "categoryWinners": {VO: ["c3"]}})
+        self.assertMatchesRebuild()
+        self.assertEqual(len(self.service.latencies_ms["results"]), 1)
+
+    def test_other_seasons_and_unscored_episodes_do_not_rewrite_standings(self):
+        published = self.service.stats["published"]
+        self.db.document("seasons/s2/weeklyPicks/a/episodes/2").set({"categorySelections": {VO: ["c1"]}})
+        self.db.document("seasons/s1/weeklyPicks/a/episodes/3").set({"categorySelections": {VO: ["c1"]}})
+        self.assertEqual(self.service.stats["published"], published)
+        self.assertMatchesRebuild()
+
+    def test_deletes_and_new_users(self):
+        self.db.document("seasons/s1/results/2").delete()
+        self.db.document("seasons/s1/users/c").set({"displayName": "Cy"})
+        self.assertMatchesRebuild()
+        self.assertEqual(self.db.data(STANDINGS)["scoredEpisodes"], [1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""storage_transfer.upload_folder against an in-memory bucket: checksum skips, resuming from the transfer log, and one upload per file."""
+import base64, hashlib, tempfile, unittest
+from pathlib import Path
+from unittest import mock
+
+import storage_transfer
+from storage_transfer import TRANSFER_LOG_NAME, upload_folder
+
+class _Blob:
+    def __init__(self, bucket, name: str):
+        self.bucket, self.name, self.md5_hash, self.crc32c = bucket, name, None, None
+
+    def upload_from_filename(self, filename: str):
+        data = Path(filename).read_bytes()
+        self.md5_hash = base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+        self.bucket.objects[self.name] = self; self.bucket.uploads.append(self.name)
+
+class _Bucket:
+    name = "fake-bucket"
+    def __init__(self):
+        self.objects, self.uploads = {}, []
+
+    def blob(self, name: str) -> _Blob:
+        return _Blob(self, name)
+
+class _Client:
+    def __init__(self, bucket: _Bucket):
+        self.bucket, self.listings = bucket, 0
+
+    def list_blobs(self, bucket_name: str, prefix: str=""):
+        self.listings += 1
+        return [b for n, b in sorted(self.bucket.objects.items()) if n.startswith(prefix)]
+
+class UploadFolderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.root = Path(self.tmp.name)
+        self.folder = self.root / "users_avatars"; self.folder.mkdir()
+        for name, data in (("a.png", b"aaa"), ("b.png", b"bbbb"), ("c.png", b"ccccc")): (self.folder / name).write_bytes(data)
+        self.bucket = _Bucket(); self.client = _Client(self.bucket)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def upload(self) -> dict:
+        return upload_folder(self.client, self.bucket, self.folder, "avatars/", self.root, max_workers=4)
+
+    def test_every_file_is_uploaded(self):
+        report = self.upload()
+        self.assertEqual((report["uploaded"], report["skipped"], report["failed"]), (3, 0, 0))
+        self.assertEqual(sorted(self.bucket.uploads), ["avatars/a.png", "avatars/b.png", "avatars/c.png"])
+
+    def test_matching_blobs_are_not_uploaded_again(self):
+        self.bucket.blob("avatars/a.png").upload_from_filename(str(self.folder / "a.png"))
+        self.bucket.blob("avatars/b.png").upload_from_filename(str(self.folder / "c.png"))  # same name, other bytes
+        self.bucket.uploads.clear()
+        report = self.upload()
+        self.assertEqual((report["uploaded"], report["skipped"], report["resumed"]), (2, 1, 0))
+        self.assertEqual(sorted(self.bucket.uploads), ["avatars/b.png", "avatars/c.png"])
+
+    def test_resumed_run_skips_logged_files_without_hashing_or_listing(self):
+        (self.folder / "d.png.part").write_bytes(b"torn")
+        self.upload(); self.bucket.uploads.clear(); self.client.listings = 0
+        with mock.patch.object(storage_transfer, "local_checksums", side_effect=AssertionError("hashed")):
+            report = self.upload()
+        self.assertEqual((report["uploaded"], report["skipped"], report["resumed"]), (0, 3, 3))
+        self.assertEqual((self.bucket.uploads, self.client.listings), ([], 0))
+        self.assertEqual(len((self.root / TRANSFER_LOG_NAME).read_text(encoding="utf-8").splitlines()), 3)
+
+        (self.folder / "b.png").write_bytes(b"edited")  # changed since it was logged: checked and sent again
+        report = self.upload()
+        self.assertEqual((report["uploaded"], report["resumed"]), (1, 2))
+        self.assertEqual((self.bucket.uploads, self.client.listings), (["avatars/b.png"], 1))
+
+if __name__ == "__main__":
+    unittest.main()